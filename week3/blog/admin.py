@@ -1,7 +1,11 @@
 # blog/admin.py
 
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.db import transaction
+from django.utils import timezone
+
 from .models import Category, Post, Comment
+from .moderation import APPROVE, OUTCOMES, BatchTooLarge, moderate
 
 # Simple registration
 # admin.site.register(Category)
@@ -27,14 +31,26 @@ class PostAdmin(admin.ModelAdmin):
     actions = ['make_published', 'make_draft']
     
     def make_published(self, request, queryset):
-        queryset.update(status='published')
-        self.message_user(request, f'{queryset.count()} posts published')
+        updated = self._set_status(queryset, 'published')
+        self.message_user(request, f'{updated} posts published')
     make_published.short_description = 'Mark selected as published'
     
     def make_draft(self, request, queryset):
-        queryset.update(status='draft')
-        self.message_user(request, f'{queryset.count()} posts marked as draft')
+        updated = self._set_status(queryset, 'draft')
+        self.message_user(request, f'{updated} posts marked as draft')
     make_draft.short_description = 'Mark selected as draft'
+    
+    def _set_status(self, queryset, status):
+        """Save each changed post, so post_save updates the stats and caches."""
+        updated = 0
+        with transaction.atomic():
+            for post in queryset.exclude(status=status):
+                post.status = status
+                if status == 'published' and post.published_at is None:
+                    post.published_at = timezone.now()
+                post.save()
+                updated += 1
+        return updated
 
 @admin.register(Comment)
 class CommentAdmin(admin.ModelAdmin):
@@ -44,6 +60,13 @@ class CommentAdmin(admin.ModelAdmin):
     actions = ['approve_comments']
     
     def approve_comments(self, request, queryset):
-        queryset.update(is_approved=True)
-        self.message_user(request, f'{queryset.count()} comments approved')
-    approve_comments.short_description = 'Approve selected comments'
\ No newline at end of file
+        # One UPDATE and one comments_moderated signal (stats, caches,
+        # notifications) for the whole selection
+        try:
+            outcomes = moderate(queryset, APPROVE, user=request.user)
+        except BatchTooLarge as exc:
+            self.message_user(request, str(exc), level=messages.ERROR)
+            return
+        approved = sum(1 for outcome in outcomes.values() if outcome == OUTCOMES[APPROVE])
+        self.message_user(request, f'{approved} comments approved')
+    approve_comments.short_description = 'Approve selected comments'
@@ -0,0 +1,223 @@
+# blog/analytics.py
+
+"""
+Time-bucketed view analytics: trending posts over 24h, 7d and 30d.
+Like Laravel: a rollup table fed by a queued aggregation job.
+
+Each view counter flush is upserted into one PostViewBucket per post and
+hour. Windows sum the buckets from their cutoff; the 24h window starts on
+an hour, longer ones reach into day buckets and start at midnight UTC
+(up to a day more than their length). Rankings are cached for
+TRENDING_CACHE_TIMEOUT seconds. Compaction folds hours older than
+HOURLY_RETENTION into days and drops days older than DAILY_RETENTION.
+
+Settings: BLOG_VIEW_ANALYTICS (see DEFAULTS).
+"""
+
+import logging
+import threading
+import time
+from collections import defaultdict
+from datetime import timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Q, Sum
+from django.utils import timezone
+
+from .models import Post, PostViewBucket
+
+
+DEFAULTS = {
+    'HOURLY_RETENTION': 48,         # Hours kept at hour resolution (>= 24 for an exact 24h window)
+    'DAILY_RETENTION': 90,          # Days kept at day resolution
+    'COMPACT_INTERVAL': 3600,       # Seconds between opportunistic compactions
+    'TRENDING_CACHE_TIMEOUT': 60,   # Seconds a ranking is reused
+}
+
+WINDOWS = {
+    '24h': timedelta(hours=24),
+    '7d': timedelta(days=7),
+    '30d': timedelta(days=30),
+}
+
+TRENDING_KEY = 'blog:analytics:trending:{window}:{limit}'
+
+logger = logging.getLogger(__name__)
+
+_compaction_lock = threading.Lock()
+_next_compaction = 0.0
+
+
+class CompactionConflict(Exception):
+    """Another compaction deleted hour buckets this one had read."""
+
+
+def get_setting(name):
+    return getattr(settings, 'BLOG_VIEW_ANALYTICS', {}).get(name, DEFAULTS[name])
+
+
+def bucket_start(moment, period=PostViewBucket.HOUR):
+    """Start (UTC) of the hour or day bucket containing `moment`."""
+    moment = moment.astimezone(dt_timezone.utc).replace(minute=0, second=0, microsecond=0)
+    if period == PostViewBucket.DAY:
+        moment = moment.replace(hour=0)
+    return moment
+
+
+def window_cutoff(window, now=None):
+    """Start of the oldest bucket inside a window ('24h', '7d', '30d')."""
+    length = WINDOWS[window]
+    # Past HOURLY_RETENTION the hours are folded into days: start on the
+    # day, or the first (partial) day's bucket would be left out
+    if length > timedelta(hours=get_setting('HOURLY_RETENTION')):
+        return bucket_start((now or timezone.now()) - length, PostViewBucket.DAY)
+    return bucket_start((now or timezone.now()) - length)
+
+
+def add_views(rows):
+    """
+    Add views to buckets, creating missing ones, in one statement.
+
+    Args:
+        rows: iterable of (post_id, period, start, views)
+    """
+    rows = [
+        (post_id, period, connection.ops.adapt_datetimefield_value(start), views)
+        for post_id, period, start, views in rows
+    ]
+    if not rows:
+        return
+
+    quote = connection.ops.quote_name
+    table = quote(PostViewBucket._meta.db_table)
+    values = ', '.join(['(%s, %s, %s, %s)'] * len(rows))
+    sql = (
+        f'INSERT INTO {table} ({quote("post_id")}, {quote("period")}, {quote("start")}, {quote("views")}) '
+        f'VALUES {values} '
+        f'ON CONFLICT ({quote("post_id")}, {quote("period")}, {quote("start")}) '
+        f'DO UPDATE SET {quote("views")} = {table}.{quote("views")} + excluded.{quote("views")}'
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [value for row in rows for value in row])
+
+
+def record_views(pending, flushed_at):
+    """
+    View counter listener: add a flushed batch to the hour buckets.
+    Runs inside the flush's transaction; compaction waits for the commit.
+    """
+    # Views of posts deleted since they were counted have no bucket to go to
+    post_ids = Post.objects.filter(pk__in=list(pending)).values_list('pk', flat=True)
+    start = bucket_start(flushed_at)
+    # Batches keep each statement under SQLite's 999 parameter limit
+    rows = [(post_id, PostViewBucket.HOUR, start, pending[post_id]) for post_id in post_ids]
+    for offset in range(0, len(rows), 200):
+        add_views(rows[offset:offset + 200])
+
+    transaction.on_commit(lambda: compact_if_due(now=flushed_at))
+
+
+def compact(now=None):
+    """
+    Fold old hour buckets into day buckets and drop expired day buckets.
+
+    Returns:
+        (hour buckets compacted, day buckets deleted)
+    """
+    now = now or timezone.now()
+    # Whole days only, so a day bucket never covers hours still kept per hour
+    hour_cutoff = bucket_start(now - timedelta(hours=get_setting('HOURLY_RETENTION')), PostViewBucket.DAY)
+    day_cutoff = bucket_start(now - timedelta(days=get_setting('DAILY_RETENTION')), PostViewBucket.DAY)
+
+    old_hours = PostViewBucket.objects.filter(period=PostViewBucket.HOUR, start__lt=hour_cutoff)
+    try:
+        with transaction.atomic():
+            rows = list(old_hours.select_for_update().values_list('pk', 'post_id', 'start', 'views'))
+            days = defaultdict(int)
+            for _, post_id, start, views in rows:
+                days[post_id, bucket_start(start, PostViewBucket.DAY)] += views
+
+            # Delete what was summed, by id: fewer rows deleted means another
+            # compaction already folded some of them into their days
+            ids = [row[0] for row in rows]
+            compacted = 0
+            for offset in range(0, len(ids), 500):
+                compacted += PostViewBucket.objects.filter(pk__in=ids[offset:offset + 500]).delete()[0]
+            if compacted != len(ids):
+                raise CompactionConflict
+
+            totals = [(post_id, PostViewBucket.DAY, day, views) for (post_id, day), views in days.items()]
+            for offset in range(0, len(totals), 200):
+                add_views(totals[offset:offset + 200])
+    except CompactionConflict:
+        compacted = 0
+
+    dropped = PostViewBucket.objects.filter(period=PostViewBucket.DAY, start__lt=day_cutoff).delete()[0]
+    return compacted, dropped
+
+
+def compact_if_due(now=None):
+    """Compact if COMPACT_INTERVAL has passed since this process last did; failures are logged."""
+    global _next_compaction
+    moment = time.monotonic()
+    with _compaction_lock:
+        if moment < _next_compaction:
+            return None
+        _next_compaction = moment + get_setting('COMPACT_INTERVAL')
+    try:
+        return compact(now)
+    except Exception:
+        logger.exception('Compacting view buckets failed')
+        return None
+
+
+def trending(window, limit=10):
+    """
+    The most viewed published posts of a window, cached.
+
+    Returns:
+        [(post_id, views)] - most views first
+    """
+    key = TRENDING_KEY.format(window=window, limit=limit)
+    ranking = cache.get(key)
+    if ranking is None:
+        ranking = list(
+            PostViewBucket.objects.filter(
+                start__gte=window_cutoff(window), post__status='published'
+            ).values('post_id').annotate(total=Sum('views'))
+            .order_by('-total', 'post_id').values_list('post_id', 'total')[:limit]
+        )
+        cache.set(key, ranking, get_setting('TRENDING_CACHE_TIMEOUT'))
+    return ranking
+
+
+def author_trends(user, order_by='7d', limit=10):
+    """
+    An author's posts with their views per window, in one grouped query.
+
+    Returns:
+        [{'rank', 'post_id', 'title', 'slug', 'views_24h', 'views_7d', 'views_30d'}]
+        ordered by the `order_by` window; posts without views in 30 days are left out
+    """
+    now = timezone.now()
+    totals = {
+        f'views_{window}': Sum('views', filter=Q(start__gte=window_cutoff(window, now)), default=0)
+        for window in WINDOWS
+    }
+    rows = (
+        PostViewBucket.objects.filter(post__author=user, start__gte=window_cutoff('30d', now))
+        .values('post_id', 'post__title', 'post__slug').annotate(**totals)
+        .order_by(f'-views_{order_by}', 'post_id')[:limit]
+    )
+    return [
+        {
+            'rank': rank,
+            'post_id': row['post_id'],
+            'title': row['post__title'],
+            'slug': row['post__slug'],
+            **{name: row[name] for name in totals},
+        }
+        for rank, row in enumerate(rows, start=1)
+    ]
@@ -7,7 +7,7 @@ Like Laravel's routes/api.php
 
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from . import api_views
+from . import api_views, async_api_views
 
 # Router for ViewSets (auto-generates URLs)
 # Like Laravel's Route::apiResource()
@@ -26,7 +26,20 @@ urlpatterns = [
     
     # Custom endpoints
     path('stats/', api_views.StatsAPIView.as_view(), name='stats'),
+    path('stats/views/', api_views.view_counter_stats, name='stats-views'),
+    path('stats/websockets/', api_views.websocket_stats, name='stats-websockets'),
+    path('stats/profile/', api_views.profile_stats, name='stats-profile'),
+    path('stats/fragments/', api_views.fragment_cache_stats, name='stats-fragments'),
     path('search/', api_views.search_api, name='search'),
+    path('import/posts/', api_views.import_posts_api, name='posts-import'),
+    path('export/posts/', api_views.export_posts_api, name='posts-export'),
+    
+    # Async versions of the read-only endpoints (blog/async_api_views.py)
+    path('async/posts/', async_api_views.post_list, name='async-post-list'),
+    path('async/posts/<slug:slug>/', async_api_views.post_detail, name='async-post-detail'),
+    path('async/search/', async_api_views.search, name='async-search'),
+    path('async/stats/', async_api_views.stats, name='async-stats'),
+    path('async/categories/', async_api_views.category_list, name='async-category-list'),
     
     # Include router URLs (posts and comments)
     # This generates:
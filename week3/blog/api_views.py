@@ -10,16 +10,35 @@ from rest_framework.decorators import api_view, action, permission_classes
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from django.shortcuts import get_object_or_404
+from django.http import StreamingHttpResponse
+from django.db import transaction
 from django.db.models import Count, Sum
 from .permissions import IsAuthorOrReadOnly, IsAdminOrReadOnly
 
-from .models import Category, Post, Comment
+from .analytics import WINDOWS as TRENDING_WINDOWS, trending
+from .bulk_io import (
+    WRITERS, ImportTooLarge, export_posts, get_max_bytes, get_max_rows, import_posts,
+    limit_bytes, limit_rows, read_rows,
+)
+from .filters import filter_categories, filter_posts, visible_posts
+from .fragment_cache import category_slugs, fragment_stats, get_setting as get_fragment_setting
+from .leaderboard import leaderboard
+from .models import Category, Post, Comment, published_posts_count
+from .moderation import BatchTooLarge, filter_comments, moderatable_comments, moderate
+from .pagination import KeysetPagination
+from .profiling import METRICS as PROFILE_METRICS, get_setting as get_profiling_setting, profiler
+from .response_cache import ResponseCacheMixin, post_last_modified, published_last_modified
+from .search import get_search_backend
+from .stats import get_site_stats
+from .view_counter import view_counter
+from .websocket_limits import websocket_metrics
 from .serializers import (
     CategorySerializer,
     PostListSerializer,
     PostDetailSerializer,
     PostWriteSerializer,
     CommentSerializer,
+    CommentModerationSerializer,
     StatsSerializer,
 )
 
@@ -63,15 +82,8 @@ class CategoryListCreateAPIView(generics.ListCreateAPIView):
     permission_classes = [IsAdminOrReadOnly]
     
     def get_queryset(self):
-        """Filter queryset (like Laravel query scopes)."""
-        queryset = super().get_queryset()
-        
-        # Filter by search query if provided
-        search = self.request.query_params.get('search', None)
-        if search:
-            queryset = queryset.filter(name__icontains=search)
-        
-        return queryset.order_by('name')
+        """Filter queryset (like Laravel query scopes, see blog/filters.py)."""
+        return filter_categories(self.request.query_params)
 
 
 class CategoryDetailAPIView(generics.RetrieveUpdateDestroyAPIView):
@@ -83,7 +95,7 @@ class CategoryDetailAPIView(generics.RetrieveUpdateDestroyAPIView):
     PUT/PATCH: Update category
     DELETE: Delete category
     """
-    queryset = Category.objects.all()
+    queryset = Category.objects.annotate(published_posts_count=published_posts_count('categories'))
     serializer_class = CategorySerializer
     lookup_field = 'slug'  # Use slug instead of ID
 
@@ -91,17 +103,27 @@ class CategoryDetailAPIView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [IsAdminOrReadOnly]
 
 # ViewSet (combines list, create, retrieve, update, destroy)
-class PostViewSet(viewsets.ModelViewSet):
+class PostViewSet(ResponseCacheMixin, viewsets.ModelViewSet):
     """
     CRUD for posts with permissions.
+    Anonymous list/retrieve responses are cached (see blog/response_cache.py).
     """
     
     queryset = Post.objects.filter(status='published').select_related('author').prefetch_related('categories')
     lookup_field = 'slug'
     
+    # Cursor pagination on (-created_at, id): no COUNT(*)/OFFSET per page
+    pagination_class = KeysetPagination
+    
     # ✅ ADD PERMISSION CLASSES
     permission_classes = [permissions.IsAuthenticatedOrReadOnly, IsAuthorOrReadOnly]
     
+    def get_last_modified(self, request, action, **kwargs):
+        """Last-Modified/ETag source for cached anonymous reads."""
+        if action == 'retrieve':
+            return post_last_modified(request, kwargs['slug'])
+        return published_last_modified(request)
+    
     def get_serializer_class(self):
         """
         Use different serializers for different actions.
@@ -118,34 +140,19 @@ class PostViewSet(viewsets.ModelViewSet):
         Filter queryset based on query parameters.
         Like Laravel: apply query filters
         """
-        queryset = super().get_queryset()
+        # Published posts plus the user's drafts, filtered by category,
+        # search and author (shared with the async views, see blog/filters.py)
+        queryset = filter_posts(visible_posts(self.request.user), self.request.query_params)
+        queryset = queryset.select_related('author').prefetch_related('categories').order_by('-created_at')
         
-        # If user is authenticated, show their drafts too
-        if self.request.user.is_authenticated:
-            queryset = Post.objects.filter(
-                author=self.request.user
-            ) | queryset
-            
-        # Filter by category
-        category = self.request.query_params.get('category', None)
-        if category:
-            queryset = queryset.filter(categories__slug=category)
-        
-        # Search in title and content
-        search = self.request.query_params.get('search', None)
-        if search:
-            queryset = queryset.filter(
-                title__icontains=search
-            ) | queryset.filter(
-                content__icontains=search
-            )
+        # Detail view: counts and comments in a fixed number of queries
+        if self.action == 'retrieve':
+            queryset = queryset.with_detail_relations()
+        # PostListSerializer never shows the body
+        elif self.action in ('list', 'popular'):
+            queryset = queryset.for_list()
         
-        # Filter by author
-        author = self.request.query_params.get('author', None)
-        if author:
-            queryset = queryset.filter(author__username=author)
-        
-        return queryset.distinct().order_by('-created_at')
+        return queryset
     
     def perform_create(self, serializer):
         """
@@ -181,9 +188,10 @@ class PostViewSet(viewsets.ModelViewSet):
                 'error': 'Authentication required'
             }, status=status.HTTP_401_UNAUTHORIZED)
         
-        posts = Post.objects.filter(author=request.user).order_by('-created_at')
-        serializer = PostListSerializer(posts, many=True)
-        return Response(serializer.data)
+        posts = Post.objects.filter(author=request.user).for_list().order_by('-created_at')
+        page = self.paginate_queryset(posts)
+        serializer = PostListSerializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
     
     @action(detail=False, methods=['get'])
     def drafts(self, request):
@@ -199,10 +207,11 @@ class PostViewSet(viewsets.ModelViewSet):
         drafts = Post.objects.filter(
             author=request.user,
             status='draft'
-        ).order_by('-created_at')
+        ).for_list().order_by('-created_at')
         
-        serializer = PostListSerializer(drafts, many=True)
-        return Response(serializer.data)
+        page = self.paginate_queryset(drafts)
+        serializer = PostListSerializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
     
     @action(detail=True, methods=['get'])
     def comments(self, request, slug=None):
@@ -213,18 +222,44 @@ class PostViewSet(viewsets.ModelViewSet):
         post = self.get_object()
         comments = post.comments.filter(is_approved=True).order_by('-created_at')
         
-        serializer = CommentSerializer(comments, many=True)
-        return Response(serializer.data)
+        page = self.paginate_queryset(comments)
+        serializer = CommentSerializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
     
     @action(detail=False, methods=['get'])
     def popular(self, request):
         """
         Get popular posts (most viewed).
-        GET /api/posts/popular/
+        GET /api/posts/popular/ - all-time views
+        GET /api/posts/popular/?category=django - all-time views in one category
+        GET /api/posts/popular/?window=7d - trending: views in the last 24h, 7d or 30d
         """
-        posts = self.get_queryset().order_by('-views')[:10]
-        serializer = PostListSerializer(posts, many=True)
-        return Response(serializer.data)
+        # Write buffered views first so the ranking lags by at most FLUSH_INTERVAL
+        view_counter.flush_if_due()
+        
+        window = request.query_params.get('window')
+        if window is None:
+            # Served from the in-memory top-10 (blog/leaderboard.py), no query
+            category = request.query_params.get('category')
+            if category is not None and category not in category_slugs():
+                # A made-up slug has no posts: don't query for it
+                return Response([])
+            return Response(leaderboard.top(category))
+        
+        if window not in TRENDING_WINDOWS:
+            return Response({
+                'error': f"window must be one of: {', '.join(TRENDING_WINDOWS)}"
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Ranking from the pre-aggregated view buckets (blog/analytics.py)
+        ranking = trending(window)
+        posts = self.get_queryset().in_bulk([post_id for post_id, _ in ranking])
+        ranking = [(posts[post_id], views) for post_id, views in ranking if post_id in posts]
+        
+        results = PostListSerializer([post for post, _ in ranking], many=True).data
+        for data, (_, views) in zip(results, ranking):
+            data['window_views'] = views
+        return Response(results)
 
 
 class CommentViewSet(viewsets.ModelViewSet):
@@ -233,6 +268,7 @@ class CommentViewSet(viewsets.ModelViewSet):
     """
     queryset = Comment.objects.all().select_related('post')
     serializer_class = CommentSerializer
+    pagination_class = KeysetPagination
     # ✅ ADD PERMISSION: Only admin can edit/delete
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
     
@@ -250,6 +286,39 @@ class CommentViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         """Comments start as unapproved."""
         serializer.save(is_approved=False)
+    
+    @action(detail=False, methods=['post'], permission_classes=[permissions.IsAuthenticated])
+    def moderate(self, request):
+        """
+        Approve, reject or delete many comments in one statement.
+        POST /api/comments/moderate/
+        
+        Staff can moderate any comment, authors the comments on their posts.
+        """
+        serializer = CommentModerationSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        
+        comments = moderatable_comments(request.user)
+        if 'ids' in data:
+            comments = comments.filter(pk__in=data['ids'])
+        else:
+            comments = filter_comments(comments, data['filter'])
+        
+        try:
+            outcomes = moderate(comments, data['action'], requested_ids=data.get('ids'), user=request.user)
+        except BatchTooLarge as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        summary = {}
+        for outcome in outcomes.values():
+            summary[outcome] = summary.get(outcome, 0) + 1
+        
+        return Response({
+            'action': data['action'],
+            'summary': summary,
+            'results': outcomes,
+        })
 
 
 # Custom API view for statistics
@@ -262,41 +331,8 @@ class StatsAPIView(APIView):
     """
     
     def get(self, request):
-        """Return various statistics."""
-        # Calculate stats
-        total_posts = Post.objects.count()
-        total_published = Post.objects.filter(status='published').count()
-        total_drafts = Post.objects.filter(status='draft').count()
-        total_categories = Category.objects.count()
-        total_comments = Comment.objects.filter(is_approved=True).count()
-        total_views = Post.objects.aggregate(Sum('views'))['views__sum'] or 0
-        
-        # Most viewed post
-        most_viewed = Post.objects.filter(status='published').order_by('-views').first()
-        most_viewed_post = {
-            'title': most_viewed.title if most_viewed else None,
-            'views': most_viewed.views if most_viewed else 0,
-        }
-        
-        # Recent posts
-        recent_posts = Post.objects.filter(status='published').order_by('-created_at')[:5]
-        
-        # Build response data
-        data = {
-            'total_posts': total_posts,
-            'total_published': total_published,
-            'total_drafts': total_drafts,
-            'total_categories': total_categories,
-            'total_comments': total_comments,
-            'total_views': total_views,
-            'most_viewed_post': most_viewed_post,
-            'recent_posts': PostListSerializer(recent_posts, many=True).data,
-        }
-        
-        # Use serializer to validate structure
-        serializer = StatsSerializer(data)
-        
-        return Response(serializer.data)
+        """Return various statistics (cached snapshot, see blog/stats.py)."""
+        return Response(get_site_stats())
 
 
 # Search API
@@ -313,23 +349,167 @@ def search_api(request):
             'error': 'Please provide a search query (q parameter)'
         }, status=status.HTTP_400_BAD_REQUEST)
     
-    # Search in title and content
+    # Ranked search in title and content (full-text index, see blog/search.py)
+    hits = get_search_backend().search(query, limit=20)
+    
+    # Load the matching posts in one query, then restore rank order
     posts = Post.objects.filter(
-        status='published'
-    ).filter(
-        title__icontains=query
-    ) | Post.objects.filter(
-        status='published'
-    ).filter(
-        content__icontains=query
-    )
+        pk__in=[hit.post_id for hit in hits]
+    ).select_related('author').prefetch_related('categories').for_list().in_bulk()
     
-    posts = posts.distinct()[:20]
+    hits = [hit for hit in hits if hit.post_id in posts]
+    serializer = PostListSerializer([posts[hit.post_id] for hit in hits], many=True)
     
-    serializer = PostListSerializer(posts, many=True)
+    results = serializer.data
+    for data, hit in zip(results, hits):
+        data['snippet'] = hit.snippet
+        data['rank'] = hit.rank
     
     return Response({
         'query': query,
-        'count': posts.count(),
-        'results': serializer.data
-    })
\ No newline at end of file
+        'count': len(results),
+        'results': results
+    })
+
+
+# Bulk import / export (blog/bulk_io.py)
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def import_posts_api(request):
+    """
+    Create posts from an NDJSON or CSV body, streamed in batches.
+    POST /api/import/posts/
+    Content-Type: application/x-ndjson (default) or text/csv
+    
+    Staff may set each row's author, views and dates; other users import
+    as themselves, with no views and the current time. Related posts are
+    left to `python manage.py rebuild_related_posts`.
+    
+    Bodies over BLOG_IMPORT_MAX_BYTES or BLOG_IMPORT_MAX_ROWS are rejected
+    with 413, and nothing is imported.
+    """
+    file_format = 'csv' if request.content_type.split(';')[0].strip() == 'text/csv' else 'ndjson'
+    max_bytes = get_max_bytes()
+    
+    try:
+        content_length = int(request.META.get('CONTENT_LENGTH') or 0)
+    except ValueError:
+        content_length = 0
+    if content_length > max_bytes:
+        return Response(
+            {'error': f'Uploads are limited to {max_bytes} bytes.'},
+            status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+        )
+    
+    # Read the raw body line by line instead of parsing it all into memory
+    stream = request.stream or ()
+    lines = (line.decode('utf-8', errors='replace') for line in limit_bytes(stream, max_bytes))
+    
+    try:
+        # One transaction: a rejected upload leaves no imported batches behind
+        with transaction.atomic():
+            report = import_posts(
+                limit_rows(read_rows(lines, file_format), get_max_rows()),
+                default_author=request.user,
+                allow_other_authors=request.user.is_staff,
+                allow_metadata=request.user.is_staff,
+                # One rebuild later instead of refreshing neighbour lists inside the request
+                refresh_related=False,
+            )
+    except ImportTooLarge as exc:
+        return Response({'error': str(exc)}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+    return Response(report.as_dict())
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def export_posts_api(request):
+    """
+    Stream posts as NDJSON or CSV.
+    GET /api/export/posts/?type=csv&status=published
+    
+    Staff export every post, other users their own.
+    """
+    file_format = request.query_params.get('type', 'ndjson')
+    if file_format not in WRITERS:
+        return Response({
+            'error': f"type must be one of: {', '.join(WRITERS)}"
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    posts = Post.objects.all()
+    if not request.user.is_staff:
+        posts = posts.filter(author=request.user)
+    
+    status_filter = request.query_params.get('status')
+    if status_filter:
+        posts = posts.filter(status=status_filter)
+    
+    writer = WRITERS[file_format]
+    response = StreamingHttpResponse(export_posts(posts, file_format), content_type=writer.content_type)
+    response['Content-Disposition'] = f'attachment; filename="posts.{writer.extension}"'
+    return response
+
+
+# View counter monitoring
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def view_counter_stats(request):
+    """
+    Pending and flushed view counts of the write-behind counter.
+    GET /api/stats/views/
+    """
+    return Response(view_counter.stats())
+
+
+# Websocket monitoring
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def websocket_stats(request):
+    """
+    Per-room websocket counters of this server process.
+    GET /api/stats/websockets/
+    """
+    return Response(websocket_metrics.snapshot())
+
+
+# Request profiling
+@api_view(['GET', 'DELETE'])
+@permission_classes([permissions.IsAdminUser])
+def profile_stats(request):
+    """
+    Query and latency percentiles per URL name, slowest first.
+    GET /api/stats/profile/?sort=queries
+    DELETE /api/stats/profile/ - start over
+    """
+    if request.method == 'DELETE':
+        profiler.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    sort = request.query_params.get('sort', 'wall_ms')
+    if sort not in PROFILE_METRICS:
+        return Response(
+            {'error': f"sort must be one of: {', '.join(PROFILE_METRICS)}"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    return Response({
+        'enabled': get_profiling_setting('ENABLED'),
+        'endpoints': profiler.report(sort=sort),
+    })
+
+
+@api_view(['GET', 'DELETE'])
+@permission_classes([permissions.IsAdminUser])
+def fragment_cache_stats(request):
+    """
+    Template fragment cache hits and misses of this process, per fragment.
+    GET /api/stats/fragments/
+    DELETE /api/stats/fragments/ - start over
+    """
+    if request.method == 'DELETE':
+        fragment_stats.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    return Response({
+        'enabled': get_fragment_setting('ENABLED'),
+        'fragments': fragment_stats.report(),
+    })
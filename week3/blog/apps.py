@@ -4,3 +4,21 @@ from django.apps import AppConfig
 class BlogConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'blog'
+
+    def ready(self):
+        # Register signal handlers (like Laravel's Post::observe())
+        from . import signals  # noqa: F401
+
+        # Feed flushed view counts into the hourly analytics buckets
+        from .analytics import record_views
+        from .view_counter import view_counter
+        view_counter.add_listener(record_views)
+
+        # Keep the popular posts leaderboard current between reloads
+        from .leaderboard import leaderboard
+        view_counter.add_listener(leaderboard.record_views)
+
+        # The refresh token blacklist relies on rotation (like a Laravel boot-time assertion)
+        from django.core import checks
+        from .token_blacklist import check_settings
+        checks.register(check_settings)
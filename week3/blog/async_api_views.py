@@ -0,0 +1,150 @@
+# blog/async_api_views.py
+
+"""
+Async (ASGI-native) versions of the hot read-only API endpoints.
+Like Laravel Octane: the same endpoints, without a worker per request.
+
+Plain `async def` views on the async ORM, answering exactly like their
+DRF counterparts under /api/async/ (posts, posts/<slug>, search, stats,
+categories). Writes stay on the DRF views.
+"""
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
+from rest_framework.exceptions import AuthenticationFailed, NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.request import Request
+from rest_framework.utils.encoders import JSONEncoder
+
+from .authentication import CachedJWTAuthentication
+from .filters import filter_categories, filter_posts, visible_posts
+from .models import Post
+from .pagination import KeysetPagination
+from .search import get_search_backend
+from .serializers import CategorySerializer, PostDetailSerializer, PostListSerializer
+from .stats import SITE_STATS_KEY, get_site_stats
+
+
+def json_response(data, status=200):
+    return JsonResponse(data, status=status, safe=False, encoder=JSONEncoder)
+
+
+def not_found(message='No Post matches the given query.'):
+    return json_response({'detail': message}, status=404)
+
+
+async def get_user(request):
+    """
+    The requesting user: Bearer token first, then the session.
+    Raises AuthenticationFailed for a bad token.
+    """
+    if request.headers.get('Authorization'):
+        # Signature check plus a (usually cached) user lookup
+        result = await sync_to_async(CachedJWTAuthentication().authenticate)(request)
+        if result is not None:
+            return result[0]
+    if hasattr(request, 'auser'):
+        return await request.auser()
+    return AnonymousUser()
+
+
+def authenticated(view):
+    """Resolve request.user asynchronously; bad credentials answer 401."""
+    async def wrapper(request, *args, **kwargs):
+        try:
+            request.user = await get_user(request)
+        except AuthenticationFailed as exc:
+            return json_response({'detail': str(exc.detail)}, status=401)
+        return await view(request, *args, **kwargs)
+
+    wrapper.__name__ = view.__name__
+    wrapper.__doc__ = view.__doc__
+    return wrapper
+
+
+@require_GET
+@authenticated
+async def post_list(request):
+    """GET /api/async/posts/?category=&search=&author=&cursor=&page_size="""
+    # Same filters as PostViewSet (blog/filters.py); the category check reads the cache
+    queryset = await sync_to_async(filter_posts)(visible_posts(request.user), request.GET)
+    queryset = queryset.select_related('author').prefetch_related('categories').for_list()
+
+    paginator = KeysetPagination()
+    try:
+        posts = await paginator.apaginate_queryset(queryset, request)
+    except NotFound as exc:
+        return not_found(str(exc.detail))
+
+    data = PostListSerializer(posts, many=True).data
+    return json_response(paginator.get_paginated_data(data))
+
+
+@require_GET
+@authenticated
+async def post_detail(request, slug):
+    """GET /api/async/posts/<slug>/"""
+    queryset = visible_posts(request.user).distinct().with_detail_relations()
+    try:
+        post = await queryset.aget(slug=slug)
+    except Post.DoesNotExist:
+        return not_found()
+
+    return json_response(PostDetailSerializer(post, context={'request': request}).data)
+
+
+@require_GET
+async def search(request):
+    """GET /api/async/search/?q=django"""
+    query = request.GET.get('q', '')
+    if not query:
+        return json_response({
+            'error': 'Please provide a search query (q parameter)'
+        }, status=400)
+
+    hits = await sync_to_async(get_search_backend().search)(query, limit=20)
+
+    posts = await Post.objects.filter(
+        pk__in=[hit.post_id for hit in hits]
+    ).select_related('author').prefetch_related('categories').for_list().ain_bulk()
+
+    hits = [hit for hit in hits if hit.post_id in posts]
+    results = PostListSerializer([posts[hit.post_id] for hit in hits], many=True).data
+    for data, hit in zip(results, hits):
+        data['snippet'] = hit.snippet
+        data['rank'] = hit.rank
+
+    return json_response({
+        'query': query,
+        'count': len(results),
+        'results': results,
+    })
+
+
+@require_GET
+async def stats(request):
+    """GET /api/async/stats/ - cached snapshot, rebuilt in a worker thread when stale."""
+    data = await cache.aget(SITE_STATS_KEY)
+    if data is None:
+        data = await sync_to_async(get_site_stats)()
+    return json_response(data)
+
+
+@require_GET
+async def category_list(request):
+    """GET /api/async/categories/?search="""
+    # DRF's own PageNumberPagination, run in a worker thread: it counts and
+    # slices synchronously, and the envelope stays identical to /api/categories/
+    paginator = PageNumberPagination()
+    try:
+        categories = await sync_to_async(paginator.paginate_queryset)(
+            filter_categories(request.GET), Request(request)
+        )
+    except NotFound as exc:
+        return not_found(str(exc.detail))
+
+    data = CategorySerializer(categories, many=True).data
+    return json_response(paginator.get_paginated_response(data).data)
@@ -14,6 +14,8 @@ from rest_framework_simplejwt.views import TokenObtainPairView
 from django.contrib.auth.models import User
 from django.contrib.auth import authenticate
 from rest_framework import serializers
+from .models import published_posts_count
+from .token_blacklist import blacklist_token
 
 
 # Serializers for authentication
@@ -74,6 +76,10 @@ class UserSerializer(serializers.ModelSerializer):
         read_only_fields = ['date_joined']
     
     def get_posts_count(self, obj):
+        # Annotated by ProfileView; other views fall back to a COUNT query
+        count = getattr(obj, 'published_posts_count', None)
+        if count is not None:
+            return count
         return obj.posts.filter(status='published').count()
 
 
@@ -178,8 +184,8 @@ class LogoutView(APIView):
         try:
             refresh_token = request.data.get('refresh')
             if refresh_token:
-                token = RefreshToken(refresh_token)
-                token.blacklist()  # Blacklist the refresh token
+                # Blacklist the refresh token (blog/token_blacklist.py)
+                blacklist_token(RefreshToken(refresh_token))
             
             return Response({
                 'message': 'Logout successful'
@@ -201,8 +207,10 @@ class ProfileView(generics.RetrieveUpdateAPIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def get_object(self):
-        # Return current user
-        return self.request.user
+        # Return current user, with posts_count annotated in the same query
+        return User.objects.annotate(
+            published_posts_count=published_posts_count('author')
+        ).get(pk=self.request.user.pk)
 
 
 class ChangePasswordView(APIView):
@@ -0,0 +1,100 @@
+# blog/authentication.py
+
+"""
+JWT authentication with a cached user lookup.
+Like Laravel Sanctum with a cached user provider.
+
+CachedJWTAuthentication caches the token's user (without the password
+hash) for BLOG_AUTH_USER_CACHE_TIMEOUT seconds. Keys include a per-user
+version that saving or deleting the user bumps (blog/signals.py), so a
+changed user is never served from the cache. simplejwt's is_active and
+CHECK_REVOKE_TOKEN checks still run on cached users.
+"""
+
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import router
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+
+USER_VERSION_KEY = 'blog:auth:version:{}'
+USER_KEY = 'blog:auth:user:{}:{}'
+
+
+def get_timeout():
+    return getattr(settings, 'BLOG_AUTH_USER_CACHE_TIMEOUT', 60)
+
+
+def _first_version():
+    # Versions never expire, but can be evicted while user entries under
+    # them survive: start from the clock, never from a fixed number, so an
+    # old entry is never found again
+    return int(time.time() * 1000)
+
+
+def get_user_version(user_id):
+    key = USER_VERSION_KEY.format(user_id)
+    version = cache.get(key)
+    if version is None:
+        # add() so concurrent first requests agree on one value
+        cache.add(key, _first_version(), None)
+        version = cache.get(key)
+    return version
+
+
+def invalidate_user(user_id):
+    """Orphan every cached copy of a user (blog/signals.py calls this on save/delete)."""
+    key = USER_VERSION_KEY.format(user_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # No version yet (or evicted): any new one orphans the old entries
+        cache.set(key, _first_version(), None)
+
+
+def _cached_fields(user_model):
+    return [field.attname for field in user_model._meta.concrete_fields if field.attname != 'password']
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication that loads each user from the database once per timeout."""
+
+    def to_cache(self, user):
+        """(field values without the password, digest of the password hash)"""
+        values = tuple(getattr(user, name) for name in _cached_fields(self.user_model))
+        return values, get_md5_hash_password(user.password)
+
+    def from_cache(self, values):
+        """A User as if loaded with .defer('password')."""
+        db = router.db_for_read(self.user_model)
+        return self.user_model.from_db(db, _cached_fields(self.user_model), values)
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+
+        key = USER_KEY.format(user_id, get_user_version(user_id))
+        entry = cache.get(key)
+        if entry is None:
+            # Database lookup plus simplejwt's own checks
+            user = super().get_user(validated_token)
+            cache.set(key, self.to_cache(user), get_timeout())
+            return user
+
+        values, password_digest = entry
+        user = self.from_cache(values)
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+        if api_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+            api_settings.REVOKE_TOKEN_CLAIM
+        ) != password_digest:
+            raise AuthenticationFailed(_("The user's password has been changed."), code='password_changed')
+        return user
@@ -0,0 +1,406 @@
+# blog/bulk_io.py
+
+"""
+Bulk post import and export.
+Like Laravel Excel: chunked imports and streamed exports.
+
+Imports read NDJSON or CSV line by line and insert batches with a fixed
+number of queries each, then send one `posts_imported` signal per batch
+(bulk_create sends no post_save). Exports stream from `iterator()`.
+Rows: NDJSON objects, or CSV with categories joined by '|'. API uploads
+are capped by BLOG_IMPORT_MAX_BYTES and BLOG_IMPORT_MAX_ROWS.
+"""
+
+import csv
+import io
+import json
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.dispatch import Signal
+from django.utils import timezone
+
+from .models import Category, Post
+from .rendering import render_post
+from .serializers import PostImportSerializer
+
+
+# Columns of an export file (and the fields an import row may carry)
+POST_FIELDS = (
+    'title', 'slug', 'content', 'excerpt', 'status', 'author',
+    'categories', 'views', 'created_at', 'published_at',
+)
+
+# Separator for the categories column of CSV files
+CATEGORY_SEPARATOR = '|'
+
+# CSV text cells starting with one of these are read as formulas by
+# spreadsheets; the writer prefixes them with FORMULA_ESCAPE
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+FORMULA_ESCAPE = "'"
+
+# Import errors kept for the report (the rest are only counted)
+MAX_REPORTED_ERRORS = 100
+
+# Sent once per imported batch with post_ids, author_ids and refresh_related
+posts_imported = Signal()
+
+
+class ImportTooLarge(Exception):
+    """An upload has more bytes or rows than the API accepts."""
+
+
+def get_batch_size():
+    """Rows validated and inserted together."""
+    return getattr(settings, 'BLOG_IMPORT_BATCH_SIZE', 500)
+
+
+def get_max_bytes():
+    """Largest body POST /api/import/posts/ reads."""
+    return getattr(settings, 'BLOG_IMPORT_MAX_BYTES', 10 * 1024 * 1024)
+
+
+def get_max_rows():
+    """Most rows one POST /api/import/posts/ may carry."""
+    return getattr(settings, 'BLOG_IMPORT_MAX_ROWS', 10000)
+
+
+def limit_bytes(lines, max_bytes):
+    """Pass byte lines through, raising ImportTooLarge past max_bytes."""
+    total = 0
+    for line in lines:
+        total += len(line)
+        if total > max_bytes:
+            raise ImportTooLarge(f'Uploads are limited to {max_bytes} bytes.')
+        yield line
+
+
+def limit_rows(rows, max_rows):
+    """Pass read_rows() output through, raising ImportTooLarge past max_rows."""
+    for count, row in enumerate(rows, start=1):
+        if count > max_rows:
+            raise ImportTooLarge(f'Uploads are limited to {max_rows} rows.')
+        yield row
+
+
+# Writers
+
+class NDJSONWriter:
+    """Format rows as newline-delimited JSON."""
+
+    content_type = 'application/x-ndjson'
+    extension = 'ndjson'
+
+    def __init__(self, fields):
+        self.fields = fields
+
+    def header(self):
+        return ''
+
+    def row(self, data):
+        return json.dumps({field: data.get(field) for field in self.fields}, cls=DjangoJSONEncoder) + '\n'
+
+
+class CSVWriter:
+    """
+    Format rows as CSV; lists are joined with CATEGORY_SEPARATOR.
+    Text that a spreadsheet would run as a formula gets a leading
+    FORMULA_ESCAPE (comment names and bodies come from anonymous readers).
+    """
+
+    content_type = 'text/csv'
+    extension = 'csv'
+
+    def __init__(self, fields):
+        self.fields = fields
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer)
+
+    def _line(self, values):
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        self._writer.writerow(values)
+        return self._buffer.getvalue()
+
+    def header(self):
+        return self._line(self.fields)
+
+    def row(self, data):
+        values = []
+        for field in self.fields:
+            value = data.get(field)
+            if isinstance(value, (list, tuple)):
+                value = CATEGORY_SEPARATOR.join(value)
+            elif value is None:
+                value = ''
+            elif hasattr(value, 'isoformat'):
+                value = value.isoformat()
+            if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+                value = FORMULA_ESCAPE + value
+            values.append(value)
+        return self._line(values)
+
+
+WRITERS = {
+    'ndjson': NDJSONWriter,
+    'csv': CSVWriter,
+}
+
+
+def get_writer(file_format, fields=POST_FIELDS):
+    """Writer instance for 'ndjson' or 'csv' (ValueError for anything else)."""
+    try:
+        return WRITERS[file_format](fields)
+    except KeyError:
+        raise ValueError(f'Unsupported format: {file_format}')
+
+
+def stream_rows(rows, writer):
+    """Yield a header and one formatted line per row dict (for StreamingHttpResponse)."""
+    header = writer.header()
+    if header:
+        yield header
+    for row in rows:
+        yield writer.row(row)
+
+
+# Export
+
+def post_to_row(post):
+    return {
+        'title': post.title,
+        'slug': post.slug,
+        'content': post.content,
+        'excerpt': post.excerpt,
+        'status': post.status,
+        'author': post.author.username,
+        'categories': [category.slug for category in post.categories.all()],
+        'views': post.views,
+        'created_at': post.created_at,
+        'published_at': post.published_at,
+    }
+
+
+def export_posts(queryset, file_format='ndjson', chunk_size=1000):
+    """
+    Yield an export file chunk by chunk.
+
+    Rows come from a server-side cursor; categories are prefetched once
+    per chunk of `chunk_size` posts.
+    """
+    posts = queryset.select_related('author').prefetch_related('categories').order_by('pk')
+    rows = (post_to_row(post) for post in posts.iterator(chunk_size=chunk_size))
+    return stream_rows(rows, get_writer(file_format))
+
+
+# Import
+
+def read_rows(lines, file_format):
+    """
+    Parse an import file lazily.
+
+    Args:
+        lines: iterable of text lines (an open file, a decoded request stream)
+        file_format: 'ndjson' or 'csv'
+
+    Yields:
+        (line_number, row_dict, error) - row_dict is None when the line
+        could not be parsed; blank lines are skipped
+    """
+    if file_format == 'ndjson':
+        for number, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as exc:
+                yield number, None, f'Invalid JSON: {exc.msg}'
+                continue
+            if not isinstance(row, dict):
+                yield number, None, 'Each line must be a JSON object'
+                continue
+            yield number, row, None
+
+    elif file_format == 'csv':
+        reader = csv.DictReader(lines)
+        for row in reader:
+            # Empty cells mean "not given", so defaults apply
+            row = {key: _unescape_formula(value) for key, value in row.items() if key and value not in ('', None)}
+            if not row:
+                continue
+            if 'categories' in row:
+                row['categories'] = [slug for slug in row['categories'].split(CATEGORY_SEPARATOR) if slug]
+            yield reader.line_num, row, None
+
+    else:
+        raise ValueError(f'Unsupported format: {file_format}')
+
+
+def _unescape_formula(value):
+    """Undo CSVWriter's formula escaping, so exports import unchanged."""
+    if value.startswith(FORMULA_ESCAPE) and value[1:].startswith(FORMULA_PREFIXES):
+        return value[1:]
+    return value
+
+
+def _batches(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class ImportReport:
+    """Running totals of an import."""
+
+    def __init__(self):
+        self.created = 0
+        self.failed = 0
+        self.errors = []
+
+    def add_error(self, line, errors):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line, 'errors': errors})
+
+    def as_dict(self):
+        return {'created': self.created, 'failed': self.failed, 'errors': self.errors}
+
+
+def import_posts(rows, default_author=None, allow_other_authors=True, allow_metadata=True,
+                 batch_size=None, refresh_related=True):
+    """
+    Create posts from parsed rows in batches.
+
+    Args:
+        rows: iterable of (line_number, row_dict, error) from read_rows()
+        default_author: User for rows without an 'author' column
+        allow_other_authors: False forces every row onto default_author
+            (non-staff API uploads)
+        allow_metadata: False ignores the views, created_at and published_at
+            columns, so posts start like ones written by hand (non-staff
+            API uploads)
+        batch_size: rows per batch (BLOG_IMPORT_BATCH_SIZE by default)
+        refresh_related: passed on to posts_imported; False leaves related
+            posts to a later `rebuild_related_posts`
+
+    Returns:
+        ImportReport
+    """
+    report = ImportReport()
+    for batch in _batches(rows, batch_size or get_batch_size()):
+        _import_batch(batch, report, default_author, allow_other_authors, allow_metadata, refresh_related)
+    return report
+
+
+def _import_batch(batch, report, default_author, allow_other_authors, allow_metadata, refresh_related):
+    # 1. Validate each row on its own (no queries)
+    valid = []
+    for line, row, error in batch:
+        if error:
+            report.add_error(line, {'row': [error]})
+            continue
+        serializer = PostImportSerializer(data=row)
+        if serializer.is_valid():
+            valid.append((line, serializer.validated_data))
+        else:
+            report.add_error(line, serializer.errors)
+
+    if not valid:
+        return
+
+    # 2. Resolve slugs, authors and categories with one query each
+    slugs = [data['slug'] for _, data in valid]
+    taken = set(Post.objects.filter(slug__in=slugs).values_list('slug', flat=True))
+
+    authors = {}
+    if allow_other_authors:
+        usernames = {data['author'] for _, data in valid if 'author' in data}
+        authors = {user.username: user for user in User.objects.filter(username__in=usernames)}
+
+    category_slugs = {slug for _, data in valid for slug in data['categories']}
+    categories = dict(Category.objects.filter(slug__in=category_slugs).values_list('slug', 'id'))
+
+    # 3. Build unsaved posts
+    now = timezone.now()
+    posts, post_categories, lines = [], [], []
+    for line, data in valid:
+        errors = {}
+        slug = data['slug']
+        if slug in taken:
+            errors['slug'] = ['A post with this slug already exists.']
+
+        author = default_author
+        if allow_other_authors and 'author' in data:
+            author = authors.get(data['author'])
+        if author is None:
+            errors['author'] = [f"Unknown author: {data.get('author', '')}"]
+
+        missing = [slug for slug in data['categories'] if slug not in categories]
+        if missing:
+            errors['categories'] = [f"Unknown categories: {', '.join(missing)}"]
+
+        if errors:
+            report.add_error(line, errors)
+            continue
+
+        taken.add(slug)  # Also rejects a repeated slug later in the file
+        post = Post(
+            title=data['title'],
+            slug=slug,
+            content=data['content'],
+            excerpt=data['excerpt'],
+            status=data['status'],
+            author=author,
+            views=data['views'] if allow_metadata else 0,
+            published_at=data.get('published_at') if allow_metadata else None,
+        )
+        # Like Post.publish(): a published post has a publication date
+        if post.status == 'published' and post.published_at is None:
+            post.published_at = now
+        # bulk_create() skips Post.save(), which renders the body
+        render_post(post)
+        post._import_created_at = data.get('created_at') if allow_metadata else None
+        posts.append(post)
+        post_categories.append({categories[slug] for slug in data['categories']})
+        lines.append(line)
+
+    if not posts:
+        return
+
+    # 4. Insert posts, then their category links
+    try:
+        with transaction.atomic():
+            Post.objects.bulk_create(posts)
+
+            # created_at is auto_now_add, so bulk_create() overwrote it
+            dated = [post for post in posts if post._import_created_at]
+            for post in dated:
+                post.created_at = post._import_created_at
+            if dated:
+                Post.objects.bulk_update(dated, ['created_at'])
+
+            Post.categories.through.objects.bulk_create([
+                Post.categories.through(post_id=post.pk, category_id=category_id)
+                for post, category_ids in zip(posts, post_categories)
+                for category_id in category_ids
+            ])
+    except IntegrityError as exc:
+        # Lost a race on a slug: the whole batch was rolled back
+        for line in lines:
+            report.add_error(line, {'non_field_errors': [f'Batch rolled back: {exc}']})
+        return
+
+    report.created += len(posts)
+    posts_imported.send(
+        sender=Post,
+        post_ids=[post.pk for post in posts],
+        author_ids={post.author_id for post in posts},
+        refresh_related=refresh_related,
+    )
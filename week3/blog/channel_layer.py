@@ -0,0 +1,284 @@
+# blog/channel_layer.py
+
+"""
+In-process channel layer with cheap group fan-out.
+
+For tests and single-process deployments (groups don't cross processes).
+group_send queues the same message object for every member, so treat
+received messages as read-only, and receive() coalesces a backlog of
+`batch_types` messages into one '<type>.batch' message. group_send may be
+called from another thread's event loop.
+
+    CHANNEL_LAYERS = {'default': {
+        'BACKEND': 'blog.channel_layer.LocalChannelLayer',
+        'CONFIG': {'batch_types': ['chat.frame'], 'max_batch': 50},
+    }}
+"""
+
+import asyncio
+import random
+import string
+import threading
+import time
+from collections import deque
+
+from channels.exceptions import ChannelFull
+from channels.layers import BaseChannelLayer
+
+
+class _ChannelQueue:
+    """Pending messages of one channel and the receivers waiting on it."""
+
+    __slots__ = ('lock', 'messages', 'waiters')
+
+    def __init__(self, lock):
+        self.lock = lock         # the layer's lock
+        self.messages = deque()  # (expires_at, message)
+        self.waiters = deque()   # futures of blocked receive() calls
+
+    def wake(self):
+        # Caller must hold self.lock
+        while self.waiters:
+            waiter = self.waiters.popleft()
+            if waiter.done():
+                continue
+            loop = waiter.get_loop()
+            if _running_loop() is loop:
+                waiter.set_result(None)
+            else:
+                # group_send from another thread (blog/notifications.py):
+                # futures may only be resolved by their own loop
+                try:
+                    loop.call_soon_threadsafe(self._wake_waiter, waiter)
+                except RuntimeError:
+                    continue  # That loop is closed
+            return
+
+    def _wake_waiter(self, waiter):
+        if waiter.done():
+            # Cancelled meanwhile: pass the wakeup on
+            with self.lock:
+                self.wake()
+        else:
+            waiter.set_result(None)
+
+
+def _running_loop():
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+class LocalChannelLayer(BaseChannelLayer):
+    """
+    Channel layer keeping every queue and group in this process's memory.
+
+    Args (settings CONFIG):
+        expiry: seconds an undelivered message is kept
+        group_expiry: seconds a group membership lasts without renewal
+        capacity / channel_capacity: max pending messages per channel;
+            group_send skips full channels, send() raises ChannelFull
+        batch_types: message types receive() may coalesce
+        max_batch: most messages coalesced into one batch
+        cleanup_interval: seconds between expiry sweeps
+    """
+
+    extensions = ['groups', 'flush']
+
+    def __init__(self, expiry=60, group_expiry=86400, capacity=100, channel_capacity=None,
+                 batch_types=(), max_batch=50, cleanup_interval=1.0, **kwargs):
+        super().__init__(expiry=expiry, capacity=capacity, channel_capacity=channel_capacity, **kwargs)
+        self.group_expiry = group_expiry
+        self.batch_types = frozenset(batch_types)
+        self.max_batch = max_batch
+        self.cleanup_interval = cleanup_interval
+
+        self._lock = threading.Lock()
+        self.channels = {}  # channel name -> _ChannelQueue
+        self.groups = {}    # group name -> {channel name: joined_at}
+        self._next_cleanup = 0.0
+        self._counters = dict.fromkeys(
+            ('sent', 'group_sends', 'received', 'batches', 'dropped_full', 'expired'), 0
+        )
+
+    # Channel layer API
+
+    async def new_channel(self, prefix='specific.'):
+        suffix = ''.join(random.choices(string.ascii_letters, k=12))
+        return f'{prefix}.local!{suffix}'
+
+    async def send(self, channel, message):
+        """Queue a message on one channel (raises ChannelFull at capacity)."""
+        assert isinstance(message, dict), 'message is not a dict'
+        self.require_valid_channel_name(channel)
+        with self._lock:
+            queued = self._put(channel, message, time.time() + self.expiry)
+        if not queued:
+            raise ChannelFull(channel)
+
+    async def receive(self, channel):
+        """
+        Wait for the next message on a channel.
+        Several waiting messages of a batch type come back as one batch.
+        """
+        self.require_valid_channel_name(channel)
+        self._maybe_clean()
+        loop = asyncio.get_running_loop()
+
+        while True:
+            with self._lock:
+                # flush() may have replaced the queue while we waited
+                queue = self.channels.get(channel)
+                if queue is None:
+                    queue = self.channels[channel] = _ChannelQueue(self._lock)
+                message = self._pop(channel, queue)
+                if message is not None:
+                    return message
+                # Registered under the lock, so a _put() from another thread can't slip in between
+                waiter = loop.create_future()
+                queue.waiters.append(waiter)
+
+            try:
+                await waiter
+            finally:
+                if not waiter.done():
+                    waiter.cancel()
+
+    # Groups extension
+
+    async def group_add(self, group, channel):
+        self.require_valid_group_name(group)
+        self.require_valid_channel_name(channel)
+        with self._lock:
+            self.groups.setdefault(group, {})[channel] = time.time()
+
+    async def group_discard(self, group, channel):
+        self.require_valid_group_name(group)
+        self.require_valid_channel_name(channel)
+        with self._lock:
+            members = self.groups.get(group)
+            if members is not None:
+                members.pop(channel, None)
+                if not members:
+                    del self.groups[group]
+
+    async def group_send(self, group, message):
+        """
+        Queue one shared message on every member channel.
+        Members at capacity miss the message (as with channels_redis).
+        """
+        assert isinstance(message, dict), 'message is not a dict'
+        self.require_valid_group_name(group)
+        self._maybe_clean()
+
+        expires_at = time.time() + self.expiry
+        with self._lock:
+            self._counters['group_sends'] += 1
+            for channel in list(self.groups.get(group, ())):
+                if not self._put(channel, message, expires_at):
+                    self._counters['dropped_full'] += 1
+
+    # Flush extension
+
+    async def flush(self):
+        with self._lock:
+            old_channels = self.channels
+            self.channels = {}
+            self.groups = {}
+            # Blocked receivers start waiting on the new, empty queues
+            for queue in old_channels.values():
+                while queue.waiters:
+                    queue.wake()
+
+    async def close(self):
+        pass
+
+    # Monitoring
+
+    def stats(self):
+        """Counters since start plus current queue sizes."""
+        with self._lock:
+            return {
+                **self._counters,
+                'channels': len(self.channels),
+                'groups': len(self.groups),
+                'pending': sum(len(queue.messages) for queue in self.channels.values()),
+            }
+
+    # Internals
+
+    def _put(self, channel, message, expires_at):
+        """Append to a channel queue and wake a receiver. False if the channel is full."""
+        # Caller must hold self._lock
+        queue = self.channels.get(channel)
+        if queue is None:
+            queue = self.channels[channel] = _ChannelQueue(self._lock)
+        if len(queue.messages) >= self.get_capacity(channel):
+            return False
+        queue.messages.append((expires_at, message))
+        queue.wake()
+        self._counters['sent'] += 1
+        return True
+
+    def _pop(self, channel, queue):
+        """Next live message (or batch) from a queue, None if there is none."""
+        # Caller must hold self._lock
+        self._drop_expired(channel, queue, time.time())
+
+        messages = queue.messages
+        if not messages:
+            return None
+
+        message = messages.popleft()[1]
+        message_type = message.get('type')
+        self._counters['received'] += 1
+
+        if message_type in self.batch_types and messages and messages[0][1].get('type') == message_type:
+            batch = [message]
+            while len(batch) < self.max_batch and messages and messages[0][1].get('type') == message_type:
+                batch.append(messages.popleft()[1])
+            self._counters['received'] += len(batch) - 1
+            self._counters['batches'] += 1
+            message = {'type': f'{message_type}.batch', 'messages': batch}
+
+        if not messages and not queue.waiters:
+            self.channels.pop(channel, None)
+        return message
+
+    def _drop_expired(self, channel, queue, now):
+        """
+        Drop messages older than `expiry`. A channel that let a message
+        expire has no consumer any more, so it also leaves every group.
+        Caller must hold self._lock.
+        """
+        messages = queue.messages
+        expired = 0
+        while messages and messages[0][0] < now:
+            messages.popleft()
+            expired += 1
+        if expired:
+            self._counters['expired'] += expired
+            for members in self.groups.values():
+                members.pop(channel, None)
+
+    def _maybe_clean(self):
+        """Expiry sweep over all channels and groups, at most once per cleanup_interval."""
+        now = time.time()
+        with self._lock:
+            if now < self._next_cleanup:
+                return
+            self._next_cleanup = now + self.cleanup_interval
+
+            for channel, queue in list(self.channels.items()):
+                self._drop_expired(channel, queue, now)
+                if not queue.messages and not queue.waiters:
+                    del self.channels[channel]
+
+            joined_before = now - self.group_expiry
+            for group, members in list(self.groups.items()):
+                for channel, joined_at in list(members.items()):
+                    if joined_at < joined_before:
+                        del members[channel]
+                if not members:
+                    del self.groups[group]
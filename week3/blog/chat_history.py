@@ -0,0 +1,270 @@
+# blog/chat_history.py
+
+"""
+Recent chat history per room, kept in memory.
+
+Each room keeps its last SIZE messages, JSON-encoded, in a ring buffer;
+ChatConsumer sends it to new connections as one "history" frame. Frames
+carry a `seq`, so a client reconnecting with ?after=<seq>&epoch=<epoch>
+gets only what it missed (or `reset: true` if that's gone). With
+PERSIST_DIR set, rooms are also appended to NDJSON files from a
+background thread and reloaded after a restart. At most MAX_ROOMS rooms
+stay in memory.
+
+Settings: BLOG_CHAT_HISTORY (see DEFAULTS).
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import secrets
+import threading
+from collections import OrderedDict, deque
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'SIZE': 100,           # Messages kept per room
+    'PERSIST_DIR': None,   # Directory for room logs (None: memory only)
+    'PERSIST_ROOMS': None, # Room group names that get a log (None: every room)
+    'MAX_ROOMS': 1000,     # Rooms kept in memory
+}
+
+# A persisted log is rewritten once it holds this many times SIZE lines
+COMPACT_FACTOR = 10
+
+
+def get_setting(name):
+    return getattr(settings, 'BLOG_CHAT_HISTORY', {}).get(name, DEFAULTS[name])
+
+
+class RoomLog:
+    """
+    Append-only NDJSON file of one room's messages.
+    The first line is a header with the room's epoch.
+    After load(), only the LogWriter thread touches the file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lines = 0
+
+    def load(self, size):
+        """Returns (epoch, [(seq, frame), ...] of the last `size` messages); epoch None if no file."""
+        if not os.path.exists(self.path):
+            return None, []
+
+        epoch = None
+        tail = deque(maxlen=size)
+        with open(self.path, encoding='utf-8') as handle:
+            for line in handle:
+                record = json.loads(line)
+                if 'epoch' in record:
+                    epoch = record['epoch']
+                else:
+                    tail.append((record['seq'], record['frame']))
+                    self.lines += 1
+        return epoch, list(tail)
+
+    def start(self, epoch):
+        self.rewrite(epoch, [])
+
+    def append(self, seq, frame):
+        with open(self.path, 'a', encoding='utf-8') as handle:
+            handle.write(json.dumps({'seq': seq, 'frame': frame}) + '\n')
+        self.lines += 1
+
+    def rewrite(self, epoch, entries):
+        """Replace the file with a header and `entries` (atomic rename)."""
+        temporary = f'{self.path}.tmp'
+        with open(temporary, 'w', encoding='utf-8') as handle:
+            handle.write(json.dumps({'epoch': epoch}) + '\n')
+            for seq, frame in entries:
+                handle.write(json.dumps({'seq': seq, 'frame': frame}) + '\n')
+        os.replace(temporary, self.path)
+        self.lines = len(entries)
+
+
+class LogWriter:
+    """One background thread doing every room's file writes, in order."""
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def submit(self, function, *args):
+        self._start()
+        self._queue.put((function, args))
+
+    def flush(self):
+        """Wait until everything submitted so far is written."""
+        if self._thread is not None:
+            self._queue.join()
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='blog-chat-history', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            function, args = self._queue.get()
+            try:
+                function(*args)
+            except Exception:
+                logger.exception('Writing chat history failed')
+            finally:
+                self._queue.task_done()
+
+
+log_writer = LogWriter()
+
+
+class RoomHistory:
+    """Ring buffer of one room's last `size` encoded messages."""
+
+    def __init__(self, size, epoch=None, entries=(), log=None):
+        self.size = size
+        self.epoch = epoch or secrets.token_hex(4)
+        self.entries = deque(entries, maxlen=size)  # (seq, frame)
+        self.last_seq = self.entries[-1][0] if self.entries else 0
+        self.log = log
+        self._log_lines = log.lines if log is not None else 0
+
+    def append(self, payload):
+        """
+        Number and encode a message.
+
+        Returns:
+            (seq, frame) - frame is the JSON text to broadcast
+        """
+        self.last_seq += 1
+        frame = json.dumps({**payload, 'seq': self.last_seq})
+        self.entries.append((self.last_seq, frame))
+
+        if self.log is not None:
+            log_writer.submit(self.log.append, self.last_seq, frame)
+            self._log_lines += 1
+            if self._log_lines >= self.size * COMPACT_FACTOR:
+                # Snapshot now: the writer thread runs it after this message
+                log_writer.submit(self.log.rewrite, self.epoch, list(self.entries))
+                self._log_lines = len(self.entries)
+        return self.last_seq, frame
+
+    def replay(self, after=None, epoch=None):
+        """
+        Messages a client has not seen.
+
+        Returns:
+            (frames, reset) - reset is True when `frames` is the whole buffer
+            because the client's position can't be resumed
+        """
+        frames = [frame for _, frame in self.entries]
+        if after is None:
+            return frames, False
+        if epoch != self.epoch or after > self.last_seq:
+            return frames, True
+
+        oldest = self.entries[0][0] if self.entries else self.last_seq + 1
+        if after < oldest - 1:
+            # Some missed messages already left the ring buffer
+            return frames, True
+        return [frame for seq, frame in self.entries if seq > after], False
+
+    def history_frame(self, after=None, epoch=None):
+        """The replay as one websocket frame (message frames are not re-encoded)."""
+        frames, reset = self.replay(after, epoch)
+        header = json.dumps({
+            'type': 'history',
+            'epoch': self.epoch,
+            'last_seq': self.last_seq,
+            'reset': reset,
+        })
+        return f'{header[:-1]}, "messages": [{", ".join(frames)}]}}'
+
+
+class ChatHistoryStore:
+    """RoomHistory per room, created on first use, least recently used dropped first."""
+
+    def __init__(self):
+        self.rooms = OrderedDict()
+        self._lock = threading.Lock()       # Guards self.rooms, held briefly
+        self._open_lock = threading.Lock()  # One room load at a time
+
+    def room(self, name):
+        """The room's history, loading its file if needed (blocking: see aroom())."""
+        with self._lock:
+            history = self.rooms.get(name)
+            if history is not None:
+                self.rooms.move_to_end(name)
+                return history
+
+        with self._open_lock:
+            with self._lock:
+                history = self.rooms.get(name)
+            if history is None:
+                history = self._open(name)
+                with self._lock:
+                    self.rooms[name] = history
+                    while len(self.rooms) > get_setting('MAX_ROOMS'):
+                        self.rooms.popitem(last=False)
+        return history
+
+    async def aroom(self, name):
+        """room() for consumers: loading a persisted room happens in a worker thread."""
+        with self._lock:
+            loaded = name in self.rooms
+        if loaded or not get_setting('PERSIST_DIR'):
+            return self.room(name)
+        return await sync_to_async(self.room, thread_sensitive=False)(name)
+
+    def _open(self, name):
+        size, persist_dir = get_setting('SIZE'), get_setting('PERSIST_DIR')
+        persist_rooms = get_setting('PERSIST_ROOMS')
+        if not persist_dir or persist_rooms is not None and name not in persist_rooms:
+            return RoomHistory(size)
+
+        # Earlier writes of this room (before it was evicted) must be on disk
+        log_writer.flush()
+        os.makedirs(persist_dir, exist_ok=True)
+        log = RoomLog(os.path.join(persist_dir, f'{name}.ndjson'))
+        epoch, entries = log.load(size)
+        history = RoomHistory(size, epoch=epoch, entries=entries, log=log)
+        if epoch is None:
+            log.start(history.epoch)
+        return history
+
+    def append(self, room, payload):
+        return self.room(room).append(payload)
+
+    def history_frame(self, room, after=None, epoch=None):
+        return self.room(room).history_frame(after, epoch)
+
+    def flush(self):
+        """Wait for pending file writes."""
+        log_writer.flush()
+
+    def clear(self):
+        """Forget every room (persisted files are kept)."""
+        with self._lock:
+            self.rooms.clear()
+
+
+chat_history = ChatHistoryStore()
+
+
+@atexit.register
+def _flush_on_exit():
+    """Don't lose queued messages when the server shuts down."""
+    try:
+        log_writer.flush()
+    except Exception:
+        logger.exception('Writing chat history at exit failed')
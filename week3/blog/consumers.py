@@ -1,11 +1,21 @@
 # blog/consumers.py
 
 import json
+from urllib.parse import parse_qs
 from channels.generic.websocket import AsyncWebsocketConsumer
 from datetime import datetime
 
-class ChatConsumer(AsyncWebsocketConsumer):
+from .chat_history import chat_history
+from .notifications import BROADCAST_GROUP, MAX_FOLLOWED_POSTS, post_group
+from .websocket_limits import DISCONNECT, FlowControlMixin
+
+class ChatConsumer(FlowControlMixin, AsyncWebsocketConsumer):
     # ... keep existing ChatConsumer code ...
+    # Rate limits and the send queue: see blog/websocket_limits.py
+
+    def get_metrics_room(self):
+        return self.room_group_name
+
     async def connect(self):
         self.room_name = self.scope['url_route']['kwargs']['room_name']
         self.room_group_name = f'chat_{self.room_name}'
@@ -22,6 +32,16 @@ class ChatConsumer(AsyncWebsocketConsumer):
             'message': f'You are now connected to {self.room_name}'
         }))
 
+        # Recent messages in one frame (see blog/chat_history.py).
+        # Reconnecting clients pass ?after=<seq>&epoch=<epoch> to get only what they missed.
+        params = parse_qs(self.scope.get('query_string', b'').decode())
+        after = params.get('after', [''])[0]
+        history = await chat_history.aroom(self.room_group_name)
+        await self.send(text_data=history.history_frame(
+            after=int(after) if after.isdigit() else None,
+            epoch=params.get('epoch', [None])[0],
+        ))
+
     async def disconnect(self, close_code):
         await self.channel_layer.group_discard(
             self.room_group_name,
@@ -33,17 +53,33 @@ class ChatConsumer(AsyncWebsocketConsumer):
         message = data['message']
         username = data.get('username', 'Anonymous')
 
+        # Numbered, encoded once and kept in the room history;
+        # every member forwards the same text
+        history = await chat_history.aroom(self.room_group_name)
+        _, frame = history.append({
+            'type': 'chat',
+            'message': message,
+            'username': username,
+            'timestamp': datetime.now().isoformat(),
+        })
         await self.channel_layer.group_send(
             self.room_group_name,
             {
-                'type': 'chat_message',
-                'message': message,
-                'username': username,
-                'timestamp': datetime.now().isoformat(),
+                'type': 'chat.frame',
+                'text': frame,
             }
         )
 
+    async def chat_frame(self, event):
+        await self.send(text_data=event['text'])
+
+    async def chat_frame_batch(self, event):
+        """A burst coalesced by the channel layer: one websocket frame for all of it."""
+        frames = ', '.join(message['text'] for message in event['messages'])
+        await self.send(text_data=f'{{"type": "batch", "messages": [{frames}]}}')
+
     async def chat_message(self, event):
+        """Unencoded chat events (sent by code that builds the dict itself)."""
         await self.send(text_data=json.dumps({
             'type': 'chat',
             'message': event['message'],
@@ -53,7 +89,13 @@ class ChatConsumer(AsyncWebsocketConsumer):
 
 
 # Updated NotificationConsumer (no auth required for demo)
-class NotificationConsumer(AsyncWebsocketConsumer):
+class NotificationConsumer(FlowControlMixin, AsyncWebsocketConsumer):
+    # A reader this far behind reconnects rather than silently losing notifications
+    overflow_policy = DISCONNECT
+
+    def get_metrics_room(self):
+        return 'notifications'
+
     async def connect(self):
         # For demo: accept all connections
         # In production: check authentication
@@ -67,11 +109,19 @@ class NotificationConsumer(AsyncWebsocketConsumer):
             session_key = self.scope.get('session', {}).get('session_key', 'anonymous')
             self.notification_group_name = f'notifications_{session_key}'
         
-        # Join notification group
-        await self.channel_layer.group_add(
+        # Own group, site-wide announcements, and the posts the reader
+        # follows (?posts=1,2,3) - see blog/notifications.py
+        params = parse_qs(self.scope.get('query_string', b'').decode())
+        post_ids = [
+            value for value in params.get('posts', [''])[0].split(',') if value.isdigit()
+        ][:MAX_FOLLOWED_POSTS]
+        self.notification_groups = [
             self.notification_group_name,
-            self.channel_name
-        )
+            BROADCAST_GROUP,
+            *(post_group(post_id) for post_id in post_ids),
+        ]
+        for group in self.notification_groups:
+            await self.channel_layer.group_add(group, self.channel_name)
         
         # Accept connection
         await self.accept()
@@ -83,17 +133,16 @@ class NotificationConsumer(AsyncWebsocketConsumer):
         }))
 
     async def disconnect(self, close_code):
-        # Leave notification group
-        await self.channel_layer.group_discard(
-            self.notification_group_name,
-            self.channel_name
-        )
+        # Leave notification groups
+        for group in getattr(self, 'notification_groups', ()):
+            await self.channel_layer.group_discard(group, self.channel_name)
 
     # Receive notification from group
     async def send_notification(self, event):
+        # Coalesced notifications also carry `count` and, for several
+        # kinds at once, `items`
         await self.send(text_data=json.dumps({
+            **{key: value for key, value in event.items() if key != 'type'},
             'type': 'notification',
-            'title': event['title'],
-            'message': event['message'],
             'timestamp': event.get('timestamp', datetime.now().isoformat()),
-        }))
\ No newline at end of file
+        }))
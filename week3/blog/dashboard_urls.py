@@ -14,4 +14,5 @@ urlpatterns = [
     path('comments/', dashboard_views.dashboard_comments, name='comments'),
     path('comments/<int:pk>/approve/', dashboard_views.dashboard_comment_approve, name='comment_approve'),
     path('comments/<int:pk>/delete/', dashboard_views.dashboard_comment_delete, name='comment_delete'),
+    path('export/', dashboard_views.dashboard_export, name='export'),
 ]
\ No newline at end of file
@@ -9,8 +9,13 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.db.models import Count, Sum
+from django.http import HttpResponseBadRequest, StreamingHttpResponse
 from .models import Post, Category, Comment
 from .forms import PostForm
+from .analytics import WINDOWS as TRENDING_WINDOWS, author_trends
+from .dashboard_export import ExportError, export_rows
+from .stats import get_author_stats
+from .view_counter import view_counter
 
 @login_required
 def dashboard_home(request):
@@ -18,14 +23,11 @@ def dashboard_home(request):
     Dashboard home page.
     Like Laravel: DashboardController@index
     """
-    # Get statistics
-    total_posts = Post.objects.filter(author=request.user).count()
-    published_posts = Post.objects.filter(author=request.user, status='published').count()
-    draft_posts = Post.objects.filter(author=request.user, status='draft').count()
-    total_views = Post.objects.filter(author=request.user).aggregate(Sum('views'))['views__sum'] or 0
+    # Get statistics (one grouped query, cached per author)
+    stats = get_author_stats(request.user)
     
     # Recent posts
-    recent_posts = Post.objects.filter(author=request.user).order_by('-created_at')[:5]
+    recent_posts = Post.objects.filter(author=request.user).for_list().order_by('-created_at')[:5]
     
     # Recent comments on user's posts
     recent_comments = Comment.objects.filter(
@@ -33,13 +35,19 @@ def dashboard_home(request):
         is_approved=True
     ).order_by('-created_at')[:5]
     
+    # Trending posts: views in the last 24h/7d/30d (blog/analytics.py)
+    trend_window = request.GET.get('trend', '7d')
+    if trend_window not in TRENDING_WINDOWS:
+        trend_window = '7d'
+    view_counter.flush_if_due()
+    
     context = {
-        'total_posts': total_posts,
-        'published_posts': published_posts,
-        'draft_posts': draft_posts,
-        'total_views': total_views,
+        **stats,
         'recent_posts': recent_posts,
         'recent_comments': recent_comments,
+        'trending_posts': author_trends(request.user, order_by=trend_window, limit=5),
+        'trend_window': trend_window,
+        'trend_windows': list(TRENDING_WINDOWS),
     }
     
     return render(request, 'dashboard/home.html', context)
@@ -51,7 +59,7 @@ def dashboard_posts(request):
     List all user's posts.
     Like Laravel: PostController@index with auth
     """
-    posts = Post.objects.filter(author=request.user).order_by('-created_at')
+    posts = Post.objects.filter(author=request.user).for_list().order_by('-created_at')
     
     # Filter by status if provided
     status_filter = request.GET.get('status')
@@ -164,4 +172,28 @@ def dashboard_comment_delete(request, pk):
     comment = get_object_or_404(Comment, pk=pk, post__author=request.user)
     comment.delete()
     messages.success(request, 'Comment deleted!')
-    return redirect('dashboard:comments')
\ No newline at end of file
+    return redirect('dashboard:comments')
+
+
+@login_required
+def dashboard_export(request):
+    """
+    Download the user's posts or comments as CSV or NDJSON (streamed).
+    Like Laravel: return Excel::download(new PostsExport($user), 'posts.csv')
+    """
+    kind = request.GET.get('kind', 'posts')
+    try:
+        writer, content = export_rows(
+            request.user,
+            kind=kind,
+            file_format=request.GET.get('type', 'csv'),
+            fields=request.GET.get('fields'),
+            since=request.GET.get('since'),
+            until=request.GET.get('until'),
+        )
+    except ExportError as exc:
+        return HttpResponseBadRequest(str(exc), content_type='text/plain')
+
+    response = StreamingHttpResponse(content, content_type=writer.content_type)
+    response['Content-Disposition'] = f'attachment; filename="{kind}.{writer.extension}"'
+    return response
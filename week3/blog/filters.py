@@ -0,0 +1,50 @@
+# blog/filters.py
+
+"""
+Query parameter filters shared by the sync (DRF) and async API views.
+Like Laravel: a query filter class reused by several controllers.
+"""
+
+from .fragment_cache import category_slugs
+from .models import Category, Post, published_posts_count
+from .search import get_search_backend
+
+
+def visible_posts(user):
+    """Published posts, plus the user's own drafts."""
+    queryset = Post.objects.filter(status='published')
+    if user.is_authenticated:
+        queryset = Post.objects.filter(author=user) | queryset
+    return queryset
+
+
+def filter_posts(queryset, params):
+    """Apply ?category=, ?search= and ?author= to a Post queryset."""
+    category = params.get('category')
+    if category:
+        # Checked against the cached slugs: a made-up value matches nothing
+        if category not in category_slugs():
+            return queryset.none()
+        queryset = queryset.filter(categories__slug=category)
+
+    # Search in title and content (full-text index, see blog/search.py)
+    search = params.get('search')
+    if search:
+        queryset = get_search_backend().filter_queryset(queryset, search)
+
+    author = params.get('author')
+    if author:
+        queryset = queryset.filter(author__username=author)
+
+    return queryset.distinct()
+
+
+def filter_categories(params):
+    """Categories with their published post counts, ?search= applied."""
+    queryset = Category.objects.annotate(
+        published_posts_count=published_posts_count('categories')
+    )
+    search = params.get('search')
+    if search:
+        queryset = queryset.filter(name__icontains=search)
+    return queryset.order_by('name')
@@ -0,0 +1,157 @@
+# blog/fragment_cache.py
+
+"""
+Template fragment cache with versioned keys.
+Like Laravel's Cache::remember() around a Blade @include.
+
+Templates cache their expensive parts with {% fragment %}
+(blog/templatetags/blog_fragments.py), and views pass lazy querysets, so a
+hit runs no query. Each fragment name has a version that blog/signals.py
+bumps when what it shows changes (post_body per post). Vary values from
+the query string must be normalized first, e.g. with category_slugs().
+
+Settings: BLOG_FRAGMENT_CACHE (see DEFAULTS).
+"""
+
+import hashlib
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+DEFAULTS = {
+    'ENABLED': True,
+    'TIMEOUT': 600,  # Seconds an entry lives (how stale card view counts get)
+}
+
+CATEGORIES = 'categories'
+POST_CARDS = 'post_cards'
+POST_BODY = 'post_body'
+
+# Fragment name -> versioned per object (first vary value is the object id)
+FRAGMENTS = {
+    CATEGORIES: False,
+    POST_CARDS: False,
+    POST_BODY: True,
+}
+
+VERSION_KEY = 'blog:fragment:version:{}'
+ENTRY_KEY = 'blog:fragment:{name}:{version}:{digest}'
+CATEGORY_SLUGS_KEY = 'blog:fragment:category_slugs:{version}'
+
+
+def get_setting(name):
+    return getattr(settings, 'BLOG_FRAGMENT_CACHE', {}).get(name, DEFAULTS[name])
+
+
+def _version_key(name, object_id=None):
+    if object_id is None:
+        return VERSION_KEY.format(name)
+    return VERSION_KEY.format(f'{name}:{object_id}')
+
+
+def _first_version():
+    # A version key can be evicted while entries under it survive: start
+    # from the clock, never from 1, so an old entry is never found again
+    return int(time.time() * 1000)
+
+
+def get_version(name, object_id=None):
+    key = _version_key(name, object_id)
+    version = cache.get(key)
+    if version is None:
+        # add() so concurrent first requests agree on one value
+        cache.add(key, _first_version(), None)
+        version = cache.get(key)
+    return version
+
+
+def bump(name, object_id=None):
+    """Invalidate every entry of a fragment (of one object for per-object fragments)."""
+    key = _version_key(name, object_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _first_version(), None)
+
+
+def make_key(name, vary=()):
+    if name not in FRAGMENTS:
+        raise ValueError(f'Unknown fragment: {name}')
+    object_id = vary[0] if FRAGMENTS[name] and vary else None
+    raw = '|'.join(str(value) for value in vary)
+    digest = hashlib.md5(raw.encode()).hexdigest()
+    return ENTRY_KEY.format(name=name, version=get_version(name, object_id), digest=digest)
+
+
+def category_slugs():
+    """Every category slug, cached until a category changes (no query on a hit)."""
+    from .models import Category
+
+    key = CATEGORY_SLUGS_KEY.format(version=get_version(CATEGORIES))
+    slugs = cache.get(key)
+    if slugs is None:
+        slugs = frozenset(Category.objects.values_list('slug', flat=True))
+        cache.set(key, slugs, get_setting('TIMEOUT'))
+    return slugs
+
+
+class FragmentStats:
+    """Per-process hit/miss counters per fragment name. Thread-safe."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hits = Counter()
+        self._misses = Counter()
+
+    def record(self, name, hit):
+        with self._lock:
+            (self._hits if hit else self._misses)[name] += 1
+
+    def report(self):
+        with self._lock:
+            names = sorted(set(self._hits) | set(self._misses))
+            report = {}
+            for name in names:
+                hits, misses = self._hits[name], self._misses[name]
+                report[name] = {
+                    'hits': hits,
+                    'misses': misses,
+                    'hit_rate': round(hits / (hits + misses), 3),
+                }
+            return report
+
+    def reset(self):
+        with self._lock:
+            self._hits.clear()
+            self._misses.clear()
+
+
+fragment_stats = FragmentStats()
+
+
+def get_or_render(name, vary, render):
+    """
+    The cached HTML of a fragment, or render() it and cache the result.
+
+    Args:
+        name: a FRAGMENTS key
+        vary: values the fragment's content depends on (page, filter, ...)
+        render: callable returning the fragment's HTML
+    """
+    if not get_setting('ENABLED'):
+        return render()
+
+    key = make_key(name, vary)
+    content = cache.get(key)
+    if content is not None:
+        fragment_stats.record(name, hit=True)
+        return content
+
+    fragment_stats.record(name, hit=False)
+    content = render()
+    cache.set(key, content, get_setting('TIMEOUT'))
+    return content
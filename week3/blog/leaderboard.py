@@ -0,0 +1,197 @@
+# blog/leaderboard.py
+
+"""
+In-process top-K leaderboard of the most viewed published posts.
+
+Each board (all posts, and one per category slug) keeps the SIZE most
+viewed posts as PostListSerializer rows, so top() reads no table. View
+counter flushes update the boards; they are reloaded after
+RECONCILE_INTERVAL seconds (views from other processes) and dropped by
+blog/signals.py when a post or category changes. A reload that races an
+update doesn't store its rows (generation counter).
+
+Settings: BLOG_LEADERBOARD (see DEFAULTS).
+"""
+
+import threading
+import time
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import Post
+from .serializers import PostListSerializer
+
+
+DEFAULTS = {
+    'SIZE': 10,                 # Posts kept per board
+    'RECONCILE_INTERVAL': 300,  # Max seconds before a board is reloaded from the database
+}
+
+
+def get_setting(name):
+    return getattr(settings, 'BLOG_LEADERBOARD', {}).get(name, DEFAULTS[name])
+
+
+def rank(entry):
+    # Same order as the reload query: most views first, then oldest post
+    return (-entry['views'], entry['id'])
+
+
+def load_entries(queryset):
+    """
+    Serialize posts for a board.
+
+    Returns:
+        [(PostListSerializer data, category slugs)]
+    """
+    posts = queryset.select_related('author').prefetch_related('categories').for_list()
+    return [
+        (dict(PostListSerializer(post).data), frozenset(category.slug for category in post.categories.all()))
+        for post in posts
+    ]
+
+
+class Leaderboard:
+    """
+    Top-SIZE boards keyed by category slug (None for all posts).
+    Thread-safe: flushes and reads happen in different threads under Daphne.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._boards = {}      # category slug or None -> [entry] in rank() order
+        self._expires = {}     # category slug or None -> monotonic reload time
+        self._categories = {}  # post id -> category slugs, for posts on a board
+        self._generation = 0   # bumped by invalidate() and apply()
+
+    def top(self, category=None, limit=None):
+        """The most viewed published posts, optionally of one category."""
+        size = get_setting('SIZE')
+        limit = size if limit is None else min(limit, size)
+        with self._lock:
+            board = self._boards.get(category)
+            fresh = board is not None and time.monotonic() < self._expires[category]
+        if not fresh:
+            board = self.reload(category)
+        with self._lock:
+            return [dict(entry) for entry in board[:limit]]
+
+    def reload(self, category=None):
+        """Rebuild one board from the database."""
+        with self._lock:
+            generation = self._generation
+        queryset = Post.objects.filter(status='published')
+        if category is not None:
+            queryset = queryset.filter(categories__slug=category)
+        rows = load_entries(queryset.order_by('-views', 'pk')[:get_setting('SIZE')])
+
+        board = [entry for entry, _ in rows]
+        with self._lock:
+            if self._generation != generation:
+                # Invalidated or updated while querying: these rows may be older
+                return board
+            # An unknown slug gets no board, so arbitrary ?category= values use no memory
+            if category is not None and not board:
+                self._drop(category)
+                return board
+            self._boards[category] = board
+            self._expires[category] = time.monotonic() + get_setting('RECONCILE_INTERVAL')
+            for entry, slugs in rows:
+                self._categories[entry['id']] = slugs
+            self._forget_unranked()
+        return board
+
+    def invalidate(self):
+        """Drop every board; each is reloaded on its next read."""
+        with self._lock:
+            self._generation += 1
+            self._boards.clear()
+            self._expires.clear()
+            self._categories.clear()
+
+    def record_views(self, pending, flushed_at):
+        """
+        View counter listener: apply a flushed batch once it is committed.
+        A rolled back flush is retried by the view counter, so counting it
+        here first would count it twice.
+        """
+        transaction.on_commit(lambda: self.apply(pending))
+
+    def apply(self, pending):
+        """
+        Add committed view increments to the boards.
+
+        Args:
+            pending: post id -> views added
+        """
+        with self._lock:
+            # A reload running now may have read the views from before this batch
+            self._generation += 1
+            if not self._boards:
+                return
+            changed = set()
+            for key, board in self._boards.items():
+                for entry in board:
+                    count = pending.get(entry['id'])
+                    if count:
+                        entry['views'] += count
+                        changed.add(key)
+            for key in changed:
+                self._boards[key].sort(key=rank)
+
+            # A ranked post may still be missing from another board it belongs on
+            ranked = {entry['id']: entry for board in self._boards.values() for entry in board}
+            self._insert([
+                (ranked[post_id], self._categories[post_id])
+                for post_id in pending if post_id in ranked
+            ])
+            self._forget_unranked()
+
+            # Posts outside the boards need at least the lowest entry's views to get on one
+            size = get_setting('SIZE')
+            floor = min(
+                board[-1]['views'] if len(board) >= size else 0
+                for board in self._boards.values()
+            )
+            outside = [post_id for post_id in pending if post_id not in ranked]
+        if not outside:
+            return
+
+        candidates = Post.objects.filter(pk__in=outside, status='published', views__gte=floor)
+        rows = load_entries(candidates)
+        with self._lock:
+            self._insert(rows)
+            self._forget_unranked()
+
+    def _insert(self, rows):
+        # Caller must hold self._lock
+        size = get_setting('SIZE')
+        for key, board in self._boards.items():
+            for entry, slugs in rows:
+                if key is not None and key not in slugs:
+                    continue
+                if any(ranked['id'] == entry['id'] for ranked in board):
+                    continue
+                if len(board) >= size and rank(entry) > rank(board[-1]):
+                    continue
+                board.append(dict(entry))
+                board.sort(key=rank)
+                del board[size:]
+                self._categories[entry['id']] = slugs
+
+    def _drop(self, category):
+        # Caller must hold self._lock
+        self._boards.pop(category, None)
+        self._expires.pop(category, None)
+
+    def _forget_unranked(self):
+        # Caller must hold self._lock
+        ranked = {entry['id'] for board in self._boards.values() for entry in board}
+        for post_id in list(self._categories):
+            if post_id not in ranked:
+                del self._categories[post_id]
+
+
+# Process-wide leaderboard (like a Laravel singleton binding)
+leaderboard = Leaderboard()
@@ -0,0 +1,159 @@
+# blog/management/commands/bench_channel_layer.py
+
+"""
+Load benchmark for channel layers: N rooms x M clients.
+Reports delivered messages per second and delivery latency percentiles.
+
+Usage:
+    python manage.py bench_channel_layer --rooms 20 --clients 50 --messages 200
+    python manage.py bench_channel_layer --layer channels.layers.InMemoryChannelLayer --legacy
+
+--legacy replays the old ChatConsumer (one json.dumps per member).
+"""
+
+import asyncio
+import json
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils.module_loading import import_string
+
+
+DEFAULT_LAYER = 'blog.channel_layer.LocalChannelLayer'
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run_benchmark(layer, rooms, clients, messages, burst=1, legacy=False, timeout=60):
+    """
+    Drive `layer` with rooms x clients receivers and one sender per room.
+    Senders yield to the event loop every `burst` messages.
+
+    Returns:
+        dict with expected, delivered, frames, seconds, per_second,
+        p50_ms and p99_ms
+    """
+    expected_per_client = messages
+    latencies = []
+    delivered = 0
+    frames = 0
+    done = asyncio.Event()
+    total_expected = rooms * clients * messages
+
+    async def client(channel):
+        nonlocal delivered, frames
+        received = 0
+        while received < expected_per_client:
+            event = await layer.receive(channel)
+            now = time.perf_counter()
+            batch = event['messages'] if event['type'].endswith('.batch') else [event]
+            for message in batch:
+                if legacy:
+                    # Old consumer: one encode per member
+                    json.dumps({key: message[key] for key in ('message', 'username', 'timestamp')})
+                latencies.append(now - message['sent_at'])
+            received += len(batch)
+            delivered += len(batch)
+            frames += 1
+            if delivered >= total_expected:
+                done.set()
+
+    async def sender(group):
+        for number in range(messages):
+            payload = {
+                'type': 'chat',
+                'message': f'message {number}',
+                'username': 'bench',
+                'timestamp': time.time(),
+            }
+            if legacy:
+                event = {'type': 'chat.message', **payload}
+            else:
+                event = {'type': 'chat.frame', 'text': json.dumps(payload)}
+            event['sent_at'] = time.perf_counter()
+            await layer.group_send(group, event)
+            # Let clients run between bursts, as real network input would
+            if (number + 1) % burst == 0:
+                await asyncio.sleep(0)
+
+    receivers = []
+    for room in range(rooms):
+        group = f'bench_room_{room}'
+        for _ in range(clients):
+            channel = await layer.new_channel()
+            await layer.group_add(group, channel)
+            receivers.append(asyncio.create_task(client(channel)))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(sender(f'bench_room_{room}') for room in range(rooms)))
+    try:
+        await asyncio.wait_for(done.wait(), timeout)
+    except asyncio.TimeoutError:
+        pass  # Dropped messages (full channels): report what arrived
+    seconds = time.perf_counter() - started
+
+    for task in receivers:
+        task.cancel()
+    await asyncio.gather(*receivers, return_exceptions=True)
+    await layer.flush()
+
+    return {
+        'expected': total_expected,
+        'delivered': delivered,
+        'frames': frames,
+        'seconds': seconds,
+        'per_second': delivered / seconds if seconds else 0.0,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+    }
+
+
+class Command(BaseCommand):
+    help = 'Benchmark a channel layer with N rooms x M clients'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rooms', type=int, default=10)
+        parser.add_argument('--clients', type=int, default=20)
+        parser.add_argument('--messages', type=int, default=100, help='Messages sent per room')
+        parser.add_argument('--burst', type=int, default=1,
+                            help='Messages each sender pushes before yielding (bursts get coalesced)')
+        parser.add_argument('--layer', default=DEFAULT_LAYER, help='Channel layer class (dotted path)')
+        parser.add_argument('--capacity', type=int, default=1000, help='Channel capacity')
+        parser.add_argument('--legacy', action='store_true',
+                            help='Encode per member, like the old ChatConsumer')
+        parser.add_argument('--timeout', type=float, default=60)
+
+    def handle(self, *args, **options):
+        config = {'capacity': options['capacity']}
+        if options['layer'] == DEFAULT_LAYER:
+            config['batch_types'] = ['chat.frame']
+        layer = import_string(options['layer'])(**config)
+
+        result = asyncio.run(run_benchmark(
+            layer,
+            rooms=options['rooms'],
+            clients=options['clients'],
+            messages=options['messages'],
+            burst=max(1, options['burst']),
+            legacy=options['legacy'],
+            timeout=options['timeout'],
+        ))
+
+        self.stdout.write(
+            f"{options['layer']} ({options['rooms']} rooms x {options['clients']} clients, "
+            f"{options['messages']} messages/room{', legacy' if options['legacy'] else ''})"
+        )
+        self.stdout.write(
+            f"  delivered {result['delivered']}/{result['expected']} messages "
+            f"in {result['frames']} frames, {result['seconds']:.2f}s"
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"  {result['per_second']:,.0f} messages/sec, "
+            f"p50 {result['p50_ms']:.2f} ms, p99 {result['p99_ms']:.2f} ms"
+        ))
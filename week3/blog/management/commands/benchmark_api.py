@@ -0,0 +1,373 @@
+# blog/management/commands/benchmark_api.py
+
+"""
+Benchmark the blog REST API against a seeded throwaway database.
+
+Seeds a fresh test database (the development one is never touched), then
+reports requests/sec, latency percentiles and queries per request for
+each endpoint. --server runs Daphne and hits it over HTTP; --async adds
+the /api/async/ views.
+
+Usage:
+    python manage.py benchmark_api --save-baseline bench.json
+    python manage.py benchmark_api --baseline bench.json --threshold 0.25
+
+A run fails (exit code 1) when an endpoint's p95 or query count grows
+past the baseline.
+"""
+
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from django.utils import timezone
+
+from blog import related
+from blog.bulk_io import import_posts
+from blog.models import Category, Comment, Post
+from blog.profiling import percentile
+
+
+WORDS = (
+    'django', 'python', 'laravel', 'react', 'queries', 'index', 'cache', 'async',
+    'channels', 'websocket', 'template', 'serializer', 'migration', 'signal',
+    'middleware', 'database', 'sqlite', 'deploy', 'testing', 'performance',
+)
+
+ENDPOINTS = ('post-list', 'post-detail', 'search', 'stats', 'categories')
+
+
+def seed_data(posts=1000, categories=20, comments=5, users=10, seed=42):
+    """
+    Fill the current database through the bulk import path.
+
+    Returns:
+        {'slugs': [published post slugs], 'words': [search terms]}
+    """
+    rng = random.Random(seed)
+    authors = User.objects.bulk_create(
+        User(username=f'bench{number}') for number in range(users)
+    )
+    category_slugs = [f'category-{number}' for number in range(categories)]
+    Category.objects.bulk_create(
+        Category(name=f'Category {number}', slug=slug) for number, slug in enumerate(category_slugs)
+    )
+
+    now = timezone.now()
+    rows = []
+    for number in range(posts):
+        words = rng.choices(WORDS, k=300)
+        published = rng.random() < 0.8
+        rows.append((number + 1, {
+            'title': f"{' '.join(words[:4]).title()} {number}",
+            'slug': f'bench-post-{number}',
+            'content': ' '.join(words),
+            'status': 'published' if published else 'draft',
+            'author': authors[number % users].username,
+            'categories': rng.sample(category_slugs, k=min(3, categories)),
+            'views': rng.randint(0, 10000),
+            'created_at': now - timedelta(minutes=posts - number),
+            'published_at': now - timedelta(minutes=posts - number) if published else None,
+        }, None))
+    import_posts(rows, refresh_related=False)
+    related.rebuild_all()
+
+    post_ids = list(Post.objects.values_list('pk', flat=True))
+    Comment.objects.bulk_create(
+        Comment(
+            post_id=post_id,
+            author_name=f'reader{number}',
+            author_email=f'reader{number}@example.com',
+            content=' '.join(rng.choices(WORDS, k=20)),
+            is_approved=rng.random() < 0.9,
+        )
+        for post_id in post_ids for number in range(comments)
+    )
+
+    return {
+        'slugs': list(Post.objects.filter(status='published').values_list('slug', flat=True)),
+        'words': list(WORDS),
+    }
+
+
+def endpoint_paths(name, data, count):
+    """`count` request paths for an endpoint, cycling through slugs and words."""
+    if name == 'post-list':
+        return ['/api/posts/'] * count
+    if name == 'post-detail':
+        slugs = data['slugs'] or ['missing']
+        return [f'/api/posts/{slugs[number % len(slugs)]}/' for number in range(count)]
+    if name == 'search':
+        words = data['words']
+        return [f'/api/search/?q={words[number % len(words)]}' for number in range(count)]
+    if name == 'stats':
+        return ['/api/stats/'] * count
+    if name == 'categories':
+        return ['/api/categories/'] * count
+    raise ValueError(f'Unknown endpoint: {name}')
+
+
+def async_paths(paths):
+    """The same requests against the async views (blog/async_api_views.py)."""
+    return [path.replace('/api/', '/api/async/', 1) for path in paths]
+
+
+def summarize(latencies, seconds, queries, errors):
+    ordered = sorted(latencies)
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'per_second': round(len(latencies) / seconds, 1) if seconds else 0.0,
+        'p50_ms': round(percentile(ordered, 0.50) * 1000, 2),
+        'p95_ms': round(percentile(ordered, 0.95) * 1000, 2),
+        'p99_ms': round(percentile(ordered, 0.99) * 1000, 2),
+        'queries': max(queries) if queries else None,
+    }
+
+
+def run_in_process(paths, warmup=5, warm_cache=False):
+    """Request `paths` with the test client, timing each request and counting its queries."""
+    client = Client()
+    for path in paths[:warmup]:
+        client.get(path)
+
+    latencies, queries, errors = [], [], 0
+    started = time.perf_counter()
+    for path in paths:
+        if not warm_cache:
+            cache.clear()
+        with CaptureQueriesContext(connection) as captured:
+            request_started = time.perf_counter()
+            response = client.get(path)
+            latencies.append(time.perf_counter() - request_started)
+        queries.append(len(captured))
+        if response.status_code >= 400:
+            errors += 1
+    return summarize(latencies, time.perf_counter() - started, queries, errors)
+
+
+def run_over_http(base_url, paths, concurrency=4, warmup=5, warm_cache=False):
+    """Request `paths` from a running server with `concurrency` threads."""
+    def fetch(indexed):
+        number, path = indexed
+        if not warm_cache:
+            # A unique query string misses the response cache
+            path = f"{path}{'&' if '?' in path else '?'}_={number}"
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(base_url + path, timeout=30) as response:
+                response.read()
+                failed = response.status >= 400
+        except Exception:
+            failed = True
+        return time.perf_counter() - started, failed
+
+    for indexed in enumerate(paths[:warmup]):
+        fetch(indexed)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(fetch, enumerate(paths, start=warmup)))
+    seconds = time.perf_counter() - started
+    return summarize(
+        [latency for latency, _ in results], seconds, [], sum(failed for _, failed in results)
+    )
+
+
+def compare(results, baseline, threshold=0.25, noise_ms=1.0):
+    """
+    Regressions of `results` against a saved baseline.
+
+    Returns:
+        list of human readable regression messages (empty: no regression)
+    """
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get('results', {}).get(name)
+        if before is None:
+            continue
+        limit = before['p95_ms'] * (1 + threshold)
+        if result['p95_ms'] > limit and result['p95_ms'] - before['p95_ms'] >= noise_ms:
+            regressions.append(
+                f"{name}: p95 {result['p95_ms']:.2f} ms > {before['p95_ms']:.2f} ms + {threshold:.0%}"
+            )
+        if None not in (result['queries'], before['queries']) and result['queries'] > before['queries']:
+            regressions.append(f"{name}: {result['queries']} queries per request, was {before['queries']}")
+    return regressions
+
+
+@contextmanager
+def throwaway_database(file_backed=False):
+    """
+    Run the block against a fresh test database, dropped afterwards.
+    Yields its name; with file_backed it is a file another process can open.
+    """
+    setup_test_environment()
+    test_settings = connection.settings_dict.setdefault('TEST', {})
+    temporary_dir = None
+    if file_backed:
+        temporary_dir = tempfile.TemporaryDirectory()
+        test_settings['NAME'] = os.path.join(temporary_dir.name, 'benchmark.sqlite3')
+
+    old_name = connection.settings_dict['NAME']
+    database_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        yield database_name
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+        if temporary_dir is not None:
+            temporary_dir.cleanup()
+
+
+class DaphneServer:
+    """Daphne serving this project on a free local port, with another database file."""
+
+    def __init__(self, database_name):
+        self.database_name = database_name
+        self.process = None
+        self.base_url = None
+
+    def __enter__(self):
+        with socket.socket() as probe:
+            probe.bind(('127.0.0.1', 0))
+            port = probe.getsockname()[1]
+
+        env = {**os.environ, 'BLOG_DATABASE_NAME': str(self.database_name)}
+        self.process = subprocess.Popen(
+            [sys.executable, '-m', 'daphne', '-b', '127.0.0.1', '-p', str(port),
+             'myproject.asgi:application'],
+            cwd=settings.BASE_DIR, env=env,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        self.base_url = f'http://127.0.0.1:{port}'
+
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise CommandError('Daphne exited on startup (is it installed?)')
+            try:
+                with socket.create_connection(('127.0.0.1', port), timeout=0.5):
+                    return self
+            except OSError:
+                time.sleep(0.2)
+        self.__exit__()
+        raise CommandError('Daphne did not start within 30 seconds')
+
+    def __exit__(self, *exc_info):
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+            self.process.wait(timeout=10)
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the REST API on seeded data and compare with a baseline'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=1000)
+        parser.add_argument('--categories', type=int, default=20)
+        parser.add_argument('--comments', type=int, default=5, help='Comments per post')
+        parser.add_argument('--users', type=int, default=10)
+        parser.add_argument('--requests', type=int, default=200, help='Requests per endpoint')
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument('--endpoint', action='append', choices=ENDPOINTS,
+                            help='Only these endpoints (repeatable)')
+        parser.add_argument('--warm-cache', action='store_true',
+                            help='Let the response/stats caches answer repeated requests')
+        parser.add_argument('--server', action='store_true',
+                            help='Serve with a spawned Daphne process and use HTTP')
+        parser.add_argument('--concurrency', type=int, default=4, help='HTTP client threads (--server)')
+        parser.add_argument('--async', action='store_true', dest='async_views',
+                            help='Also benchmark the async views (/api/async/...)')
+        parser.add_argument('--baseline', help='Compare with this baseline file')
+        parser.add_argument('--save-baseline', help='Write the results to this file')
+        parser.add_argument('--threshold', type=float, default=0.25,
+                            help='Allowed p95 latency growth (0.25 = 25%%)')
+        parser.add_argument('--noise-ms', type=float, default=1.0,
+                            help='Ignore p95 growth smaller than this')
+
+    def handle(self, *args, **options):
+        config = {key: options[key] for key in ('posts', 'categories', 'comments', 'users', 'requests')}
+        config['mode'] = 'server' if options['server'] else 'in-process'
+        if options['server']:
+            config['concurrency'] = options['concurrency']
+        endpoints = options['endpoint'] or ENDPOINTS
+
+        baseline = None
+        if options['baseline']:
+            with open(options['baseline'], encoding='utf-8') as handle:
+                baseline = json.load(handle)
+            if baseline.get('config') != config:
+                self.stderr.write(self.style.WARNING(
+                    f"Baseline was recorded with {baseline.get('config')}, this run uses {config}"
+                ))
+
+        results = self.run(config, endpoints, options)
+
+        self.stdout.write(f"{'endpoint':<18} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} "
+                          f"{'p99 ms':>9} {'queries':>8} {'errors':>7}")
+        for name, result in results.items():
+            queries = '-' if result['queries'] is None else result['queries']
+            self.stdout.write(
+                f"{name:<18} {result['per_second']:>9,.1f} {result['p50_ms']:>9.2f} "
+                f"{result['p95_ms']:>9.2f} {result['p99_ms']:>9.2f} {queries:>8} {result['errors']:>7}"
+            )
+
+        if options['save_baseline']:
+            with open(options['save_baseline'], 'w', encoding='utf-8') as handle:
+                json.dump({'config': config, 'results': results}, handle, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Baseline saved to {options['save_baseline']}"))
+
+        if baseline is not None:
+            regressions = compare(results, baseline, options['threshold'], options['noise_ms'])
+            if regressions:
+                for message in regressions:
+                    self.stderr.write(self.style.ERROR(f'  {message}'))
+                raise CommandError(f'{len(regressions)} regression(s) against {options["baseline"]}')
+            self.stdout.write(self.style.SUCCESS('No regressions against the baseline'))
+
+    def run(self, config, endpoints, options):
+        """Seed a throwaway database, benchmark every endpoint, drop the database."""
+        with throwaway_database(file_backed=options['server']) as database_name:
+            self.stdout.write(
+                f"Seeding {config['posts']} posts, {config['categories']} categories, "
+                f"{config['comments']} comments/post, {config['users']} users..."
+            )
+            data = seed_data(config['posts'], config['categories'], config['comments'], config['users'])
+
+            runs = {}
+            for name in endpoints:
+                paths = endpoint_paths(name, data, config['requests'])
+                runs[name] = paths
+                if options['async_views']:
+                    runs[f'{name}:async'] = async_paths(paths)
+
+            if options['server']:
+                with DaphneServer(database_name) as server:
+                    return {
+                        name: run_over_http(
+                            server.base_url, paths, options['concurrency'],
+                            options['warmup'], options['warm_cache'],
+                        )
+                        for name, paths in runs.items()
+                    }
+            return {
+                name: run_in_process(paths, options['warmup'], options['warm_cache'])
+                for name, paths in runs.items()
+            }
@@ -0,0 +1,80 @@
+# blog/management/commands/benchmark_export.py
+
+"""
+Measure dashboard export throughput (blog/dashboard_export.py) in rows/sec.
+Seeds a throwaway test database like benchmark_api.
+
+Usage:
+    python manage.py benchmark_export --posts 20000 --comments 5
+    python manage.py benchmark_export --chunk-size 500 --trace-memory
+"""
+
+import time
+import tracemalloc
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+
+from blog.dashboard_export import CHUNK_SIZE, EXPORTS, export_rows
+from blog.management.commands.benchmark_api import seed_data, throwaway_database
+
+
+def measure(user, kind, file_format, chunk_size=CHUNK_SIZE, trace_memory=False):
+    """Stream one export and return {'rows', 'bytes', 'seconds', 'rows_per_second', 'peak_kb'}."""
+    if trace_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+
+    writer, content = export_rows(user, kind=kind, file_format=file_format, chunk_size=chunk_size)
+    lines = size = 0
+    for block in content:
+        lines += block.count('\n')
+        size += len(block.encode())
+    seconds = time.perf_counter() - started
+
+    peak_kb = None
+    if trace_memory:
+        peak_kb = tracemalloc.get_traced_memory()[1] // 1024
+        tracemalloc.stop()
+
+    # CSV starts with a header line (newlines inside CSV values would also count)
+    rows = lines - 1 if file_format == 'csv' else lines
+    return {
+        'rows': rows,
+        'bytes': size,
+        'seconds': seconds,
+        'rows_per_second': rows / seconds if seconds else 0.0,
+        'peak_kb': peak_kb,
+    }
+
+
+class Command(BaseCommand):
+    help = 'Measure dashboard CSV/NDJSON export throughput on seeded data'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=10000)
+        parser.add_argument('--comments', type=int, default=5, help='Comments per post')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE,
+                            help='Rows per fetch from the database cursor')
+        parser.add_argument('--trace-memory', action='store_true',
+                            help='Also report peak memory (second, traced run)')
+
+    def handle(self, *args, **options):
+        with throwaway_database():
+            self.stdout.write(f"Seeding {options['posts']} posts with {options['comments']} comments each...")
+            seed_data(posts=options['posts'], categories=5, comments=options['comments'], users=1)
+            user = User.objects.get()
+
+            self.stdout.write(f"{'export':<16} {'rows':>9} {'rows/s':>10} {'MB/s':>7} {'peak KB':>8}")
+            for kind in EXPORTS:
+                for file_format in ('csv', 'ndjson'):
+                    result = measure(user, kind, file_format, options['chunk_size'])
+                    peak = '-'
+                    if options['trace_memory']:
+                        peak = measure(user, kind, file_format, options['chunk_size'], trace_memory=True)['peak_kb']
+                    self.stdout.write(
+                        f"{kind + '.' + file_format:<16} {result['rows']:>9} "
+                        f"{result['rows_per_second']:>10,.0f} "
+                        f"{result['bytes'] / result['seconds'] / 1e6 if result['seconds'] else 0:>7.1f} "
+                        f"{peak:>8}"
+                    )
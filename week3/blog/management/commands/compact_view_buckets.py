@@ -0,0 +1,24 @@
+# blog/management/commands/compact_view_buckets.py
+
+"""
+Fold old hourly view buckets into daily ones and drop expired days
+(blog/analytics.py). Also runs on its own after view flushes commit;
+schedule this for sites with little traffic. Safe to run next to a server.
+
+Usage:
+    python manage.py compact_view_buckets
+"""
+
+from django.core.management.base import BaseCommand
+
+from blog.analytics import compact
+
+
+class Command(BaseCommand):
+    help = 'Compact hourly view buckets into days and drop expired ones'
+
+    def handle(self, *args, **options):
+        compacted, dropped = compact()
+        self.stdout.write(self.style.SUCCESS(
+            f'Compacted {compacted} hour buckets, dropped {dropped} expired day buckets'
+        ))
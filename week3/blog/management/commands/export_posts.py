@@ -0,0 +1,40 @@
+# blog/management/commands/export_posts.py
+
+"""
+Export posts as NDJSON or CSV, streamed from a database cursor.
+Like Laravel: php artisan excel:export
+
+Usage:
+    python manage.py export_posts > archive.ndjson
+    python manage.py export_posts --file-format csv --status published --output archive.csv
+"""
+
+from django.core.management.base import BaseCommand
+
+from blog.bulk_io import WRITERS, export_posts
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Export posts as NDJSON or CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--file-format', choices=list(WRITERS), default='ndjson')
+        parser.add_argument('--output', help='File to write (default: stdout)')
+        parser.add_argument('--status', choices=[value for value, _ in Post.STATUS_CHOICES])
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        posts = Post.objects.all()
+        if options['status']:
+            posts = posts.filter(status=options['status'])
+
+        chunks = export_posts(posts, options['file_format'], chunk_size=options['chunk_size'])
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8', newline='') as handle:
+                handle.writelines(chunks)
+            self.stderr.write(self.style.SUCCESS(f"Exported posts to {options['output']}"))
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
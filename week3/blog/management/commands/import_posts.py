@@ -0,0 +1,59 @@
+# blog/management/commands/import_posts.py
+
+"""
+Import posts from an NDJSON or CSV file in batches.
+Like Laravel: php artisan excel:import
+
+Usage:
+    python manage.py import_posts archive.ndjson --author admin
+    python manage.py import_posts archive.csv --batch-size 1000 --skip-related
+    python manage.py rebuild_related_posts   # after --skip-related
+"""
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.bulk_io import WRITERS, import_posts, read_rows
+
+
+class Command(BaseCommand):
+    help = 'Bulk import posts from an NDJSON or CSV file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--file-format', choices=list(WRITERS),
+                            help='Defaults to the file extension')
+        parser.add_argument('--author', help='Username for rows without an author column')
+        parser.add_argument('--batch-size', type=int)
+        parser.add_argument('--skip-related', action='store_true',
+                            help='Do not refresh related posts per batch (run rebuild_related_posts afterwards)')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['file_format'] or path.rsplit('.', 1)[-1].lower()
+        if file_format not in WRITERS:
+            raise CommandError(f'Cannot tell the format of {path}, use --file-format')
+
+        author = None
+        if options['author']:
+            try:
+                author = User.objects.get(username=options['author'])
+            except User.DoesNotExist:
+                raise CommandError(f"Unknown user: {options['author']}")
+
+        with open(path, encoding='utf-8', newline='') as handle:
+            report = import_posts(
+                read_rows(handle, file_format),
+                default_author=author,
+                batch_size=options['batch_size'],
+                refresh_related=not options['skip_related'],
+            )
+
+        for error in report.errors:
+            self.stderr.write(f"line {error['line']}: {error['errors']}")
+        if report.failed > len(report.errors):
+            self.stderr.write(f'... and {report.failed - len(report.errors)} more errors')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {report.created} posts ({report.failed} rows failed)'
+        ))
@@ -0,0 +1,25 @@
+# blog/management/commands/prune_token_blacklist.py
+
+"""
+Delete blacklisted refresh tokens that have expired anyway.
+Like Laravel: php artisan sanctum:prune-expired
+
+Usage (e.g. from cron, once a day):
+    python manage.py prune_token_blacklist
+    python manage.py prune_token_blacklist --batch-size 5000
+"""
+
+from django.core.management.base import BaseCommand
+
+from blog.token_blacklist import token_blacklist
+
+
+class Command(BaseCommand):
+    help = 'Delete expired rows from the refresh-token blacklist in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, help='Rows deleted per statement')
+
+    def handle(self, *args, **options):
+        deleted = token_blacklist.prune(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} expired blacklist entries'))
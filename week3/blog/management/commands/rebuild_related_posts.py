@@ -0,0 +1,24 @@
+# blog/management/commands/rebuild_related_posts.py
+
+"""
+Recompute the related-posts table for every published post.
+Run once after migrating, and after bulk changes that skip signals.
+
+Usage:
+    python manage.py rebuild_related_posts
+"""
+
+from django.core.management.base import BaseCommand
+
+from blog.related import rebuild_all
+
+
+class Command(BaseCommand):
+    help = 'Recompute related posts for every published post'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        processed = rebuild_all(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Computed related posts for {processed} posts'))
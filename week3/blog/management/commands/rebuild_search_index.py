@@ -0,0 +1,24 @@
+# blog/management/commands/rebuild_search_index.py
+
+"""
+Rebuild the post search index.
+Like Laravel: php artisan scout:import
+
+Usage:
+    python manage.py rebuild_search_index
+"""
+
+from django.core.management.base import BaseCommand
+
+from blog.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = 'Re-index every post in the configured search backend'
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        indexed = backend.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Indexed {indexed} posts with {backend.__class__.__name__}'
+        ))
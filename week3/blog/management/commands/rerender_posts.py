@@ -0,0 +1,30 @@
+# blog/management/commands/rerender_posts.py
+
+"""
+Re-render post bodies stored by an older renderer (blog/rendering.py).
+Run after bumping RENDERER_VERSION; safe to run from cron, it only
+touches stale posts.
+
+Usage:
+    python manage.py rerender_posts
+    python manage.py rerender_posts --batch-size 200 --max-batches 10
+"""
+
+from django.core.management.base import BaseCommand
+
+from blog.rendering import RENDERER_VERSION, rerender_stale
+
+
+class Command(BaseCommand):
+    help = 'Re-render posts rendered by an older renderer version'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--max-batches', type=int, default=None,
+                            help='Stop after this many batches (run again to continue)')
+
+    def handle(self, *args, **options):
+        done = rerender_stale(batch_size=options['batch_size'], max_batches=options['max_batches'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Re-rendered {done} posts with renderer version {RENDERER_VERSION}'
+        ))
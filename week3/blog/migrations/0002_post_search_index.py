@@ -0,0 +1,36 @@
+# Full-text search index for posts (used by blog/search.py)
+
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    """Create the FTS5 table and fill it from existing posts (SQLite only)."""
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS blog_post_fts USING fts5("
+        "title, content, status UNINDEXED, tokenize='unicode61 remove_diacritics 2')"
+    )
+    schema_editor.execute(
+        "INSERT INTO blog_post_fts (rowid, title, content, status) "
+        "SELECT id, title, content, status FROM blog_post"
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+
+    schema_editor.execute("DROP TABLE IF EXISTS blog_post_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
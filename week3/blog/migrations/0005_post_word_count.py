@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:52
+
+from django.db import migrations, models
+
+
+def count_words(apps, schema_editor):
+    """Fill word_count for existing posts, in batches."""
+    Post = apps.get_model('blog', 'Post')
+
+    batch = []
+    for post in Post.objects.only('id', 'content').iterator(chunk_size=500):
+        post.word_count = len(post.content.split())
+        batch.append(post)
+        if len(batch) >= 500:
+            Post.objects.bulk_update(batch, ['word_count'])
+            batch = []
+    if batch:
+        Post.objects.bulk_update(batch, ['word_count'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0004_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='word_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_words, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:23
+
+from django.db import migrations, models
+
+# Existing posts keep renderer_version=0: `python manage.py rerender_posts`
+# renders them with the current renderer. Calling blog.rendering from here
+# would tie this migration to code that changes after it is written.
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0006_blacklistedtoken'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='content_html',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='renderer_version',
+            field=models.PositiveSmallIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='summary',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='toc',
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+    ]
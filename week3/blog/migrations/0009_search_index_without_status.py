@@ -0,0 +1,46 @@
+# Drop the unused status column from the search index (blog/search.py
+# reads the status from blog_post). FTS5 tables can't drop a column, so
+# the table is created again.
+
+from django.db import migrations
+
+
+def drop_status_column(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+
+    schema_editor.execute("DROP TABLE IF EXISTS blog_post_fts")
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE blog_post_fts USING fts5("
+        "title, content, tokenize='unicode61 remove_diacritics 2')"
+    )
+    schema_editor.execute(
+        "INSERT INTO blog_post_fts (rowid, title, content) "
+        "SELECT id, title, content FROM blog_post"
+    )
+
+
+def add_status_column(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+
+    schema_editor.execute("DROP TABLE IF EXISTS blog_post_fts")
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE blog_post_fts USING fts5("
+        "title, content, status UNINDEXED, tokenize='unicode61 remove_diacritics 2')"
+    )
+    schema_editor.execute(
+        "INSERT INTO blog_post_fts (rowid, title, content, status) "
+        "SELECT id, title, content, status FROM blog_post"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0008_postviewbucket'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_status_column, add_status_column),
+    ]
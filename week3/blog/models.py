@@ -2,8 +2,31 @@
 
 from django.db import models
 from django.contrib.auth.models import User
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 
+from .rendering import RENDERED_FIELDS, render_post
+
+def published_posts_count(relation):
+    """
+    Count of published posts, for .annotate() on Category or User querysets.
+    Like Laravel: withCount(['posts' => fn ($q) => $q->where('status', 'published')])
+    
+    Args:
+        relation: the Post field pointing back at the annotated model
+            ('categories' for Category, 'author' for User)
+    
+    A correlated subquery rather than Count('posts'): inside a prefetch,
+    Count would reuse the prefetch's join and only count the prefetched post.
+    Serializers read the `published_posts_count` attribute instead of
+    running one COUNT per row.
+    """
+    posts = Post.objects.filter(
+        status='published', **{relation: models.OuterRef('pk')}
+    ).order_by().values(relation).annotate(count=models.Count('pk')).values('count')
+    return Coalesce(models.Subquery(posts), 0)
+
+
 # This is like Laravel Eloquent Model!
 class Category(models.Model):
     """Blog category."""
@@ -19,6 +42,56 @@ class Category(models.Model):
         """Like Laravel's __toString()"""
         return self.name
 
+# Average reading speed used for Post.reading_time (words per minute)
+WORDS_PER_MINUTE = 200
+
+
+class PostQuerySet(models.QuerySet):
+    """Reusable query scopes for posts (like Laravel local scopes)."""
+    
+    # Large text columns no list page or list serializer displays
+    LIST_DEFERRED_FIELDS = ('content', 'content_html', 'toc')
+    
+    def for_list(self):
+        """
+        Leave out the post body, for list pages and list serializers.
+        Like Laravel: Post::select([...everything but content])
+        
+        Touching post.content on a result still works, but costs one query
+        per post - use a normal queryset when the body is needed.
+        """
+        return self.defer(*self.LIST_DEFERRED_FIELDS)
+    
+    def with_detail_relations(self):
+        """
+        Load everything PostDetailSerializer needs in a fixed number of queries:
+        approved comment count, approved comments, and the author and
+        categories annotated with their published post counts.
+        
+        Replaces any select_related()/prefetch_related() already on the queryset.
+        """
+        return self.select_related(None).prefetch_related(None).annotate(
+            approved_comments_count=models.Count(
+                'comments', filter=models.Q(comments__is_approved=True), distinct=True
+            )
+        ).prefetch_related(
+            # Prefetch (not select_related) so the author can carry an annotation
+            models.Prefetch(
+                'author',
+                queryset=User.objects.annotate(published_posts_count=published_posts_count('author'))
+            ),
+            models.Prefetch(
+                'categories',
+                queryset=Category.objects.annotate(published_posts_count=published_posts_count('categories'))
+            ),
+            models.Prefetch(
+                'comments',
+                queryset=Comment.objects.filter(is_approved=True).order_by('-created_at'),
+                to_attr='approved_comments'
+            ),
+        )
+
+
 class Post(models.Model):
     """Blog post model."""
     
@@ -58,15 +131,42 @@ class Post(models.Model):
     # Views count
     views = models.IntegerField(default=0)
     
+    # Rendered from content and excerpt by save() (blog/rendering.py), so
+    # reads never process text
+    content_html = models.TextField(blank=True, editable=False)
+    toc = models.JSONField(default=list, blank=True, editable=False)
+    summary = models.TextField(blank=True, editable=False)
+    word_count = models.PositiveIntegerField(default=0, editable=False)
+    renderer_version = models.PositiveSmallIntegerField(default=0, editable=False, db_index=True)
+    
+    objects = PostQuerySet.as_manager()
+    
     class Meta:
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['-created_at']),
+            # Published lists, newest first (home, post_list, API list)
+            models.Index(fields=['status', '-created_at'], name='post_status_created_idx'),
+            # An author's posts, optionally by status (dashboard, my_posts, drafts)
+            models.Index(fields=['author', 'status', '-created_at'], name='post_author_status_idx'),
+            # Most viewed published posts (popular, stats)
+            models.Index(fields=['status', '-views'], name='post_status_views_idx'),
         ]
     
     def __str__(self):
         return self.title
     
+    def save(self, *args, **kwargs):
+        """Render the body whenever the content or excerpt is saved."""
+        update_fields = kwargs.get('update_fields')
+        content_saved = update_fields is None or {'content', 'excerpt'} & set(update_fields)
+        # A deferred body (from for_list()) is not being saved, keep the rendering
+        if content_saved and not {'content', 'excerpt'} & self.get_deferred_fields():
+            render_post(self)
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, *RENDERED_FIELDS}
+        super().save(*args, **kwargs)
+    
     def publish(self):
         """Publish the post."""
         self.status = 'published'
@@ -77,6 +177,11 @@ class Post(models.Model):
     def is_published(self):
         """Check if post is published."""
         return self.status == 'published'
+    
+    @property
+    def reading_time(self):
+        """Estimated reading time in minutes (at least 1)."""
+        return max(1, self.word_count // WORDS_PER_MINUTE)
 
 class Comment(models.Model):
     """Blog comment."""
@@ -96,6 +201,105 @@ class Comment(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Approved comments of a post, newest first
+            models.Index(fields=['post', 'is_approved', '-created_at'], name='comment_post_approved_idx'),
+            # All approved comments, newest first (comments API, stats).
+            # Partial: SQLite compiles is_approved=True to a bare column test,
+            # which can only use an index whose WHERE clause matches it.
+            models.Index(
+                fields=['-created_at'], condition=models.Q(is_approved=True),
+                name='comment_approved_created_idx'
+            ),
+        ]
+    
+    def __str__(self):
+        return f'Comment by {self.author_name} on {self.post.title}'
+
+class RelatedPost(models.Model):
+    """
+    Precomputed "related posts" entry, maintained by blog/related.py.
+    Like a Laravel pivot table with extra columns (score, position).
+    
+    Each published post keeps its top-N related posts here, so rendering
+    a post reads them with one indexed lookup on (post, position).
+    """
+    
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='related_entries'
+    )
+    related = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    score = models.FloatField()
+    position = models.PositiveSmallIntegerField()
+    
+    class Meta:
+        ordering = ['post', 'position']
+        constraints = [
+            models.UniqueConstraint(fields=['post', 'position'], name='blog_related_post_position'),
+        ]
+    
+    def __str__(self):
+        return f'{self.post_id} -> {self.related_id} ({self.score:.2f})'
+
+
+class PostViewBucket(models.Model):
+    """
+    Views of one post during one hour or one day, maintained by blog/analytics.py.
+    Like a Laravel rollup table filled by a scheduled aggregation job.
+    
+    Recent views are kept per hour; older hours are compacted into days
+    and the oldest days are dropped, so the table stays bounded.
+    Post.views remains the all-time total.
+    """
+    
+    HOUR = 'hour'
+    DAY = 'day'
+    PERIOD_CHOICES = [
+        (HOUR, 'Hour'),
+        (DAY, 'Day'),
+    ]
+    
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='view_buckets'
+    )
+    period = models.CharField(max_length=4, choices=PERIOD_CHOICES)
+    start = models.DateTimeField()
+    views = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        constraints = [
+            # Upsert target of the ingestion path (ON CONFLICT ... DO UPDATE)
+            models.UniqueConstraint(fields=['post', 'period', 'start'], name='blog_view_bucket_unique'),
+        ]
+        indexes = [
+            # Window sums (start >= cutoff, grouped by post) read only this index
+            models.Index(fields=['start', 'post', 'views'], name='view_bucket_window_idx'),
+        ]
+    
+    def __str__(self):
+        return f'{self.post_id} {self.period} {self.start:%Y-%m-%d %H:00}: {self.views}'
+
+
+class BlacklistedToken(models.Model):
+    """
+    Refresh token that may not be used again (rotated or logged out).
+    Maintained by blog/token_blacklist.py.
+    
+    Only blacklisted tokens are stored, not every issued one, and rows are
+    pruned once the token has expired anyway.
+    """
+    
+    jti = models.CharField(max_length=255, unique=True)
+    expires_at = models.DateTimeField(db_index=True)
+    blacklisted_at = models.DateTimeField(auto_now_add=True)
     
     def __str__(self):
-        return f'Comment by {self.author_name} on {self.post.title}'
\ No newline at end of file
+        return self.jti
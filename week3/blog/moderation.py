@@ -0,0 +1,129 @@
+# blog/moderation.py
+
+"""
+Bulk comment moderation.
+Like Laravel: Comment::whereIn('id', $ids)->update(['is_approved' => true])
+
+`moderate()` approves or deletes a batch in one transaction and sends one
+`comments_moderated` signal (receivers in blog/signals.py).
+Used by POST /api/comments/moderate/.
+"""
+
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+from django.dispatch import Signal
+
+from .models import Comment
+
+
+APPROVE = 'approve'
+REJECT = 'reject'
+DELETE = 'delete'
+ACTIONS = (APPROVE, REJECT, DELETE)
+
+# Per-comment outcomes
+OUTCOMES = {APPROVE: 'approved', REJECT: 'rejected', DELETE: 'deleted'}
+UNCHANGED = 'unchanged'
+NOT_FOUND = 'not_found'
+
+# Sent once per batch with action, comment_ids, post_ids, post_counts
+# ({post_id: comments changed}) and user
+comments_moderated = Signal()
+
+# Filter keys accepted by filter_comments() and the lookups they map to
+FILTER_LOOKUPS = {
+    'post': 'post__slug',
+    'author_email': 'author_email__iexact',
+    'is_approved': 'is_approved',
+    'content_contains': 'content__icontains',
+}
+
+
+class BatchTooLarge(Exception):
+    """The selection matches more comments than BLOG_MODERATION_MAX_BATCH."""
+
+
+def get_max_batch():
+    """Most comments one moderation request may touch."""
+    return getattr(settings, 'BLOG_MODERATION_MAX_BATCH', 5000)
+
+
+def moderatable_comments(user):
+    """Comments `user` may moderate: every comment for staff, else those on their own posts."""
+    queryset = Comment.objects.all()
+    if not user.is_staff:
+        queryset = queryset.filter(post__author=user)
+    return queryset
+
+
+def filter_comments(queryset, filters):
+    """Narrow a comment queryset with FILTER_LOOKUPS keys (unknown keys are ignored)."""
+    lookups = {
+        FILTER_LOOKUPS[key]: value
+        for key, value in filters.items()
+        if key in FILTER_LOOKUPS
+    }
+    return queryset.filter(**lookups)
+
+
+def moderate(queryset, action, requested_ids=None, user=None):
+    """
+    Approve, reject or delete every comment in `queryset` with one statement.
+
+    Args:
+        queryset: the comments to moderate, already limited to what the user may touch
+        action: APPROVE, REJECT or DELETE
+        requested_ids: ids the caller asked for; those not in `queryset`
+            (missing, or on someone else's post) are reported as NOT_FOUND
+        user: the moderator, passed on to comments_moderated
+
+    Returns:
+        dict {comment_id: outcome}
+
+    Raises:
+        BatchTooLarge: the queryset matches more than get_max_batch() comments
+    """
+    if action not in ACTIONS:
+        raise ValueError(f'Unknown moderation action: {action}')
+
+    limit = get_max_batch()
+    with transaction.atomic():
+        rows = list(
+            queryset.order_by('pk').values_list('pk', 'post_id', 'is_approved')[:limit + 1]
+        )
+        if len(rows) > limit:
+            raise BatchTooLarge(f'More than {limit} comments match, narrow the selection')
+
+        if action == DELETE:
+            changed = rows
+        else:
+            approve = action == APPROVE
+            changed = [row for row in rows if row[2] != approve]
+
+        changed_ids = [pk for pk, _, _ in changed]
+        if changed_ids:
+            batch = Comment.objects.filter(pk__in=changed_ids)
+            if action == DELETE:
+                # Loads the comments for their post_delete signals, then one DELETE
+                batch.delete()
+            else:
+                batch.update(is_approved=approve)
+
+    outcomes = {pk: UNCHANGED for pk, _, _ in rows}
+    outcomes.update((pk, OUTCOMES[action]) for pk in changed_ids)
+    for pk in requested_ids or ():
+        outcomes.setdefault(pk, NOT_FOUND)
+
+    if changed_ids:
+        comments_moderated.send(
+            sender=Comment,
+            action=action,
+            comment_ids=changed_ids,
+            post_ids={post_id for _, post_id, _ in changed},
+            post_counts=Counter(post_id for _, post_id, _ in changed),
+            user=user,
+        )
+
+    return outcomes
@@ -0,0 +1,168 @@
+# blog/notifications.py
+
+"""
+Coalescing notification dispatcher.
+Like Laravel's queued, ShouldBroadcast notifications.
+
+Signal handlers call `notify()`, which only records the notification. A
+background thread sends what piled up every WINDOW seconds: repeats of a
+(group, key) become one notification with a `count`, and each group gets
+one frame. Groups: notifications_<user id>, notifications_post_<id> and
+notifications_broadcast (joined by NotificationConsumer).
+
+Settings: BLOG_NOTIFICATIONS = {'WINDOW': 1.0, 'BACKGROUND': True}.
+"""
+
+import asyncio
+import atexit
+import logging
+import threading
+from datetime import datetime
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'WINDOW': 1.0,       # Seconds events are collected before sending
+    'BACKGROUND': True,  # Send from a background thread
+}
+
+BROADCAST_GROUP = 'notifications_broadcast'
+
+# Most posts one notifications socket may follow
+MAX_FOLLOWED_POSTS = 50
+
+
+def get_setting(name):
+    return getattr(settings, 'BLOG_NOTIFICATIONS', {}).get(name, DEFAULTS[name])
+
+
+def user_group(user_id):
+    return f'notifications_{user_id}'
+
+
+def post_group(post_id):
+    return f'notifications_post_{post_id}'
+
+
+class NotificationDispatcher:
+    """Collects notifications per group and sends them in batches."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}  # group -> {key: notification}
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._sent = 0
+        self._coalesced = 0
+
+    def notify(self, group, key, title, message, count=1, **extra):
+        """
+        Queue a notification for a channel-layer group.
+
+        Args:
+            group: group name (see user_group(), post_group(), BROADCAST_GROUP)
+            key: identity for deduplication, e.g. ('comment_approved', post_id);
+                repeats within the window add to `count` and keep the latest text
+            title, message: shown by the client
+            count: how many events this notification stands for
+            extra: more JSON-serializable fields (e.g. url)
+        """
+        with self._lock:
+            notifications = self._pending.setdefault(group, {})
+            previous = notifications.get(key)
+            if previous is not None:
+                count += previous['count']
+                self._coalesced += 1
+            notifications[key] = {
+                'title': title,
+                'message': message,
+                'count': count,
+                'timestamp': datetime.now().isoformat(),
+                **extra,
+            }
+
+        if get_setting('BACKGROUND'):
+            self._start()
+            self._wakeup.set()
+
+    def flush(self, at_exit=False):
+        """Send everything pending now. Returns the number of group_send calls."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+
+        events = [(group, self._build_event(notifications)) for group, notifications in pending.items()]
+        layer = get_channel_layer()
+        if layer is None:
+            return 0
+
+        async def send_all():
+            for group, event in events:
+                await layer.group_send(group, event)
+
+        if at_exit:
+            # async_to_sync's executor is already shut down when atexit runs
+            asyncio.run(send_all())
+        else:
+            async_to_sync(send_all)()
+        self._sent += len(events)
+        return len(events)
+
+    def stats(self):
+        with self._lock:
+            pending = sum(len(notifications) for notifications in self._pending.values())
+        return {'pending': pending, 'sent': self._sent, 'coalesced': self._coalesced}
+
+    def _build_event(self, notifications):
+        items = list(notifications.values())
+        if len(items) == 1:
+            return {'type': 'send_notification', **items[0]}
+        return {
+            'type': 'send_notification',
+            'title': f'{len(items)} new notifications',
+            'message': ', '.join(item['title'] for item in items[:3]),
+            'count': sum(item['count'] for item in items),
+            'timestamp': items[-1]['timestamp'],
+            'items': items,
+        }
+
+    # Background thread
+
+    def _start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name='blog-notifications', daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait()
+            # Let the window fill up before sending
+            threading.Event().wait(get_setting('WINDOW'))
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Sending notifications failed')
+
+
+notification_dispatcher = NotificationDispatcher()
+
+
+@atexit.register
+def _flush_on_exit():
+    """Send what is still pending when the server shuts down."""
+    try:
+        notification_dispatcher.flush(at_exit=True)
+    except Exception:
+        logger.exception('Sending pending notifications at exit failed')
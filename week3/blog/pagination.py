@@ -0,0 +1,220 @@
+# blog/pagination.py
+
+"""
+Keyset (cursor) pagination.
+Like Laravel's cursorPaginate() instead of paginate().
+
+Pages continue after the last (created_at, id) seen instead of using
+OFFSET, so every page costs the same whatever its depth. Cursors are
+opaque base64 strings; the total is only counted on ?count=true.
+"""
+
+import base64
+import json
+from datetime import datetime
+
+from django.conf import settings
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def encode_cursor(created_at, pk, reverse=False):
+    """Pack a (created_at, id) position into an opaque cursor string."""
+    payload = json.dumps({'t': created_at.isoformat(), 'i': pk, 'r': int(reverse)})
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Unpack a cursor string into (created_at, id, reverse).
+    Raises ValueError if the cursor was tampered with.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(payload['t']), int(payload['i']), bool(payload['r'])
+    except (TypeError, KeyError, ValueError, json.JSONDecodeError) as exc:
+        raise ValueError('Invalid cursor') from exc
+
+
+def keyset_queryset(queryset, position):
+    """
+    Order `queryset` for keyset paging and filter it to rows after `position`
+    ((created_at, id, reverse) from decode_cursor(), or None).
+    """
+    if position is None:
+        return queryset.order_by('-created_at', '-id')
+
+    created_at, pk, reverse = position
+    if reverse:
+        # Walking back towards newer rows
+        return queryset.filter(
+            Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk)
+        ).order_by('created_at', 'id')
+    return queryset.filter(
+        Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+    ).order_by('-created_at', '-id')
+
+
+def finish_page(rows, position, page_size):
+    """Trim the extra row fetched by keyset_page() and restore newest-first order."""
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    if position is not None and position[2]:
+        rows.reverse()
+    return rows, has_more
+
+
+def keyset_page(queryset, position, page_size):
+    """
+    Fetch one page of rows newest first, starting after `position`.
+
+    Args:
+        queryset: any queryset of a model with created_at and id
+        position: (created_at, id, reverse) from decode_cursor(), or None
+        page_size: rows per page
+
+    Returns:
+        (rows, has_more) - has_more is True if rows exist beyond this page
+        in the direction of travel.
+    """
+    # Fetch one extra row to know if there is another page
+    rows = list(keyset_queryset(queryset, position)[:page_size + 1])
+    return finish_page(rows, position, page_size)
+
+
+async def akeyset_page(queryset, position, page_size):
+    """keyset_page() for async views (Django's async ORM)."""
+    rows = [row async for row in keyset_queryset(queryset, position)[:page_size + 1]]
+    return finish_page(rows, position, page_size)
+
+
+def page_cursors(rows, position, has_more):
+    """
+    Cursors of the pages around a keyset page.
+
+    Returns:
+        (next_cursor, previous_cursor) - None where there is no such page
+    """
+    reverse = position is not None and position[2]
+    if reverse:
+        has_next, has_previous = True, has_more
+    else:
+        has_next, has_previous = has_more, position is not None
+
+    next_cursor = previous_cursor = None
+    if rows and has_next:
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].pk)
+    if rows and has_previous:
+        previous_cursor = encode_cursor(rows[0].created_at, rows[0].pk, reverse=True)
+    return next_cursor, previous_cursor
+
+
+def _query_params(request):
+    """DRF Request.query_params, or GET of a plain Django request."""
+    return getattr(request, 'query_params', request.GET)
+
+
+class KeysetPagination(BasePagination):
+    """
+    DRF pagination class ordering by (-created_at, -id).
+
+    Query parameters:
+        cursor     - opaque cursor from a previous 'next'/'previous' link
+        page_size  - rows per page (default PAGE_SIZE, max 100)
+        count      - 'true' to include the total row count (extra COUNT query)
+    """
+
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    count_query_param = 'count'
+    max_page_size = 100
+
+    def paginate_queryset(self, queryset, request, view=None):
+        position, wants_count = self._start(request)
+        self.count = queryset.count() if wants_count else None
+        rows, has_more = keyset_page(queryset, position, self.page_size)
+        self.next_cursor, self.previous_cursor = page_cursors(rows, position, has_more)
+        return rows
+
+    async def apaginate_queryset(self, queryset, request):
+        """paginate_queryset() for async views, with the async ORM."""
+        position, wants_count = self._start(request)
+        self.count = await queryset.acount() if wants_count else None
+        rows, has_more = await akeyset_page(queryset, position, self.page_size)
+        self.next_cursor, self.previous_cursor = page_cursors(rows, position, has_more)
+        return rows
+
+    def _start(self, request):
+        """
+        Read the query parameters.
+
+        Returns:
+            (position, wants_count) - position from decode_cursor() or None
+        """
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        params = _query_params(request)
+
+        position = None
+        encoded = params.get(self.cursor_query_param)
+        if encoded:
+            try:
+                position = decode_cursor(encoded)
+            except ValueError:
+                raise NotFound('Invalid cursor')
+
+        wants_count = params.get(self.count_query_param, '').lower() in ('1', 'true', 'yes')
+        return position, wants_count
+
+    def get_page_size(self, request):
+        default = getattr(settings, 'REST_FRAMEWORK', {}).get('PAGE_SIZE') or 10
+        try:
+            size = int(_query_params(request).get(self.page_size_query_param, default))
+        except (TypeError, ValueError):
+            return default
+        return max(1, min(size, self.max_page_size))
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        return self._build_link(self.next_cursor)
+
+    def get_previous_link(self):
+        if self.previous_cursor is None:
+            return None
+        return self._build_link(self.previous_cursor)
+
+    def _build_link(self, cursor):
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, self.count_query_param)
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_paginated_data(self, data):
+        """The page envelope as a dict (async views wrap it in a JsonResponse)."""
+        payload = {
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        }
+        if self.count is not None:
+            payload['count'] = self.count
+        return payload
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'count': {'type': 'integer', 'description': 'Only with ?count=true'},
+                'results': schema,
+            },
+        }
@@ -0,0 +1,247 @@
+# blog/profiling.py
+
+"""
+Per-request query and latency profiling.
+
+ProfilingMiddleware samples requests (query count, database time,
+duplicate and N+1-like queries, serializer, render and wall time) into a
+rolling window of WINDOW requests per URL name. GET /api/stats/profile/
+(staff only) reports the percentiles, slowest first.
+
+Settings: BLOG_PROFILING (see DEFAULTS). Disabled, the middleware removes
+itself at startup.
+"""
+
+import random
+import threading
+import time
+from collections import deque
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from rest_framework.serializers import ListSerializer
+
+
+DEFAULTS = {
+    'ENABLED': False,
+    'SAMPLE_RATE': 1.0,        # Fraction of requests profiled
+    'WINDOW': 500,             # Samples kept per URL name
+    'NPLUSONE_THRESHOLD': 10,  # Similar queries that flag a request as N+1
+}
+
+METRICS = ('wall_ms', 'db_ms', 'queries', 'duplicates', 'similar', 'serialize_ms', 'render_ms')
+PERCENTILES = (('p50', 0.50), ('p95', 0.95), ('p99', 0.99))
+
+UNRESOLVED = '<unresolved>'
+
+_current = ContextVar('blog_request_profile', default=None)
+
+
+def get_setting(name):
+    return getattr(settings, 'BLOG_PROFILING', {}).get(name, DEFAULTS[name])
+
+
+def percentile(ordered, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+class RequestProfile:
+    """Counters of one request, filled in while it runs."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.serialize_seconds = 0.0
+        self.render_seconds = 0.0
+        self.serializing = False
+        self._statements = {}  # sql -> set of params seen
+
+        self.duplicates = 0
+        self.similar = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        """connection.execute_wrapper() hook around every query."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_seconds += time.perf_counter() - started
+            self.queries += 1
+            self._record_statement(sql, params)
+
+    def _record_statement(self, sql, params):
+        try:
+            key = repr(params)
+        except Exception:
+            key = None
+        seen = self._statements.get(sql)
+        if seen is None:
+            self._statements[sql] = {key}
+        elif key in seen:
+            self.duplicates += 1
+        else:
+            seen.add(key)
+            self.similar += 1
+
+    def sample(self, wall_seconds):
+        return {
+            'wall_ms': wall_seconds * 1000,
+            'db_ms': self.db_seconds * 1000,
+            'queries': self.queries,
+            'duplicates': self.duplicates,
+            'similar': self.similar,
+            'serialize_ms': self.serialize_seconds * 1000,
+            'render_ms': self.render_seconds * 1000,
+        }
+
+
+class Profiler:
+    """Rolling windows of request samples per URL name. Thread-safe."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples = {}  # url name -> deque of sample dicts
+        self._requests = {}  # url name -> requests seen (sampled or not)
+
+    def count(self, name):
+        with self._lock:
+            self._requests[name] = self._requests.get(name, 0) + 1
+
+    def add(self, name, sample):
+        window = get_setting('WINDOW')
+        with self._lock:
+            samples = self._samples.get(name)
+            if samples is None or samples.maxlen != window:
+                samples = self._samples[name] = deque(samples or (), maxlen=window)
+            samples.append(sample)
+
+    def report(self, sort='wall_ms'):
+        """
+        Percentiles per URL name, ordered by p95 of `sort` (highest first).
+
+        Returns:
+            {url name: {'requests', 'samples', 'nplusone', '<metric>': {'p50', 'p95', 'p99'}}}
+        """
+        with self._lock:
+            windows = {name: list(samples) for name, samples in self._samples.items()}
+            requests = dict(self._requests)
+
+        threshold = get_setting('NPLUSONE_THRESHOLD')
+        report = {}
+        for name, samples in windows.items():
+            entry = {
+                'requests': requests.get(name, len(samples)),
+                'samples': len(samples),
+                'nplusone': sum(1 for sample in samples if sample['similar'] >= threshold),
+            }
+            for metric in METRICS:
+                ordered = sorted(sample[metric] for sample in samples)
+                entry[metric] = {
+                    label: round(percentile(ordered, fraction), 2) for label, fraction in PERCENTILES
+                }
+            report[name] = entry
+
+        return dict(sorted(report.items(), key=lambda item: item[1][sort]['p95'], reverse=True))
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._requests.clear()
+
+
+profiler = Profiler()
+
+
+class ProfilingMiddleware:
+    """
+    Records a RequestProfile for a sample of requests.
+    List it first in MIDDLEWARE so wall_ms covers the other middleware.
+    """
+
+    def __init__(self, get_response):
+        if not get_setting('ENABLED'):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        sample_rate = get_setting('SAMPLE_RATE')
+        if sample_rate < 1 and random.random() >= sample_rate:
+            response = self.get_response(request)
+            profiler.count(_url_name(request))
+            return response
+
+        profile = RequestProfile()
+        token = _current.set(profile)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(profile))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        wall_seconds = time.perf_counter() - started
+
+        name = _url_name(request)
+        profiler.count(name)
+        profiler.add(name, profile.sample(wall_seconds))
+        return response
+
+    def process_template_response(self, request, response):
+        """TemplateResponse / DRF Response: time the render that follows."""
+        profile = _current.get()
+        if profile is not None:
+            started = time.perf_counter()
+
+            def rendered(response):
+                profile.render_seconds += time.perf_counter() - started
+
+            response.add_post_render_callback(rendered)
+        return response
+
+
+def _url_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match is not None and match.view_name else UNRESOLVED
+
+
+class ProfiledSerializerMixin:
+    """
+    Time serializer.data into the profile of the current request.
+    Only the outermost serializer of a request is timed, so nested
+    serializers built by SerializerMethodFields are not counted twice.
+
+    Usage:
+        class PostListSerializer(ProfiledSerializerMixin, serializers.ModelSerializer): ...
+    """
+
+    @property
+    def data(self):
+        profile = _current.get()
+        if profile is None or profile.serializing:
+            return super().data
+        profile.serializing = True
+        started = time.perf_counter()
+        try:
+            return super().data
+        finally:
+            profile.serializing = False
+            profile.serialize_seconds += time.perf_counter() - started
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        # many=True serializes through the ListSerializer, not through this class
+        serializer = super().many_init(*args, **kwargs)
+        if type(serializer) is ListSerializer:
+            serializer.__class__ = ProfiledListSerializer
+        return serializer
+
+
+class ProfiledListSerializer(ProfiledSerializerMixin, ListSerializer):
+    """ListSerializer whose data is timed (adds no state, see many_init())."""
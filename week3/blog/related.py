@@ -0,0 +1,222 @@
+# blog/related.py
+
+"""
+Related-posts engine.
+
+Scores published posts by shared categories and recency,
+
+    score = shared_categories + 1 / (1 + age_in_days / 30)
+
+and stores each post's top-N in RelatedPost, read with one indexed query.
+blog/signals.py refreshes only the lists a change can affect;
+`python manage.py rebuild_related_posts` recomputes them all.
+"""
+
+import math
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Post, PostQuerySet, RelatedPost
+
+
+# How many same-category posts to score before keeping the top N
+CANDIDATE_LIMIT = 50
+
+# Only the columns compute_related() needs
+SCORING_FIELDS = ('id', 'status', 'created_at', 'published_at')
+
+PostCategory = Post.categories.through
+
+
+def get_limit():
+    """Number of related posts stored per post."""
+    return getattr(settings, 'BLOG_RELATED_POSTS_LIMIT', 3)
+
+
+def recency_bonus(published, now=None):
+    """Between 0 and 1: 1 for a brand new post, 0.5 after 30 days."""
+    now = now or timezone.now()
+    age_days = max((now - published).total_seconds() / 86400, 0)
+    return 1 / (1 + age_days / 30)
+
+
+def get_related_posts(post):
+    """
+    Precomputed related posts for rendering, best first.
+    One query: RelatedPost (post, position) index joined to Post.
+    """
+    entries = RelatedPost.objects.filter(post=post).select_related(
+        'related'
+    ).defer(*(f'related__{field}' for field in PostQuerySet.LIST_DEFERRED_FIELDS)).order_by('position')
+    return [entry.related for entry in entries]
+
+
+def compute_related(post, now=None):
+    """
+    Score candidates for one post.
+
+    Returns:
+        list of (related_post_id, score), best first, at most get_limit() long
+    """
+    if post.status != 'published':
+        return []
+
+    category_ids = list(post.categories.values_list('id', flat=True))
+    if not category_ids:
+        return []
+
+    # Posts sharing the most categories, straight from the M2M through table
+    candidates = PostCategory.objects.filter(
+        category_id__in=category_ids,
+        post__status='published',
+    ).exclude(
+        post_id=post.pk
+    ).values(
+        'post_id', 'post__published_at', 'post__created_at'
+    ).annotate(
+        shared=Count('category_id')
+    ).order_by('-shared', '-post__created_at')[:CANDIDATE_LIMIT]
+
+    now = now or timezone.now()
+    scored = []
+    for row in candidates:
+        published = row['post__published_at'] or row['post__created_at']
+        scored.append((row['post_id'], row['shared'] + recency_bonus(published, now)))
+
+    scored.sort(key=lambda item: item[1], reverse=True)
+    return scored[:get_limit()]
+
+
+def refresh_post(post):
+    """Recompute and store one post's related list."""
+    scored = compute_related(post)
+    with transaction.atomic():
+        RelatedPost.objects.filter(post=post).delete()
+        RelatedPost.objects.bulk_create([
+            RelatedPost(post_id=post.pk, related_id=related_id, score=score, position=position)
+            for position, (related_id, score) in enumerate(scored)
+        ])
+    return scored
+
+
+def listing_posts(post):
+    """Ids of other posts whose related list includes `post`."""
+    return set(RelatedPost.objects.filter(related=post).values_list('post_id', flat=True))
+
+
+def current_lists(post_ids, now=None):
+    """
+    Stored lists of the given posts, re-scored at `now`.
+
+    Returns:
+        {post id: [(related post id, score)]}, best first
+    """
+    now = now or timezone.now()
+    lists = defaultdict(list)
+    entries = RelatedPost.objects.filter(post_id__in=post_ids).order_by('position').values_list(
+        'post_id', 'related_id', 'score', 'related__published_at', 'related__created_at'
+    )
+    for post_id, related_id, score, published_at, created_at in entries:
+        # score = shared categories + a bonus in (0, 1], so the shared count
+        # is ceil(score) - 1 and only the bonus needs re-aging
+        shared = math.ceil(score) - 1
+        lists[post_id].append((related_id, shared + recency_bonus(published_at or created_at, now)))
+    return lists
+
+
+def insert_into_lists(post, skip=()):
+    """
+    Add `post` to the neighbour lists it beats an entry of, in a fixed
+    number of queries. `skip`: ids of lists that were just recomputed.
+    """
+    if post.status != 'published':
+        return
+
+    category_ids = list(post.categories.values_list('id', flat=True))
+    if not category_ids:
+        return
+
+    stored = RelatedPost.objects.filter(post_id=OuterRef('post_id')).order_by().values('post_id')
+    limit = get_limit()
+    # How many categories each neighbour shares with this post, for the
+    # neighbours whose list has room or a weakest entry it may beat. The
+    # post scores at most shared + 1; an entry sharing more categories
+    # always scores higher, whatever its age.
+    shared = dict(
+        PostCategory.objects.filter(
+            category_id__in=category_ids,
+            post__status='published',
+        ).exclude(
+            post_id__in=[post.pk, *skip]
+        ).values('post_id').annotate(
+            shared=Count('category_id'),
+            listed=Coalesce(Subquery(stored.annotate(total=Count('pk')).values('total')), 0,
+                            output_field=IntegerField()),
+            lowest=Subquery(stored.order_by('score').values('score')[:1]),
+        ).filter(
+            Q(listed__lt=limit) | Q(lowest__lte=F('shared') + 1)
+        ).values_list('post_id', 'shared')
+    )
+    if not shared:
+        return
+
+    now = timezone.now()
+    bonus = recency_bonus(post.published_at or post.created_at, now)
+    rows, changed = [], []
+    lists = current_lists(shared, now)
+    for neighbour_id, shared_count in shared.items():
+        entries = [entry for entry in lists.get(neighbour_id, []) if entry[0] != post.pk]
+        score = shared_count + bonus
+        if len(entries) >= limit and score <= entries[-1][1]:
+            continue
+        ranked = sorted(entries + [(post.pk, score)], key=lambda item: item[1], reverse=True)[:limit]
+        changed.append(neighbour_id)
+        rows.extend(
+            RelatedPost(post_id=neighbour_id, related_id=related_id, score=related_score, position=position)
+            for position, (related_id, related_score) in enumerate(ranked)
+        )
+
+    if changed:
+        with transaction.atomic():
+            RelatedPost.objects.filter(post_id__in=changed).delete()
+            RelatedPost.objects.bulk_create(rows)
+
+
+def refresh_around(post):
+    """
+    Refresh a post's list and every neighbour list it can affect.
+    Inserting it into other lists waits until the transaction commits.
+    """
+    refresh_post(post)
+    listing = listing_posts(post)
+    refresh_ids(listing)
+    transaction.on_commit(lambda: _insert_committed(post.pk, listing))
+
+
+def _insert_committed(post_id, skip):
+    post = Post.objects.filter(pk=post_id).only(*SCORING_FIELDS).first()
+    if post is not None:
+        insert_into_lists(post, skip=skip)
+
+
+def refresh_ids(post_ids):
+    """Refresh the lists of the given posts (e.g. after a post was deleted)."""
+    for post in Post.objects.filter(pk__in=post_ids).only(*SCORING_FIELDS):
+        refresh_post(post)
+
+
+def rebuild_all(batch_size=500):
+    """Recompute every published post's list. Returns the number of posts processed."""
+    RelatedPost.objects.exclude(post__status='published').delete()
+
+    processed = 0
+    posts = Post.objects.filter(status='published').only(*SCORING_FIELDS)
+    for post in posts.iterator(chunk_size=batch_size):
+        refresh_post(post)
+        processed += 1
+    return processed
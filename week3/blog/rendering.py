@@ -0,0 +1,119 @@
+# blog/rendering.py
+
+"""
+Post body rendering, done once on save instead of on every read.
+Like Laravel: a mutator that stores the parsed Markdown next to the source.
+
+render_post() fills content_html, toc, summary, word_count and
+renderer_version. Bodies are escaped text: blank lines make paragraphs,
+and `# `, `## `, `### ` lines make anchored h2-h4 headings. After bumping
+RENDERER_VERSION, run `python manage.py rerender_posts`.
+"""
+
+import re
+from collections import namedtuple
+
+from django.dispatch import Signal
+from django.utils.html import escape, linebreaks
+from django.utils.text import Truncator, slugify
+
+
+RENDERER_VERSION = 1
+SUMMARY_WORDS = 30
+
+# Post fields written by render_post()
+RENDERED_FIELDS = ('content_html', 'toc', 'summary', 'word_count', 'renderer_version')
+
+HEADING_TAGS = {1: 'h2', 2: 'h3', 3: 'h4'}
+HEADING = re.compile(r'^(#{1,3})\s+(.+?)\s*#*\s*$')
+
+Rendered = namedtuple('Rendered', ['html', 'toc', 'text'])
+
+# Sent by rerender_stale() after each batch, since bulk_update() sends no
+# post_save. Arguments: post_ids
+posts_rerendered = Signal()
+
+
+def render_content(content):
+    """
+    Convert a post body to HTML.
+
+    Returns:
+        Rendered(html, toc, text) - text is the body without heading markers
+    """
+    lines = content.replace('\r\n', '\n').replace('\r', '\n').split('\n')
+    blocks, toc, text, paragraph = [], [], [], []
+    anchors = set()
+
+    def flush():
+        if paragraph:
+            blocks.append(linebreaks('\n'.join(paragraph), autoescape=True))
+            paragraph.clear()
+
+    for line in lines:
+        match = HEADING.match(line)
+        if match is None:
+            if line.strip():
+                paragraph.append(line)
+            else:
+                flush()
+            text.append(line)
+            continue
+
+        flush()
+        level, title = len(match.group(1)) + 1, match.group(2)
+        anchor = base = slugify(title) or 'section'
+        number = 2
+        while anchor in anchors:
+            anchor = f'{base}-{number}'
+            number += 1
+        anchors.add(anchor)
+
+        tag = HEADING_TAGS[level - 1]
+        blocks.append(f'<{tag} id="{anchor}">{escape(title)}</{tag}>')
+        toc.append({'level': level, 'title': title, 'anchor': anchor})
+        text.append(title)
+    flush()
+
+    return Rendered('\n\n'.join(blocks), toc, '\n'.join(text))
+
+
+def make_summary(excerpt, text):
+    """The excerpt, or the start of the body, cut to SUMMARY_WORDS words."""
+    return Truncator(excerpt.strip() or text).words(SUMMARY_WORDS)
+
+
+def render_post(post):
+    """Set the RENDERED_FIELDS of `post` from its content and excerpt (not saved)."""
+    rendered = render_content(post.content)
+    post.content_html = rendered.html
+    post.toc = rendered.toc
+    post.summary = make_summary(post.excerpt, rendered.text)
+    post.word_count = len(post.content.split())
+    post.renderer_version = RENDERER_VERSION
+
+
+def rerender_stale(batch_size=500, max_batches=None):
+    """
+    Re-render posts rendered by an older RENDERER_VERSION, in batches.
+
+    Returns:
+        number of posts re-rendered
+    """
+    from .models import Post
+
+    stale = Post.objects.filter(renderer_version__lt=RENDERER_VERSION).order_by('pk')
+    done = batches = last_pk = 0
+    while max_batches is None or batches < max_batches:
+        posts = list(stale.filter(pk__gt=last_pk).only('id', 'content', 'excerpt')[:batch_size])
+        if not posts:
+            break
+        for post in posts:
+            render_post(post)
+        Post.objects.bulk_update(posts, RENDERED_FIELDS)
+        posts_rerendered.send(sender=Post, post_ids=[post.pk for post in posts])
+
+        done += len(posts)
+        batches += 1
+        last_pk = posts[-1].pk
+    return done
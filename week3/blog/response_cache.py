@@ -0,0 +1,233 @@
+# blog/response_cache.py
+
+"""
+Response cache for anonymous reads of published posts.
+Like Laravel's response cache middleware (spatie/laravel-responsecache).
+
+Anonymous GET/HEAD responses are cached with an ETag and Last-Modified, so
+revalidations get a 304 without running the view. Keys include a
+generation number that blog/signals.py bumps on every content change.
+Requests with a token or session cookie are never cached.
+"""
+
+import hashlib
+import math
+import time
+from datetime import datetime, timezone as dt_timezone
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Max
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from .models import Post
+
+
+GENERATION_KEY = 'blog:response_cache:generation'
+CHANGED_AT_KEY = 'blog:response_cache:changed_at'
+ENTRY_KEY = 'blog:response_cache:{generation}:{digest}'
+
+# Last-Modified for pages that list no posts at all
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def get_timeout():
+    return getattr(settings, 'BLOG_RESPONSE_CACHE_TIMEOUT', 300)
+
+
+def get_generation():
+    """Current cache generation (part of every entry key)."""
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        # add() so concurrent first requests agree on one value
+        cache.add(GENERATION_KEY, 1, None)
+        generation = cache.get(GENERATION_KEY, 1)
+    return generation
+
+
+def get_changed_at():
+    """Time of the last generation bump, in whole seconds (HTTP dates have no fractions)."""
+    changed_at = cache.get(CHANGED_AT_KEY)
+    if changed_at is None:
+        cache.add(CHANGED_AT_KEY, math.ceil(time.time()), None)
+        changed_at = cache.get(CHANGED_AT_KEY, math.ceil(time.time()))
+    return datetime.fromtimestamp(changed_at, dt_timezone.utc)
+
+
+def bump_generation():
+    """Invalidate every cached response (called from model signals)."""
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        # Key missing (first write, or evicted): start a new generation
+        cache.set(GENERATION_KEY, 1, None)
+    # Strictly later than any Last-Modified sent before this change
+    previous = cache.get(CHANGED_AT_KEY, 0)
+    cache.set(CHANGED_AT_KEY, max(previous + 1, math.ceil(time.time())), None)
+
+
+def is_cacheable_request(request):
+    """Anonymous GET/HEAD without pending flash messages."""
+    if request.method not in ('GET', 'HEAD'):
+        return False
+    if 'HTTP_AUTHORIZATION' in request.META:
+        return False
+    if settings.SESSION_COOKIE_NAME in request.COOKIES:
+        return False
+    # Flash messages are rendered into the page once, never cache them
+    if 'messages' in request.COOKIES:
+        return False
+    return True
+
+
+def build_key(request):
+    # Accept matters: DRF renders JSON or the browsable API from the same URL
+    raw = f"{request.get_full_path()}|{request.META.get('HTTP_ACCEPT', '')}"
+    digest = hashlib.md5(raw.encode()).hexdigest()
+    return ENTRY_KEY.format(generation=get_generation(), digest=digest)
+
+
+def make_etag(key, last_modified):
+    digest = hashlib.md5(f'{key}|{last_modified.isoformat()}'.encode()).hexdigest()
+    return f'"{digest}"'
+
+
+def published_last_modified(request, *args, **kwargs):
+    """Last-Modified for lists of published posts."""
+    newest = Post.objects.filter(status='published').aggregate(
+        newest=Max('updated_at')
+    )['newest']
+    return newest or EPOCH
+
+
+def post_last_modified(request, slug, *args, **kwargs):
+    """Last-Modified for a single published post (None if it doesn't exist)."""
+    return Post.objects.filter(
+        slug=slug, status='published'
+    ).values_list('updated_at', flat=True).first()
+
+
+def _apply_headers(response, etag, last_modified):
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified.timestamp())
+    response['Cache-Control'] = 'public, max-age=0, must-revalidate'
+    response['Vary'] = 'Accept, Authorization, Cookie'
+    return response
+
+
+def _response_from_entry(entry):
+    response = HttpResponse(entry['content'], status=entry['status'],
+                            content_type=entry['content_type'])
+    return _apply_headers(response, entry['etag'], entry['last_modified'])
+
+
+def serve(request, render, last_modified, on_hit=None):
+    """
+    Serve `request` from the response cache.
+
+    Args:
+        render: callable returning the real (uncached) response
+        last_modified: callable returning the datetime the content was last
+            changed, or None if the object doesn't exist (nothing is cached)
+        on_hit: optional callable(request, entry) run when the cached page is
+            sent instead of running the view (not for 304s), e.g. to still
+            count a page view
+
+    Returns:
+        HttpResponse
+    """
+    if not is_cacheable_request(request):
+        return render()
+
+    key = build_key(request)
+    entry = cache.get(key)
+
+    if entry is not None:
+        not_modified = get_conditional_response(
+            request, etag=entry['etag'], last_modified=int(entry['last_modified'].timestamp())
+        )
+        if not_modified is not None:
+            return _apply_headers(not_modified, entry['etag'], entry['last_modified'])
+        if on_hit is not None:
+            on_hit(request, entry)
+        return _response_from_entry(entry)
+
+    modified = last_modified()
+    if modified is None:
+        return render()
+    # Comment and category changes bump the generation without touching updated_at
+    modified = max(modified, get_changed_at())
+
+    etag = make_etag(key, modified)
+    not_modified = get_conditional_response(
+        request, etag=etag, last_modified=int(modified.timestamp())
+    )
+    if not_modified is not None:
+        return _apply_headers(not_modified, etag, modified)
+
+    response = render()
+    if hasattr(response, 'render') and callable(response.render):
+        response = response.render()
+
+    if response.status_code == 200 and not response.cookies and not response.streaming:
+        cache.set(key, {
+            'content': response.content,
+            'status': response.status_code,
+            'content_type': response['Content-Type'],
+            'etag': etag,
+            'last_modified': modified,
+            'object_id': getattr(response, 'cache_object_id', None),
+        }, get_timeout())
+
+    return _apply_headers(response, etag, modified)
+
+
+def cache_response(last_modified, on_hit=None):
+    """
+    Decorator for function views.
+
+    Usage:
+        @cache_response(last_modified=post_last_modified)
+        def post_api(request, slug): ...
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            return serve(
+                request,
+                render=lambda: view_func(request, *args, **kwargs),
+                last_modified=lambda: last_modified(request, *args, **kwargs),
+                on_hit=on_hit,
+            )
+        return wrapper
+    return decorator
+
+
+class ResponseCacheMixin:
+    """
+    Cache the read actions of a DRF ViewSet.
+
+    Set `cached_actions` and implement `get_last_modified(request, action, **kwargs)`.
+    The check runs before DRF authentication, so cache hits cost no
+    authentication, permission or database work.
+    """
+
+    cached_actions = ('list', 'retrieve')
+
+    def get_last_modified(self, request, action, **kwargs):
+        raise NotImplementedError
+
+    def dispatch(self, request, *args, **kwargs):
+        action = self.action_map.get(request.method.lower())
+        if action not in self.cached_actions:
+            return super().dispatch(request, *args, **kwargs)
+
+        dispatch = super().dispatch
+        return serve(
+            request,
+            render=lambda: dispatch(request, *args, **kwargs),
+            last_modified=lambda: self.get_last_modified(request, action, **kwargs),
+        )
@@ -0,0 +1,244 @@
+# blog/search.py
+
+"""
+Pluggable full-text search for posts.
+Like Laravel Scout: one interface, swappable engines.
+
+BLOG_SEARCH_BACKEND picks the backend (dotted path). The default keeps an
+SQLite FTS5 table in sync with the posts (blog/signals.py), so searches
+don't scan every post body with LIKE.
+"""
+
+import re
+from collections import namedtuple
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape
+from django.utils.module_loading import import_string
+
+from .models import Post
+
+
+# One search result: post id, relevance (lower is better) and a snippet:
+# escaped HTML in which only the <mark> tags around matches are markup
+SearchHit = namedtuple('SearchHit', ['post_id', 'rank', 'snippet'])
+
+# Placeholders FTS5 puts around matches, swapped for <mark> tags after escaping
+MARK_START = '\x02'
+MARK_END = '\x03'
+
+DEFAULT_BACKEND = 'blog.search.SQLiteFTSBackend'
+
+
+def tokenize(query):
+    """Split a user query into lowercase word tokens (drops FTS operators)."""
+    return re.findall(r'\w+', query.lower())
+
+
+def highlight(text, tokens):
+    """Escape text and wrap each occurrence of a token in <mark> tags."""
+    if not tokens:
+        return escape(text)
+    pattern = re.compile('|'.join(re.escape(token) for token in tokens), re.IGNORECASE)
+    parts, position = [], 0
+    for match in pattern.finditer(text):
+        parts.append(escape(text[position:match.start()]))
+        parts.append(f'<mark>{escape(match.group())}</mark>')
+        position = match.end()
+    parts.append(escape(text[position:]))
+    return ''.join(parts)
+
+
+class BaseSearchBackend:
+    """Interface every search backend implements."""
+
+    def search(self, query, limit=20):
+        """Return a ranked list of SearchHit for published posts."""
+        raise NotImplementedError
+
+    def filter_queryset(self, queryset, query):
+        """Narrow a Post queryset to posts matching the query."""
+        raise NotImplementedError
+
+    def index_post(self, post):
+        """Add or refresh one post in the index."""
+
+    def index_posts(self, post_ids):
+        """Add or refresh many posts (e.g. after a bulk import)."""
+        for post in Post.objects.filter(pk__in=post_ids).only('id', 'title', 'content'):
+            self.index_post(post)
+
+    def remove_post(self, post_id):
+        """Drop one post from the index."""
+
+    def rebuild(self):
+        """Re-index every post. Returns the number of posts indexed."""
+        return 0
+
+
+class DatabaseSearchBackend(BaseSearchBackend):
+    """
+    Fallback backend using icontains lookups.
+    No index to maintain, but every search scans the posts table.
+    """
+
+    def index_posts(self, post_ids):
+        """Nothing to index: searches read the posts table directly."""
+
+    def _match(self, query):
+        condition = Q()
+        for token in tokenize(query):
+            condition &= Q(title__icontains=token) | Q(content__icontains=token)
+        return condition
+
+    def search(self, query, limit=20):
+        if not tokenize(query):
+            return []
+
+        posts = Post.objects.filter(
+            self._match(query), status='published'
+        ).values_list('id', 'content')[:limit]
+
+        hits = []
+        for post_id, content in posts:
+            hits.append(SearchHit(post_id, 0.0, self._snippet(content, query)))
+        return hits
+
+    def filter_queryset(self, queryset, query):
+        if not tokenize(query):
+            return queryset.none()
+        return queryset.filter(self._match(query))
+
+    def _snippet(self, content, query, width=60):
+        """Cut a short piece of text around the first match, matches marked."""
+        tokens = tokenize(query)
+        lowered = content.lower()
+        for token in tokens:
+            position = lowered.find(token)
+            if position != -1:
+                start = max(0, position - width)
+                end = position + len(token) + width
+                return highlight(content[start:end], tokens)
+        return escape(content[:width * 2])
+
+
+class SQLiteFTSBackend(BaseSearchBackend):
+    """
+    SQLite FTS5 backend.
+
+    The blog_post_fts table (migrations 0002 and 0009) stores title and
+    content per post, with rowid = Post.id. Searches take the status from
+    blog_post itself, so bulk status changes with update() can't leave
+    drafts searchable or published posts hidden.
+    """
+
+    table = 'blog_post_fts'
+
+    # bm25() column weights: a title match counts 10x a body match
+    title_weight = 10.0
+    content_weight = 1.0
+
+    def _match_expression(self, query):
+        """
+        Turn user input into a safe FTS5 MATCH expression.
+        Each token is quoted (so operators can't be injected) and
+        prefix-matched, so 'djan' finds 'django' while typing.
+        """
+        return ' '.join(f'"{token}"*' for token in tokenize(query))
+
+    def search(self, query, limit=20):
+        match = self._match_expression(query)
+        if not match:
+            return []
+
+        posts = Post._meta.db_table
+        sql = f"""
+            SELECT {self.table}.rowid,
+                   bm25({self.table}, %s, %s) AS rank,
+                   snippet({self.table}, -1, %s, %s, '...', 16)
+            FROM {self.table}
+            JOIN {posts} ON {posts}.id = {self.table}.rowid
+            WHERE {self.table} MATCH %s AND {posts}.status = 'published'
+            ORDER BY rank
+            LIMIT %s
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [self.title_weight, self.content_weight, MARK_START, MARK_END, match, limit])
+            return [
+                SearchHit(post_id, rank, self._mark(snippet))
+                for post_id, rank, snippet in cursor.fetchall()
+            ]
+
+    def _mark(self, snippet):
+        # The post body is escaped; only the placeholders become tags
+        return escape(snippet).replace(MARK_START, '<mark>').replace(MARK_END, '</mark>')
+
+    def filter_queryset(self, queryset, query):
+        match = self._match_expression(query)
+        if not match:
+            return queryset.none()
+
+        matching_ids = RawSQL(
+            f'SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s',
+            (match,)
+        )
+        return queryset.filter(pk__in=matching_ids)
+
+    def index_post(self, post):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table} WHERE rowid = %s', [post.pk])
+            cursor.execute(
+                f'INSERT INTO {self.table} (rowid, title, content) VALUES (%s, %s, %s)',
+                [post.pk, post.title, post.content]
+            )
+
+    def index_posts(self, post_ids):
+        post_ids = list(post_ids)
+        if not post_ids:
+            return
+        placeholders = ', '.join(['%s'] * len(post_ids))
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table} WHERE rowid IN ({placeholders})', post_ids)
+            cursor.execute(
+                f'INSERT INTO {self.table} (rowid, title, content) '
+                f'SELECT id, title, content FROM {Post._meta.db_table} '
+                f'WHERE id IN ({placeholders})',
+                post_ids
+            )
+
+    def remove_post(self, post_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table} WHERE rowid = %s', [post_id])
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table}')
+            cursor.execute(
+                f'INSERT INTO {self.table} (rowid, title, content) '
+                f'SELECT id, title, content FROM {Post._meta.db_table}'
+            )
+            indexed = cursor.rowcount
+            # Merge index segments so searches touch as few b-trees as possible
+            cursor.execute(f"INSERT INTO {self.table} ({self.table}) VALUES ('optimize')")
+        return indexed
+
+
+_backend = None
+
+
+def get_search_backend():
+    """
+    Return the configured backend (created once per process).
+    FTS5 only exists on SQLite, so other databases fall back to
+    DatabaseSearchBackend unless a backend is configured explicitly.
+    """
+    global _backend
+    if _backend is None:
+        path = getattr(settings, 'BLOG_SEARCH_BACKEND', DEFAULT_BACKEND)
+        if path == DEFAULT_BACKEND and connection.vendor != 'sqlite':
+            path = 'blog.search.DatabaseSearchBackend'
+        _backend = import_string(path)()
+    return _backend
@@ -8,6 +8,8 @@ They convert Django models to JSON and vice versa.
 from rest_framework import serializers
 from django.contrib.auth.models import User
 from .models import Category, Post, Comment
+from .moderation import ACTIONS as MODERATION_ACTIONS, get_max_batch
+from .profiling import ProfiledSerializerMixin
 
 # Simple Serializer (not tied to model)
 class HelloSerializer(serializers.Serializer):
@@ -18,7 +20,7 @@ class HelloSerializer(serializers.Serializer):
 
 
 # User Serializer
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(ProfiledSerializerMixin, serializers.ModelSerializer):
     """
     User serializer.
     Like Laravel: UserResource
@@ -34,11 +36,15 @@ class UserSerializer(serializers.ModelSerializer):
     
     def get_posts_count(self, obj):
         """Get number of posts by this user."""
+        # Use the queryset annotation when the view provides it (no extra query)
+        count = getattr(obj, 'published_posts_count', None)
+        if count is not None:
+            return count
         return obj.posts.filter(status='published').count()
 
 
 # Category Serializer
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(ProfiledSerializerMixin, serializers.ModelSerializer):
     """
     Category serializer.
     Like Laravel: CategoryResource
@@ -54,11 +60,15 @@ class CategorySerializer(serializers.ModelSerializer):
     
     def get_posts_count(self, obj):
         """Count posts in this category."""
+        # Use the queryset annotation when the view provides it (no extra query)
+        count = getattr(obj, 'published_posts_count', None)
+        if count is not None:
+            return count
         return obj.posts.filter(status='published').count()
 
 
 # Comment Serializer
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(ProfiledSerializerMixin, serializers.ModelSerializer):
     """
     Comment serializer.
     Like Laravel: CommentResource
@@ -95,8 +105,52 @@ class CommentSerializer(serializers.ModelSerializer):
         return value
 
 
+# Comment moderation (bulk action input)
+class CommentFilterSerializer(serializers.Serializer):
+    """Selects comments by attribute instead of by id (see blog/moderation.py)."""
+    
+    post = serializers.SlugField(required=False)
+    author_email = serializers.EmailField(required=False)
+    is_approved = serializers.BooleanField(required=False)
+    content_contains = serializers.CharField(required=False, min_length=3)
+    
+    def validate(self, data):
+        if not data:
+            raise serializers.ValidationError('Provide at least one filter')
+        return data
+
+
+class CommentModerationSerializer(serializers.Serializer):
+    """
+    Input for POST /api/comments/moderate/.
+    Like Laravel: a FormRequest for a bulk action
+    
+    Either `ids` or `filter` selects the comments.
+    """
+    
+    action = serializers.ChoiceField(choices=MODERATION_ACTIONS)
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        required=False,
+        allow_empty=False
+    )
+    filter = CommentFilterSerializer(required=False)
+    
+    def validate_ids(self, value):
+        """Drop duplicates and enforce the batch limit."""
+        ids = list(dict.fromkeys(value))
+        if len(ids) > get_max_batch():
+            raise serializers.ValidationError(f'At most {get_max_batch()} ids per request')
+        return ids
+    
+    def validate(self, data):
+        if ('ids' in data) == ('filter' in data):
+            raise serializers.ValidationError('Provide either ids or filter')
+        return data
+
+
 # Post List Serializer (minimal fields for list view)
-class PostListSerializer(serializers.ModelSerializer):
+class PostListSerializer(ProfiledSerializerMixin, serializers.ModelSerializer):
     """
     Minimal post serializer for list views.
     Like Laravel: PostCollection with minimal fields
@@ -121,7 +175,7 @@ class PostListSerializer(serializers.ModelSerializer):
 
 
 # Post Detail Serializer (all fields)
-class PostDetailSerializer(serializers.ModelSerializer):
+class PostDetailSerializer(ProfiledSerializerMixin, serializers.ModelSerializer):
     """
     Full post serializer for detail views.
     Like Laravel: new PostResource($post)
@@ -143,8 +197,8 @@ class PostDetailSerializer(serializers.ModelSerializer):
     comments_count = serializers.SerializerMethodField()
     reading_time = serializers.SerializerMethodField()
     
-    # Include recent comments
-    comments = CommentSerializer(many=True, read_only=True)
+    # Include approved comments
+    comments = serializers.SerializerMethodField()
     
     class Meta:
         model = Post
@@ -153,6 +207,8 @@ class PostDetailSerializer(serializers.ModelSerializer):
             'title',
             'slug',
             'content',
+            'content_html',
+            'toc',
             'excerpt',
             'author',
             'categories',
@@ -170,13 +226,22 @@ class PostDetailSerializer(serializers.ModelSerializer):
     
     def get_comments_count(self, obj):
         """Count approved comments."""
+        count = getattr(obj, 'approved_comments_count', None)
+        if count is not None:
+            return count
         return obj.comments.filter(is_approved=True).count()
     
+    def get_comments(self, obj):
+        """Approved comments only, newest first."""
+        # Prefetched by Post.objects.with_detail_relations()
+        comments = getattr(obj, 'approved_comments', None)
+        if comments is None:
+            comments = obj.comments.filter(is_approved=True).order_by('-created_at')
+        return CommentSerializer(comments, many=True, context=self.context).data
+    
     def get_reading_time(self, obj):
-        """Estimate reading time in minutes."""
-        words = len(obj.content.split())
-        minutes = words // 200  # Average reading speed
-        return max(1, minutes)  # Minimum 1 minute
+        """Estimate reading time in minutes (from the stored word count)."""
+        return obj.reading_time
     
     # Validation
     def validate_slug(self, value):
@@ -285,8 +350,30 @@ class PostWriteSerializer(serializers.ModelSerializer):
         return instance
 
 
+# Bulk import row (blog/bulk_io.py)
+class PostImportSerializer(serializers.Serializer):
+    """
+    One row of a post import file.
+    Like Laravel: validation rules for an Excel/CSV import row
+    
+    Checks only the row itself; slugs, authors and categories are
+    resolved against the database once per batch by blog/bulk_io.py.
+    """
+    
+    title = serializers.CharField(max_length=200)
+    slug = serializers.SlugField(max_length=50)
+    content = serializers.CharField()
+    excerpt = serializers.CharField(max_length=500, required=False, allow_blank=True, default='')
+    status = serializers.ChoiceField(choices=Post.STATUS_CHOICES, required=False, default='draft')
+    author = serializers.CharField(max_length=150, required=False)
+    categories = serializers.ListField(child=serializers.SlugField(), required=False, default=list)
+    views = serializers.IntegerField(min_value=0, required=False, default=0)
+    created_at = serializers.DateTimeField(required=False)
+    published_at = serializers.DateTimeField(required=False, allow_null=True)
+
+
 # Statistics Serializer (custom data)
-class StatsSerializer(serializers.Serializer):
+class StatsSerializer(ProfiledSerializerMixin, serializers.Serializer):
     """
     Custom serializer for statistics.
     Not tied to a model.
@@ -0,0 +1,282 @@
+# blog/signals.py
+
+"""
+Model signal handlers.
+Like Laravel model observers (PostObserver@saved, @deleted).
+
+Connected in BlogConfig.ready().
+"""
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from . import fragment_cache, related, response_cache, stats
+from .authentication import invalidate_user
+from .bulk_io import posts_imported
+from .leaderboard import leaderboard
+from .models import Category, Comment, Post
+from .moderation import APPROVE, comments_moderated
+from .notifications import BROADCAST_GROUP, notification_dispatcher, post_group, user_group
+from .rendering import posts_rerendered
+from .search import get_search_backend
+
+
+def is_pre_m2m(action):
+    """m2m_changed fires before and after each change: act on the post_* one only."""
+    return action is not None and action.startswith('pre_')
+
+
+@receiver(post_save, sender=Post)
+def index_post_on_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Keep the search index in sync with the saved post."""
+    if raw:
+        # Loading fixtures: run rebuild_search_index afterwards
+        return
+    if update_fields is not None and not {'title', 'content'} & set(update_fields):
+        # Only title and content are indexed (e.g. a views or status update)
+        return
+    get_search_backend().index_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def unindex_post_on_delete(sender, instance, **kwargs):
+    """Drop a deleted post from the search index."""
+    get_search_backend().remove_post(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Post)
+def invalidate_stats_on_post_change(sender, instance, **kwargs):
+    """A post changed: drop the site snapshot and its author's dashboard snapshot."""
+    stats.invalidate(author_id=instance.author_id)
+
+
+@receiver([post_save, post_delete], sender=Comment)
+def invalidate_stats_on_comment_change(sender, instance, **kwargs):
+    """Comment counts appear in the site snapshot only."""
+    stats.invalidate()
+
+
+@receiver([post_save, post_delete], sender=Category)
+def invalidate_stats_on_category_change(sender, instance, **kwargs):
+    stats.invalidate()
+
+
+@receiver(post_init, sender=Post)
+def remember_loaded_status(sender, instance, **kwargs):
+    """Keep the status a post was loaded with, to detect publish/unpublish on save."""
+    # __dict__ lookup: never triggers a query if status was deferred
+    instance._loaded_status = instance.__dict__.get('status')
+
+
+@receiver(pre_save, sender=Post)
+def remember_status_before_save(sender, instance, **kwargs):
+    """
+    Freeze the status this save starts from, and make the new one the
+    baseline for the next save. pre_save runs before every post_save
+    receiver, so they don't depend on the order they are connected in.
+    """
+    instance._status_before_save = instance._loaded_status
+    instance._loaded_status = instance.__dict__.get('status')
+
+
+@receiver(post_save, sender=Post)
+def refresh_related_on_status_change(sender, instance, created, raw=False, **kwargs):
+    """Publishing or unpublishing a post changes which lists it belongs in."""
+    if raw:
+        return
+    if created or instance.status != instance._status_before_save:
+        related.refresh_around(instance)
+
+
+@receiver(m2m_changed, sender=Post.categories.through)
+def refresh_related_on_categories_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """Categories drive the score, so refresh when they change."""
+    if reverse and action == 'pre_clear':
+        # post_clear comes with pk_set=None: remember who is losing the category
+        instance._related_cleared = list(instance.posts.values_list('pk', flat=True))
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if reverse and action == 'post_clear':
+        # Only the lists of posts that had the category can change
+        related.refresh_ids(getattr(instance, '_related_cleared', ()))
+    elif reverse:
+        # category.posts.add(...): instance is the Category, pk_set holds post ids
+        posts = Post.objects.filter(pk__in=pk_set or []).only(*related.SCORING_FIELDS)
+        for post in posts:
+            related.refresh_around(post)
+    else:
+        related.refresh_around(instance)
+
+
+@receiver(pre_delete, sender=Post)
+def collect_related_neighbours(sender, instance, **kwargs):
+    """Remember which lists include the post; the cascade is about to empty their slot."""
+    instance._related_neighbours = related.listing_posts(instance)
+
+
+@receiver(post_delete, sender=Post)
+def refresh_related_after_delete(sender, instance, **kwargs):
+    related.refresh_ids(getattr(instance, '_related_neighbours', ()))
+
+
+@receiver(pre_delete, sender=Category)
+def collect_category_posts(sender, instance, **kwargs):
+    """The cascade drops the category's links without m2m_changed: remember its posts."""
+    instance._related_posts = list(instance.posts.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Category)
+def refresh_related_after_category_delete(sender, instance, **kwargs):
+    related.refresh_ids(getattr(instance, '_related_posts', ()))
+
+
+@receiver([post_save, post_delete], sender=Post)
+@receiver([post_save, post_delete], sender=Comment)
+@receiver([post_save, post_delete], sender=Category)
+@receiver(m2m_changed, sender=Post.categories.through)
+def invalidate_response_cache(sender, action=None, **kwargs):
+    """Any content change starts a new response cache generation."""
+    if is_pre_m2m(action):
+        return
+    response_cache.bump_generation()
+
+
+@receiver([post_save, post_delete], sender=Post)
+@receiver(m2m_changed, sender=Post.categories.through)
+def invalidate_post_fragments(sender, instance, action=None, **kwargs):
+    """Post cards show title, excerpt, author, date and categories."""
+    if is_pre_m2m(action):
+        return
+    fragment_cache.bump(fragment_cache.POST_CARDS)
+    if isinstance(instance, Post):
+        fragment_cache.bump(fragment_cache.POST_BODY, instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Category)
+def invalidate_category_fragments(sender, **kwargs):
+    """Category names appear in the category lists and on every post card."""
+    fragment_cache.bump(fragment_cache.CATEGORIES)
+    fragment_cache.bump(fragment_cache.POST_CARDS)
+
+
+@receiver([post_save, post_delete], sender=Post)
+@receiver(m2m_changed, sender=Post.categories.through)
+@receiver([post_save, post_delete], sender=Category)
+@receiver(posts_imported)
+def invalidate_leaderboard(sender, action=None, **kwargs):
+    """Title, status, categories or views changed outside the view counter: reload the boards."""
+    if is_pre_m2m(action):
+        return
+    leaderboard.invalidate()
+
+
+@receiver(comments_moderated)
+def invalidate_after_moderation(sender, **kwargs):
+    """One batch of approvals/deletions: invalidate once, not per comment."""
+    stats.invalidate()
+    response_cache.bump_generation()
+
+
+# Notifications (blog/notifications.py). Queued on commit, so a rolled back
+# save notifies nobody; notify() only records them, sending happens later
+# in the background.
+
+@receiver(post_init, sender=Comment)
+def remember_loaded_approval(sender, instance, **kwargs):
+    instance._loaded_approved = instance.__dict__.get('is_approved')
+
+
+@receiver(pre_save, sender=Comment)
+def remember_approval_before_save(sender, instance, **kwargs):
+    """Like remember_status_before_save(), for comment approval."""
+    instance._approved_before_save = instance._loaded_approved
+    instance._loaded_approved = instance.__dict__.get('is_approved')
+
+
+@receiver(post_save, sender=Post)
+def notify_post_published(sender, instance, created, raw=False, **kwargs):
+    """Everyone connected hears about a newly published post."""
+    if raw or instance.status != 'published':
+        return
+    if not created and instance._status_before_save == 'published':
+        return
+    transaction.on_commit(lambda: notification_dispatcher.notify(
+        BROADCAST_GROUP, ('post_published', instance.pk),
+        title='New post published', message=instance.title,
+        post_id=instance.pk, slug=instance.slug,
+    ))
+
+
+@receiver(post_save, sender=Comment)
+def notify_comment_saved(sender, instance, created, raw=False, **kwargs):
+    """
+    A new comment waiting for approval notifies the post's author;
+    an approved comment notifies the readers following the post.
+    """
+    if raw:
+        return
+    if created and not instance.is_approved:
+        # Views creating comments already hold the post: no query
+        post = instance.post
+        group, key = user_group(post.author_id), ('comment_pending', post.pk)
+        title, message = 'Comment awaiting approval', post.title
+    elif instance.is_approved and (created or not instance._approved_before_save):
+        group, key = post_group(instance.post_id), ('comment_approved', instance.post_id)
+        title, message = 'New comment', 'New comment on a post you follow'
+    else:
+        return
+    transaction.on_commit(lambda: notification_dispatcher.notify(
+        group, key, title=title, message=message, post_id=instance.post_id,
+    ))
+
+
+@receiver(comments_moderated)
+def notify_after_moderation(sender, action, post_counts=None, **kwargs):
+    """Bulk approvals: one notification per post, counting its new comments."""
+    if action != APPROVE or not post_counts:
+        return
+
+    def notify():
+        for post_id, count in post_counts.items():
+            notification_dispatcher.notify(
+                post_group(post_id), ('comment_approved', post_id),
+                title='New comment', message='New comment on a post you follow',
+                count=count, post_id=post_id,
+            )
+    transaction.on_commit(notify)
+
+
+@receiver([post_save, post_delete], sender=get_user_model())
+def invalidate_cached_user(sender, instance, update_fields=None, **kwargs):
+    """Profile, password or is_active changed: drop the user cached by CachedJWTAuthentication."""
+    if update_fields is not None and set(update_fields) == {'last_login'}:
+        return
+    invalidate_user(instance.pk)
+
+
+@receiver(posts_imported)
+def sync_after_import(sender, post_ids, author_ids, refresh_related=True, **kwargs):
+    """bulk_create() sent no post_save: do the post_save work once for the batch."""
+    get_search_backend().index_posts(post_ids)
+
+    for author_id in author_ids:
+        stats.invalidate(author_id=author_id)
+    response_cache.bump_generation()
+    fragment_cache.bump(fragment_cache.POST_CARDS)
+
+    if refresh_related:
+        posts = Post.objects.filter(
+            pk__in=post_ids, status='published'
+        ).only(*related.SCORING_FIELDS)
+        for post in posts:
+            related.refresh_around(post)
+
+
+@receiver(posts_rerendered)
+def invalidate_after_rerender(sender, post_ids, **kwargs):
+    """New summaries and bodies (post_body fragments vary by renderer_version)."""
+    response_cache.bump_generation()
+    fragment_cache.bump(fragment_cache.POST_CARDS)
@@ -0,0 +1,123 @@
+# blog/stats.py
+
+"""
+Cached statistics snapshots.
+Like Laravel: Cache::remember('stats', $ttl, fn () => ...)
+
+Counters come from one grouped query and are cached for
+BLOG_STATS_CACHE_TIMEOUT seconds; blog/signals.py drops the snapshots a
+change affects. total_views may lag by the timeout (view counts are
+written with update(), which sends no signals).
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, F, Func, IntegerField, Subquery, Sum
+
+from .leaderboard import leaderboard
+from .models import Category, Comment, Post
+from .serializers import PostListSerializer, StatsSerializer
+
+
+SITE_STATS_KEY = 'blog:stats:site'
+AUTHOR_STATS_KEY = 'blog:stats:author:{}'
+
+
+def get_timeout():
+    return getattr(settings, 'BLOG_STATS_CACHE_TIMEOUT', 60)
+
+
+def scalar_count(queryset):
+    """COUNT(*) of a queryset as a subquery expression."""
+    return Subquery(
+        queryset.order_by().annotate(total=Func(F('pk'), function='COUNT')).values('total'),
+        output_field=IntegerField(),
+    )
+
+
+def count_posts(queryset, **counts):
+    """
+    Post counters for a queryset in one grouped query.
+
+    Args:
+        counts: name -> queryset, counted in the same query
+
+    Returns:
+        dict with total, published, draft, views and the `counts` names
+    """
+    counters = {'total': 0, 'published': 0, 'draft': 0, 'views': 0}
+    rows = list(queryset.order_by().values('status').annotate(
+        count=Count('id'),
+        views=Sum('views'),
+        **{name: scalar_count(counted) for name, counted in counts.items()},
+    ))
+    for row in rows:
+        counters[row['status']] = row['count']
+        counters['total'] += row['count']
+        counters['views'] += row['views'] or 0
+    for name, counted in counts.items():
+        # Without posts there is no row to carry the subqueries
+        counters[name] = rows[0][name] if rows else counted.count()
+    return counters
+
+
+def build_site_stats():
+    """Compute the /api/stats/ payload (uncached)."""
+    posts = count_posts(
+        Post.objects.all(),
+        categories=Category.objects.all(),
+        comments=Comment.objects.filter(is_approved=True),
+    )
+    published = Post.objects.filter(status='published')
+
+    most_viewed = [
+        {'title': entry['title'], 'views': entry['views']} for entry in leaderboard.top(limit=1)
+    ]
+    recent_posts = published.select_related('author').prefetch_related(
+        'categories'
+    ).for_list().order_by('-created_at')[:5]
+
+    data = {
+        'total_posts': posts['total'],
+        'total_published': posts['published'],
+        'total_drafts': posts['draft'],
+        'total_categories': posts['categories'],
+        'total_comments': posts['comments'],
+        'total_views': posts['views'],
+        'most_viewed_post': most_viewed[0] if most_viewed else {'title': None, 'views': 0},
+        'recent_posts': PostListSerializer(recent_posts, many=True).data,
+    }
+    return StatsSerializer(data).data
+
+
+def get_site_stats():
+    """Site-wide statistics, served from cache when fresh."""
+    data = cache.get(SITE_STATS_KEY)
+    if data is None:
+        data = build_site_stats()
+        cache.set(SITE_STATS_KEY, data, get_timeout())
+    return data
+
+
+def get_author_stats(user):
+    """Dashboard counters for one author, served from cache when fresh."""
+    key = AUTHOR_STATS_KEY.format(user.pk)
+    data = cache.get(key)
+    if data is None:
+        posts = count_posts(Post.objects.filter(author=user))
+        data = {
+            'total_posts': posts['total'],
+            'published_posts': posts['published'],
+            'draft_posts': posts['draft'],
+            'total_views': posts['views'],
+        }
+        cache.set(key, data, get_timeout())
+    return data
+
+
+def invalidate(author_id=None):
+    """Drop the site snapshot and, if given, one author's snapshot."""
+    keys = [SITE_STATS_KEY]
+    if author_id is not None:
+        keys.append(AUTHOR_STATS_KEY.format(author_id))
+    cache.delete_many(keys)
@@ -0,0 +1,56 @@
+# blog/templatetags/blog_fragments.py
+
+"""
+{% fragment %} - cache part of a template (blog/fragment_cache.py).
+Like Laravel's @cache directive (spatie/laravel-blade-cache-directive).
+
+    {% load blog_fragments %}
+    {% fragment 'post_body' post.pk %}{{ post.content|linebreaks }}{% endfragment %}
+
+The first argument names the fragment, the rest are the values its content
+varies by. Tags inside a fragment run only when it misses, so queries a
+fragment needs belong in tags like {% site_counts %}, not in the view.
+"""
+
+from django import template
+from django.utils.safestring import mark_safe
+
+from ..fragment_cache import get_or_render
+from ..models import Category, Post
+
+register = template.Library()
+
+
+class FragmentNode(template.Node):
+    def __init__(self, nodelist, name, vary):
+        self.nodelist = nodelist
+        self.name = name
+        self.vary = vary
+
+    def render(self, context):
+        name = self.name.resolve(context)
+        vary = [value.resolve(context) for value in self.vary]
+        return mark_safe(get_or_render(name, vary, lambda: self.nodelist.render(context)))
+
+
+@register.tag
+def fragment(parser, token):
+    bits = token.split_contents()
+    if len(bits) < 2:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' tag requires a fragment name")
+    nodelist = parser.parse(('endfragment',))
+    parser.delete_first_token()
+    return FragmentNode(
+        nodelist,
+        parser.compile_filter(bits[1]),
+        [parser.compile_filter(bit) for bit in bits[2:]],
+    )
+
+
+@register.simple_tag
+def site_counts():
+    """Published post and category counts: {% site_counts as counts %}{{ counts.posts }}"""
+    return {
+        'posts': Post.objects.filter(status='published').count(),
+        'categories': Category.objects.count(),
+    }
@@ -1,3 +1,1694 @@
-from django.test import TestCase
+import asyncio
+import json
+import re
+import threading
+import unittest
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils.http import parse_http_date
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from . import api_views, views
+from .api_views import PostViewSet
+from .models import Category, Comment, Post
+
+
+class MaxQueriesMixin:
+    """
+    Query budget assertions for endpoints.
+    Like Django's assertNumQueries, but fails only when the budget is exceeded.
+
+    Usage:
+        with self.assertMaxQueries(3):
+            self.client.get('/api/categories/')
+    """
+
+    def assertMaxQueries(self, limit):
+        return _AssertMaxQueriesContext(self, limit)
+
+
+class _AssertMaxQueriesContext(CaptureQueriesContext):
+    def __init__(self, test_case, limit):
+        self.test_case = test_case
+        self.limit = limit
+        super().__init__(connection)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        super().__exit__(exc_type, exc_value, traceback)
+        if exc_type is not None:
+            return
+        executed = len(self)
+        queries = '\n'.join(
+            f'{i}. {query["sql"]}' for i, query in enumerate(self.captured_queries, start=1)
+        )
+        self.test_case.assertLessEqual(
+            executed, self.limit,
+            f'{executed} queries executed, at most {self.limit} expected\n'
+            f'Captured queries were:\n{queries}'
+        )
+
+
+class QueryBudgetTests(MaxQueriesMixin, TestCase):
+    """Endpoints must not run one query per object (N+1)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('author', 'author@example.com', 'password123')
+        categories = [
+            Category.objects.create(name=f'Category {i}', slug=f'category-{i}')
+            for i in range(20)
+        ]
+        cls.post = Post.objects.create(
+            title='Query budgets', slug='query-budgets', content='Counting queries. ' * 20,
+            author=cls.user, status='published'
+        )
+        cls.post.categories.set(categories)
+        # A second post in one category, so per-category counts differ
+        other = Post.objects.create(
+            title='Another post', slug='another-post', content='More content here.',
+            author=cls.user, status='published'
+        )
+        other.categories.add(categories[0])
+        for i in range(10):
+            Comment.objects.create(
+                post=cls.post, author_name=f'Reader {i}', author_email='reader@example.com',
+                content='A thoughtful comment.', is_approved=i % 2 == 0
+            )
+
+    def setUp(self):
+        # Cached responses would hide the queries being counted
+        cache.clear()
+
+    def test_category_list(self):
+        with self.assertMaxQueries(2):  # COUNT for pagination + one annotated SELECT
+            response = self.client.get('/api/categories/', HTTP_ACCEPT='application/json')
+        self.assertEqual(response.status_code, 200)
+        counts = {c['slug']: c['posts_count'] for c in response.json()['results']}
+        self.assertEqual(counts['category-0'], 2)
+        self.assertEqual(counts['category-1'], 1)
+
+    def test_post_retrieve(self):
+        request = APIRequestFactory().get(f'/api/posts/{self.post.slug}/')
+        view = PostViewSet.as_view({'get': 'retrieve'})
+        # Last-Modified lookup (response cache), post, author, categories, comments
+        with self.assertMaxQueries(5):
+            response = view(request, slug=self.post.slug)
+            data = response.data
+        self.assertEqual(data['comments_count'], 5)
+        self.assertEqual(len(data['comments']), 5)
+        self.assertEqual(data['author']['posts_count'], 2)
+        counts = {c['slug']: c['posts_count'] for c in data['categories']}
+        self.assertEqual(len(counts), 20)
+        self.assertEqual(counts['category-0'], 2)
+
+    def test_stats_counters_in_one_query(self):
+        from .stats import count_posts
+
+        with self.assertNumQueries(1):
+            counters = count_posts(
+                Post.objects.all(),
+                categories=Category.objects.all(),
+                comments=Comment.objects.filter(is_approved=True),
+            )
+        self.assertEqual(
+            counters,
+            {'total': 2, 'published': 2, 'draft': 0, 'views': 0, 'categories': 20, 'comments': 5},
+        )
+
+    def test_profile(self):
+        self.client.force_login(self.user)
+        with self.assertMaxQueries(3):  # session, user, annotated profile
+            response = self.client.get('/api/auth/profile/', HTTP_ACCEPT='application/json')
+        self.assertEqual(response.json()['posts_count'], 2)
+
+
+class ResponseCacheTests(TestCase):
+    """Anonymous post pages are served from cache and revalidated with 304s."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('author', 'author@example.com', 'password123')
+        cls.post = Post.objects.create(
+            title='Cached', slug='cached', content='Cached content.', author=cls.user, status='published'
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_comment_approval_changes_last_modified(self):
+        first = self.client.get('/api/posts/cached/')
+        comment = Comment.objects.create(
+            post=self.post, author_name='Reader', author_email='reader@example.com', content='Hi'
+        )
+        comment.is_approved = True
+        comment.save()
+
+        # updated_at didn't change, but the page did
+        response = self.client.get('/api/posts/cached/', HTTP_IF_MODIFIED_SINCE=first['Last-Modified'])
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(
+            parse_http_date(response['Last-Modified']), parse_http_date(first['Last-Modified'])
+        )
+
+    def test_revalidation_counts_no_view(self):
+        from .view_counter import view_counter
+
+        view_counter.flush()
+        first = self.client.get('/posts/cached/')
+        self.client.get('/posts/cached/')  # Cache hit
+        self.client.get('/posts/cached/', HTTP_IF_NONE_MATCH=first['ETag'])  # 304
+        self.assertEqual(view_counter.pending_for(self.post.pk), 2)
+        view_counter.flush()
+
+    def test_cached_page_leaves_out_view_count(self):
+        self.assertNotContains(self.client.get('/posts/cached/'), ' views')
+        self.client.force_login(self.user)
+        self.assertContains(self.client.get('/posts/cached/'), ' views')
+
+    def test_categories_set_bumps_generation_once(self):
+        from .response_cache import get_generation
+
+        category = Category.objects.create(name='Django', slug='django')
+        generation = get_generation()
+        self.post.categories.set([category])
+        self.assertEqual(get_generation(), generation + 1)
+
+
+class ViewCounterTests(SimpleTestCase):
+    """Buffered views are flushed on a timer, not only by the next request."""
+
+    @override_settings(BLOG_VIEW_COUNTER={'FLUSH_THRESHOLD': 100, 'FLUSH_INTERVAL': 0.01})
+    def test_background_thread_flushes(self):
+        from .view_counter import ViewCounter
+
+        counter = ViewCounter()
+        flushed = threading.Event()
+        with mock.patch.object(counter, 'flush', side_effect=lambda: flushed.set()):
+            counter.record(1)
+            counter.start()
+            try:
+                self.assertTrue(flushed.wait(2))
+            finally:
+                counter.stop()
+
+@unittest.skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN is SQLite syntax')
+class QueryPlanTests(TestCase):
+    """
+    Every query the blog views run must use an index.
+
+    Each test runs a view, captures its SELECTs, runs EXPLAIN QUERY PLAN on
+    them and fails on a full table scan of a blog table. Walking an index
+    (ordered LIMIT reads, or index-only passes like COUNT per status) is allowed.
+    """
+
+    # Small lookup tables the sidebar/filters read in full on purpose
+    FULL_SCAN_ALLOWED = {'blog_category'}
+
+    SCAN_PATTERN = re.compile(r'^SCAN (\w+)( USING (?:COVERING )?INDEX)?')
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('planner', 'planner@example.com', 'password123', is_staff=True)
+        categories = [Category.objects.create(name=f'Topic {i}', slug=f'topic-{i}') for i in range(5)]
+        for i in range(60):
+            post = Post.objects.create(
+                title=f'Django post {i}', slug=f'post-{i}', content='Indexes and query plans. ' * 5,
+                author=cls.user, status='draft' if i % 3 == 0 else 'published'
+            )
+            post.categories.set(categories[i % 5:i % 5 + 2])
+            Comment.objects.create(
+                post=post, author_name='Reader', author_email='reader@example.com',
+                content='Useful, thanks!', is_approved=i % 2 == 0
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.factory = APIRequestFactory()
+
+    def full_scans(self, sql):
+        """Tables the plan for `sql` reads in full."""
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            details = [row[3] for row in cursor.fetchall()]
+
+        scans = []
+        for detail in details:
+            match = self.SCAN_PATTERN.match(detail)
+            if match is None or match.group(2):
+                continue
+            table = match.group(1)
+            if table.startswith('blog_') and table not in self.FULL_SCAN_ALLOWED:
+                scans.append(detail)
+        return scans
+
+    def assertNoFullScans(self, run):
+        """Run a view (or evaluate a queryset) and check every SELECT it issued."""
+        # A response cache hit would run no queries at all
+        cache.clear()
+        with CaptureQueriesContext(connection) as captured:
+            run()
+
+        selects = [q['sql'] for q in captured.captured_queries if q['sql'].startswith('SELECT')]
+        self.assertTrue(selects, 'No queries were captured')
+        for sql in selects:
+            scans = self.full_scans(sql)
+            self.assertFalse(scans, f'Full scan {scans} in:\n{sql}')
+
+    def api_get(self, viewset, action, authenticated=False, **kwargs):
+        request = self.factory.get('/', kwargs.pop('params', {}))
+        if authenticated:
+            force_authenticate(request, self.user)
+        return viewset.as_view({'get': action})(request, **kwargs)
+
+    # blog/views.py
+
+    def test_home(self):
+        self.assertNoFullScans(lambda: self.client.get('/'))
+
+    def test_post_list(self):
+        self.assertNoFullScans(lambda: self.client.get('/posts/'))
+        self.assertNoFullScans(lambda: self.client.get('/posts/?category=topic-1'))
+
+    def test_post_detail(self):
+        self.assertNoFullScans(lambda: self.client.get('/posts/post-1/'))
+
+    def test_category_posts(self):
+        self.assertNoFullScans(lambda: self.client.get('/category/topic-1/'))
+
+    def test_post_api(self):
+        self.assertNoFullScans(lambda: self.client.get('/api/posts/post-2/'))
+
+    def test_class_based_views(self):
+        self.assertNoFullScans(lambda: list(views.PostListView().get_queryset()[:10]))
+        self.assertNoFullScans(lambda: views.PostDetailView().get_queryset().get(slug='post-1'))
+
+    # blog/api_views.py
+
+    def test_api_post_list(self):
+        self.assertNoFullScans(lambda: self.api_get(PostViewSet, 'list'))
+        self.assertNoFullScans(lambda: self.api_get(PostViewSet, 'list', params={'category': 'topic-1'}))
+        self.assertNoFullScans(lambda: self.api_get(PostViewSet, 'list', authenticated=True))
+
+    def test_api_post_retrieve(self):
+        self.assertNoFullScans(lambda: self.api_get(PostViewSet, 'retrieve', slug='post-1'))
+
+    def test_api_my_posts_and_drafts(self):
+        self.assertNoFullScans(lambda: self.api_get(PostViewSet, 'my_posts', authenticated=True))
+        self.assertNoFullScans(lambda: self.api_get(PostViewSet, 'drafts', authenticated=True))
+
+    def test_api_post_comments(self):
+        self.assertNoFullScans(lambda: self.api_get(PostViewSet, 'comments', slug='post-2'))
+
+    def test_api_popular(self):
+        self.assertNoFullScans(lambda: self.api_get(PostViewSet, 'popular'))
+
+    def test_api_comment_list(self):
+        self.assertNoFullScans(lambda: self.api_get(api_views.CommentViewSet, 'list'))
+
+    def test_api_stats(self):
+        self.assertNoFullScans(lambda: api_views.StatsAPIView.as_view()(self.factory.get('/')))
+
+    def test_api_search(self):
+        self.assertNoFullScans(lambda: api_views.search_api(self.factory.get('/', {'q': 'django'})))
+
+    # blog/dashboard_views.py
+
+    def test_dashboard(self):
+        self.client.force_login(self.user)
+        self.assertNoFullScans(lambda: self.client.get('/dashboard/'))
+        self.assertNoFullScans(lambda: self.client.get('/dashboard/posts/'))
+        self.assertNoFullScans(lambda: self.client.get('/dashboard/posts/?status=draft'))
+        self.assertNoFullScans(lambda: self.client.get('/dashboard/comments/'))
+
+
+class PostListLoadingTests(TestCase):
+    """List pages leave out post bodies; reading time comes from a stored count."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('reader', 'reader@example.com', 'password123')
+        cls.post = Post.objects.create(
+            title='Long read', slug='long-read', content='word ' * 450,
+            author=cls.user, status='published'
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_word_count_saved_with_content(self):
+        self.assertEqual(self.post.word_count, 450)
+        self.assertEqual(self.post.reading_time, 2)
+
+        self.post.content = 'short'
+        self.post.save(update_fields=['content'])
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.word_count, 1)
+        self.assertEqual(self.post.reading_time, 1)
+
+    def test_deferred_save_keeps_word_count(self):
+        post = Post.objects.for_list().get(pk=self.post.pk)
+        post.title = 'Renamed'
+        post.save()
+        post.refresh_from_db()
+        self.assertEqual(post.word_count, 450)
+
+    def test_list_queries_skip_content(self):
+        content_column = '"blog_post"."content"'
+        with CaptureQueriesContext(connection) as captured:
+            self.client.get('/')
+            self.client.get('/posts/')
+            PostViewSet.as_view({'get': 'list'})(APIRequestFactory().get('/'))
+
+        selects = [q['sql'] for q in captured.captured_queries if 'FROM "blog_post"' in q['sql']]
+        self.assertTrue(selects)
+        for sql in selects:
+            self.assertNotIn(content_column, sql)
+
+
+class CommentModerationTests(MaxQueriesMixin, TestCase):
+    """POST /api/comments/moderate/ handles a whole batch in a fixed number of queries."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('author', 'author@example.com', 'password123')
+        cls.other = User.objects.create_user('other', 'other@example.com', 'password123')
+        post = Post.objects.create(
+            title='Moderated', slug='moderated', content='Body text for moderation.',
+            author=cls.author, status='published'
+        )
+        other_post = Post.objects.create(
+            title='Not mine', slug='not-mine', content='Someone else wrote this.',
+            author=cls.other, status='published'
+        )
+        cls.spam = [
+            Comment.objects.create(
+                post=post, author_name='Spammer', author_email='spam@example.com',
+                content=f'Buy things now {i}'
+            )
+            for i in range(30)
+        ]
+        cls.approved = Comment.objects.create(
+            post=post, author_name='Reader', author_email='reader@example.com',
+            content='Already approved', is_approved=True
+        )
+        cls.foreign = Comment.objects.create(
+            post=other_post, author_name='Reader', author_email='reader@example.com',
+            content='On another post'
+        )
+
+    def moderate(self, payload, user=None):
+        request = APIRequestFactory().post('/', payload, format='json')
+        force_authenticate(request, user or self.author)
+        return api_views.CommentViewSet.as_view({'post': 'moderate'})(request)
+
+    def test_approve_by_ids(self):
+        ids = [c.pk for c in self.spam] + [self.approved.pk, self.foreign.pk, 999999]
+        with self.assertMaxQueries(4):
+            response = self.moderate({'action': 'approve', 'ids': ids})
+
+        self.assertEqual(response.status_code, 200)
+        results = response.data['results']
+        self.assertEqual(results[self.spam[0].pk], 'approved')
+        self.assertEqual(results[self.approved.pk], 'unchanged')
+        # Comments on other authors' posts are out of reach
+        self.assertEqual(results[self.foreign.pk], 'not_found')
+        self.assertEqual(results[999999], 'not_found')
+        self.assertEqual(response.data['summary'], {'approved': 30, 'unchanged': 1, 'not_found': 2})
+        self.assertEqual(Comment.objects.filter(is_approved=True).count(), 31)
+        self.assertFalse(Comment.objects.get(pk=self.foreign.pk).is_approved)
+
+    def test_delete_by_filter(self):
+        # Savepoint, matching ids, the comments for post_delete, one DELETE, release
+        with self.assertMaxQueries(5):
+            response = self.moderate({'action': 'delete', 'filter': {'author_email': 'spam@example.com'}})
+
+        self.assertEqual(response.data['summary'], {'deleted': 30})
+        self.assertFalse(Comment.objects.filter(author_email='spam@example.com').exists())
+        self.assertTrue(Comment.objects.filter(pk=self.approved.pk).exists())
+
+    def test_sends_one_signal_per_batch(self):
+        from .moderation import comments_moderated
+
+        received = []
+        handler = lambda sender, **kwargs: received.append(kwargs)
+        comments_moderated.connect(handler)
+        try:
+            self.moderate({'action': 'reject', 'ids': [self.approved.pk]})
+        finally:
+            comments_moderated.disconnect(handler)
+
+        self.assertEqual(len(received), 1)
+        self.assertEqual(received[0]['comment_ids'], [self.approved.pk])
+
+    def test_batch_limit(self):
+        with self.settings(BLOG_MODERATION_MAX_BATCH=10):
+            response = self.moderate({'action': 'approve', 'ids': list(range(1, 12))})
+            self.assertEqual(response.status_code, 400)
+
+            response = self.moderate({'action': 'approve', 'filter': {'is_approved': False}})
+            self.assertEqual(response.status_code, 400)
+        self.assertFalse(Comment.objects.get(pk=self.spam[0].pk).is_approved)
+
+    def test_requires_ids_or_filter(self):
+        self.assertEqual(self.moderate({'action': 'approve'}).status_code, 400)
+
+    def test_admin_approval_sends_signal(self):
+        from .moderation import comments_moderated
+
+        admin_user = User.objects.create_superuser('admin', 'admin@example.com', 'pw')
+        self.client.force_login(admin_user)
+        received = []
+        handler = lambda sender, **kwargs: received.append(kwargs['comment_ids'])
+        comments_moderated.connect(handler)
+        try:
+            self.client.post('/admin/blog/comment/', {
+                'action': 'approve_comments', '_selected_action': [self.spam[0].pk, self.approved.pk],
+            })
+        finally:
+            comments_moderated.disconnect(handler)
+        self.assertEqual(received, [[self.spam[0].pk]])
+
+    def test_admin_status_action_refreshes_stats(self):
+        from .stats import get_site_stats
+
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'pw'))
+        drafts = get_site_stats()['total_drafts']
+        post = Post.objects.get(slug='moderated')
+        self.client.post('/admin/blog/post/', {'action': 'make_draft', '_selected_action': [post.pk]})
+        self.assertEqual(get_site_stats()['total_drafts'], drafts + 1)
+
+
+class BulkImportExportTests(MaxQueriesMixin, TestCase):
+    """Posts go in and out in batches with a fixed number of queries per batch."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('importer', 'importer@example.com', 'password123', is_staff=True)
+        Category.objects.create(name='Django', slug='django')
+        Category.objects.create(name='Python', slug='python')
+
+    def setUp(self):
+        cache.clear()
+        self.factory = APIRequestFactory()
+
+    def import_body(self, body, content_type):
+        request = self.factory.post('/', body, content_type=content_type)
+        force_authenticate(request, self.user)
+        return api_views.import_posts_api(request)
+
+    def test_ndjson_import(self):
+        rows = [
+            {'title': f'Imported {i}', 'slug': f'imported-{i}', 'content': 'Archived body text',
+             'status': 'published', 'categories': ['django', 'python']}
+            for i in range(50)
+        ]
+        rows.append({'title': 'Broken', 'slug': 'imported-0', 'content': 'Duplicate slug'})
+        rows.append({'title': 'No category', 'slug': 'orphan', 'content': 'Body', 'categories': ['nope']})
+        body = '\n'.join(json.dumps(row) for row in rows) + '\n{not json\n'
+
+        with self.settings(BLOG_IMPORT_BATCH_SIZE=25):
+            response = self.import_body(body, 'application/x-ndjson')
+
+        self.assertEqual(response.data['created'], 50)
+        self.assertEqual(response.data['failed'], 3)
+        self.assertEqual(sorted(error['line'] for error in response.data['errors']), [51, 52, 53])
+
+        post = Post.objects.get(slug='imported-7')
+        self.assertEqual(post.author, self.user)
+        self.assertEqual(post.word_count, 3)
+        self.assertEqual(post.categories.count(), 2)
+        # posts_imported kept the search index in sync
+        self.assertEqual(
+            api_views.search_api(self.factory.get('/', {'q': 'archived'})).data['count'], 20
+        )
+
+    def test_csv_round_trip(self):
+        body = (
+            'title,slug,content,status,categories,created_at\n'
+            'First,first,Hello world,published,django|python,2020-01-02T03:04:05Z\n'
+            'Second,second,Another body,draft,,\n'
+        )
+        response = self.import_body(body, 'text/csv')
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual(Post.objects.get(slug='first').created_at.year, 2020)
+
+        request = self.factory.get('/', {'type': 'csv'})
+        force_authenticate(request, self.user)
+        response = api_views.export_posts_api(request)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+
+        self.assertEqual(lines[0], 'title,slug,content,excerpt,status,author,categories,views,created_at,published_at')
+        self.assertEqual(len(lines), 3)
+        self.assertIn('django|python', lines[1])
+
+    def test_non_staff_import_keeps_no_views_or_dates(self):
+        writer = User.objects.create_user('writer', password='pass')
+        row = {'title': 'Boosted', 'slug': 'boosted', 'content': 'Body', 'status': 'published',
+               'author': 'importer', 'views': 99999, 'created_at': '2001-01-01T00:00:00Z',
+               'published_at': '2001-01-01T00:00:00Z'}
+        request = self.factory.post('/', json.dumps(row), content_type='application/x-ndjson')
+        force_authenticate(request, writer)
+        self.assertEqual(api_views.import_posts_api(request).data['created'], 1)
+
+        post = Post.objects.get(slug='boosted')
+        self.assertEqual((post.author, post.views), (writer, 0))
+        self.assertEqual(post.created_at.date(), post.published_at.date())
+        self.assertGreater(post.published_at.year, 2001)
+
+    def test_oversized_upload_is_rejected(self):
+        body = '\n'.join(
+            json.dumps({'title': f'Post {i}', 'slug': f'post-{i}', 'content': 'Body'}) for i in range(5)
+        )
+        with self.settings(BLOG_IMPORT_MAX_ROWS=4, BLOG_IMPORT_BATCH_SIZE=2):
+            self.assertEqual(self.import_body(body, 'application/x-ndjson').status_code, 413)
+        # The batches read before the limit were rolled back
+        self.assertFalse(Post.objects.exists())
+
+        with self.settings(BLOG_IMPORT_MAX_BYTES=100):
+            self.assertEqual(self.import_body(body, 'application/x-ndjson').status_code, 413)
+
+    def test_import_queries_per_batch(self):
+        body = '\n'.join(
+            json.dumps({'title': f'Post {i}', 'slug': f'post-{i}', 'content': 'Body',
+                        'categories': ['django']})
+            for i in range(200)
+        )
+        from .bulk_io import import_posts, read_rows
+        # Drafts: no related-posts work, only the batch queries and the search index
+        # (the 200 rows need 4 INSERTs under SQLite's 999 parameter limit)
+        with self.assertMaxQueries(12):
+            report = import_posts(read_rows(body.splitlines(), 'ndjson'), default_author=self.user)
+        self.assertEqual(report.created, 200)
+
+
+class LocalChannelLayerTests(SimpleTestCase):
+    """Group messages are shared, not copied, and bursts are coalesced."""
+
+    def setUp(self):
+        from .channel_layer import LocalChannelLayer
+
+        self.layer = LocalChannelLayer(batch_types=['chat.frame'], max_batch=3)
+
+    async def test_group_send_shares_one_message(self):
+        first = await self.layer.new_channel()
+        second = await self.layer.new_channel()
+        await self.layer.group_add('room', first)
+        await self.layer.group_add('room', second)
+
+        message = {'type': 'chat.frame', 'text': '{}'}
+        await self.layer.group_send('room', message)
+
+        self.assertIs(await self.layer.receive(first), message)
+        self.assertIs(await self.layer.receive(second), message)
+
+    async def test_burst_is_batched(self):
+        channel = await self.layer.new_channel()
+        await self.layer.group_add('room', channel)
+        for number in range(4):
+            await self.layer.group_send('room', {'type': 'chat.frame', 'text': str(number)})
+        await self.layer.send(channel, {'type': 'other'})
+
+        batch = await self.layer.receive(channel)
+        self.assertEqual(batch['type'], 'chat.frame.batch')
+        self.assertEqual([m['text'] for m in batch['messages']], ['0', '1', '2'])
+        # A single message of a batch type is delivered as-is
+        self.assertEqual((await self.layer.receive(channel))['text'], '3')
+        self.assertEqual((await self.layer.receive(channel))['type'], 'other')
+
+    async def test_group_send_from_other_threads(self):
+        import threading
+
+        channel = await self.layer.new_channel()
+        await self.layer.group_add('room', channel)
+
+        def send(start):
+            for number in range(start, start + 50):
+                async_to_sync(self.layer.group_send)('room', {'type': 'other', 'n': number})
+
+        # Two sender threads race the receiver on this loop, like the notification dispatcher
+        threads = [threading.Thread(target=send, args=(start,)) for start in (0, 50)]
+        for thread in threads:
+            thread.start()
+        received = [
+            (await asyncio.wait_for(self.layer.receive(channel), 2))['n'] for _ in range(100)
+        ]
+        for thread in threads:
+            thread.join()
+        self.assertEqual(sorted(received), list(range(100)))
+
+    async def test_chat_consumer_room(self):
+        from channels.layers import channel_layers
+        from channels.routing import URLRouter
+        from channels.testing import WebsocketCommunicator
+
+        from .chat_history import chat_history
+        from .routing import websocket_urlpatterns
+
+        chat_history.clear()
+
+        application = URLRouter(websocket_urlpatterns)
+        alice = WebsocketCommunicator(application, '/ws/chat/lobby/')
+        bob = WebsocketCommunicator(application, '/ws/chat/lobby/')
+        try:
+            for client in (alice, bob):
+                connected, _ = await client.connect()
+                self.assertTrue(connected)
+                await client.receive_json_from()  # connection_established
+                await client.receive_json_from()  # history
+
+            await alice.send_json_to({'message': 'hello', 'username': 'alice'})
+            for client in (alice, bob):
+                frame = await client.receive_json_from()
+                self.assertEqual((frame['type'], frame['message']), ('chat', 'hello'))
+        finally:
+            await alice.disconnect()
+            await bob.disconnect()
+            await channel_layers['default'].flush()
+
+
+class WebsocketFlowControlTests(SimpleTestCase):
+    """Publishers are rate limited and slow readers have a bounded queue."""
+
+    def setUp(self):
+        from .chat_history import chat_history
+        from .websocket_limits import websocket_metrics
+
+        websocket_metrics.reset()
+        chat_history.clear()
+
+    def test_token_bucket(self):
+        from .websocket_limits import TokenBucket
+
+        now = [0.0]
+        bucket = TokenBucket(rate=2, capacity=3, clock=lambda: now[0])
+        self.assertEqual([bucket.consume() for _ in range(4)], [True, True, True, False])
+        now[0] = 0.5  # One token back
+        self.assertEqual([bucket.consume(), bucket.consume()], [True, False])
+
+    def test_metrics_keep_recent_rooms_only(self):
+        from .websocket_limits import websocket_metrics
+
+        with self.settings(BLOG_WEBSOCKET_LIMITS={'METRICS_ROOMS': 2}):
+            for room in ('a', 'b', 'a', 'c'):
+                websocket_metrics.incr(room, 'received')
+        self.assertEqual(sorted(websocket_metrics.snapshot()), ['a', 'c'])
+
+    async def connect(self, path='/ws/chat/lobby/'):
+        from channels.routing import URLRouter
+        from channels.testing import WebsocketCommunicator
+
+        from .routing import websocket_urlpatterns
+
+        client = WebsocketCommunicator(URLRouter(websocket_urlpatterns), path)
+        connected, _ = await client.connect()
+        self.assertTrue(connected)
+        await client.receive_json_from()  # connection_established
+        await client.receive_json_from()  # history
+        return client
+
+    async def test_receive_rate_limit(self):
+        from channels.layers import channel_layers
+
+        from .websocket_limits import websocket_metrics
+
+        limits = {'RECEIVE_RATE': 0.001, 'RECEIVE_BURST': 2, 'MAX_VIOLATIONS': 3}
+        with self.settings(BLOG_WEBSOCKET_LIMITS=limits):
+            client = await self.connect()
+            try:
+                for number in range(3):
+                    await client.send_json_to({'message': f'spam {number}'})
+
+                received = [await client.receive_json_from() for _ in range(3)]
+                # The error frame is direct, chat frames go through the channel layer
+                self.assertEqual(sorted(frame['type'] for frame in received), ['chat', 'chat', 'error'])
+
+                # Third violation closes the socket
+                await client.send_json_to({'message': 'more'})
+                await client.send_json_to({'message': 'more'})
+                closed = await client.receive_output()
+                self.assertEqual(closed, {'type': 'websocket.close', 'code': 4029})
+            finally:
+                await client.disconnect()
+                await channel_layers['default'].flush()
+
+        counters = websocket_metrics.snapshot()['chat_lobby']
+        self.assertEqual(counters['rate_limited'], 3)
+        self.assertEqual(counters['disconnected'], 1)
+
+    async def run_slow_reader(self, policy):
+        """Queue 5 frames for a reader that drains nothing, with room for 3."""
+        from channels.generic.websocket import AsyncWebsocketConsumer
+
+        from .websocket_limits import FlowControlMixin
+
+        class SlowConsumer(FlowControlMixin, AsyncWebsocketConsumer):
+            overflow_policy = policy
+
+            def get_metrics_room(self):
+                return 'slow'
+
+        output = []
+        reader = asyncio.Event()
+
+        async def base_send(message):
+            if message['type'] == 'websocket.send':
+                await reader.wait()
+            output.append(message)
+
+        consumer = SlowConsumer()
+        consumer.scope = {'type': 'websocket'}
+        consumer.base_send = base_send
+        with self.settings(BLOG_WEBSOCKET_LIMITS={'SEND_QUEUE_SIZE': 3}):
+            await consumer.websocket_connect({'type': 'websocket.connect'})
+
+        for number in range(5):
+            await consumer.send(text_data=str(number))
+        reader.set()
+        for _ in range(5):
+            await asyncio.sleep(0)
+        consumer._writer.cancel()
+        return output
+
+    async def test_slow_reader_drops_oldest(self):
+        from .websocket_limits import DROP_OLDEST, websocket_metrics
+
+        output = await self.run_slow_reader(DROP_OLDEST)
+
+        self.assertEqual([m.get('text') for m in output[1:]], ['2', '3', '4'])
+        counters = websocket_metrics.snapshot()['slow']
+        self.assertEqual((counters['dropped'], counters['sent'], counters['queued']), (2, 3, 0))
+        self.assertEqual(counters['queued_peak'], 3)
+
+    async def test_slow_reader_disconnect(self):
+        from .websocket_limits import DISCONNECT
+
+        output = await self.run_slow_reader(DISCONNECT)
+
+        self.assertIn({'type': 'websocket.close', 'code': 4008}, output)
+        # Frames queued after the close are never written
+        self.assertNotIn('3', [m.get('text') for m in output])
+
+    async def test_failed_writer_restarts(self):
+        from channels.generic.websocket import AsyncWebsocketConsumer
+
+        from .websocket_limits import FlowControlMixin
+
+        class FlakyConsumer(FlowControlMixin, AsyncWebsocketConsumer):
+            pass
+
+        output = []
+
+        async def base_send(message):
+            if message.get('text') == 'boom':
+                raise ConnectionError('transport gone')
+            output.append(message.get('text'))
+
+        consumer = FlakyConsumer()
+        consumer.scope = {'type': 'websocket'}
+        consumer.base_send = base_send
+        await consumer.websocket_connect({'type': 'websocket.connect'})
+
+        with self.assertLogs('blog.websocket_limits', 'ERROR'):
+            await consumer.send(text_data='boom')
+            for _ in range(3):
+                await asyncio.sleep(0)
+        self.assertIsNone(consumer._writer)
+
+        await consumer.send(text_data='after')
+        for _ in range(3):
+            await asyncio.sleep(0)
+        self.assertEqual(output[-1], 'after')
+        consumer._writer.cancel()
+
+
+class ChatHistoryTests(SimpleTestCase):
+    """Late joiners get recent messages in one frame and can resume by seq."""
+
+    def make_history(self, count, size=5):
+        from .chat_history import RoomHistory
+
+        history = RoomHistory(size)
+        for number in range(count):
+            history.append({'type': 'chat', 'message': f'm{number}'})
+        return history
+
+    def test_ring_buffer_keeps_last_messages(self):
+        history = self.make_history(8)
+        frame = json.loads(history.history_frame())
+
+        self.assertEqual(frame['last_seq'], 8)
+        self.assertFalse(frame['reset'])
+        self.assertEqual([m['seq'] for m in frame['messages']], [4, 5, 6, 7, 8])
+
+    def test_resume(self):
+        history = self.make_history(8)
+
+        frames, reset = history.replay(after=6, epoch=history.epoch)
+        self.assertEqual(([json.loads(f)['seq'] for f in frames], reset), ([7, 8], False))
+        # Up to date: nothing to send
+        self.assertEqual(history.replay(after=8, epoch=history.epoch), ([], False))
+        # Missed messages already dropped out of the buffer
+        self.assertTrue(history.replay(after=1, epoch=history.epoch)[1])
+        # Another epoch (server restarted without persistence)
+        self.assertTrue(history.replay(after=6, epoch='other')[1])
+
+    def test_persistence(self):
+        import tempfile
+
+        from .chat_history import ChatHistoryStore, COMPACT_FACTOR
+
+        with tempfile.TemporaryDirectory() as directory:
+            with self.settings(BLOG_CHAT_HISTORY={'SIZE': 3, 'PERSIST_DIR': directory}):
+                store = ChatHistoryStore()
+                for number in range(3 * COMPACT_FACTOR + 2):
+                    store.append('chat_room', {'type': 'chat', 'message': f'm{number}'})
+                epoch = store.room('chat_room').epoch
+                store.flush()  # Files are written by a background thread
+
+                restarted = ChatHistoryStore()
+                history = restarted.room('chat_room')
+
+                self.assertEqual(history.epoch, epoch)
+                self.assertEqual(history.last_seq, 3 * COMPACT_FACTOR + 2)
+                self.assertEqual(history.replay(after=history.last_seq - 1, epoch=epoch)[1], False)
+                # Compaction kept the log short
+                with open(f'{directory}/chat_room.ndjson') as handle:
+                    self.assertLess(len(handle.readlines()), 3 * COMPACT_FACTOR)
+
+    def test_rooms_are_capped(self):
+        from .chat_history import ChatHistoryStore
+
+        with self.settings(BLOG_CHAT_HISTORY={'MAX_ROOMS': 2}):
+            store = ChatHistoryStore()
+            for name in ('chat_a', 'chat_b', 'chat_a', 'chat_c'):
+                store.append(name, {'type': 'chat', 'message': name})
+            self.assertEqual(list(store.rooms), ['chat_a', 'chat_c'])
+
+    async def test_consumer_replays_on_connect(self):
+        from channels.layers import channel_layers
+        from channels.routing import URLRouter
+        from channels.testing import WebsocketCommunicator
+
+        from .chat_history import chat_history
+        from .routing import websocket_urlpatterns
+
+        chat_history.clear()
+        for number in range(3):
+            chat_history.append('chat_history_room', {'type': 'chat', 'message': f'm{number}'})
+        epoch = chat_history.room('chat_history_room').epoch
+
+        application = URLRouter(websocket_urlpatterns)
+        client = WebsocketCommunicator(application, f'/ws/chat/history_room/?after=1&epoch={epoch}')
+        try:
+            connected, _ = await client.connect()
+            self.assertTrue(connected)
+            await client.receive_json_from()  # connection_established
+            frame = await client.receive_json_from()
+        finally:
+            await client.disconnect()
+            await channel_layers['default'].flush()
+            chat_history.clear()
+
+        self.assertEqual(frame['type'], 'history')
+        self.assertEqual([m['message'] for m in frame['messages']], ['m1', 'm2'])
+
+
+class NotificationTests(TestCase):
+    """Signals queue notifications; the dispatcher coalesces and sends them in batches."""
+
+    def setUp(self):
+        from channels.layers import channel_layers
+
+        from .notifications import NotificationDispatcher
+
+        self.layer = channel_layers['default']
+        self.dispatcher = NotificationDispatcher()
+        self.author = User.objects.create_user('author', password='pw')
+        self.post = Post.objects.create(title='Draft', slug='draft', content='x', author=self.author)
+
+    def tearDown(self):
+        async_to_sync(self.layer.flush)()
+
+    def join(self, *groups):
+        channel = async_to_sync(self.layer.new_channel)()
+        for group in groups:
+            async_to_sync(self.layer.group_add)(group, channel)
+        return channel
+
+    def receive(self, channel):
+        return async_to_sync(asyncio.wait_for)(self.layer.receive(channel), 2)
+
+    @override_settings(BLOG_NOTIFICATIONS={'BACKGROUND': False})
+    def test_coalesces_per_group(self):
+        from .notifications import BROADCAST_GROUP, post_group
+
+        follower = self.join(post_group(1))
+        everyone = self.join(BROADCAST_GROUP)
+        for _ in range(3):
+            self.dispatcher.notify(post_group(1), ('comment_approved', 1), 'New comment', 'm')
+        self.dispatcher.notify(BROADCAST_GROUP, ('post_published', 1), 'One', 'm')
+        self.dispatcher.notify(BROADCAST_GROUP, ('post_published', 2), 'Two', 'm')
+
+        self.assertEqual(self.dispatcher.flush(), 2)
+        self.assertEqual(self.receive(follower)['count'], 3)
+        event = self.receive(everyone)
+        self.assertEqual([item['title'] for item in event['items']], ['One', 'Two'])
+        self.assertEqual(self.dispatcher.flush(), 0)
+
+    @override_settings(BLOG_NOTIFICATIONS={'BACKGROUND': False})
+    def test_signals_notify_groups(self):
+        from . import signals
+        from .notifications import BROADCAST_GROUP, post_group, user_group
+
+        with mock.patch.object(signals, 'notification_dispatcher', self.dispatcher):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.post.publish()
+                self.post.save()  # Still published: no second notification
+                comment = Comment.objects.create(
+                    post=self.post, author_name='a', author_email='a@example.com', content='c'
+                )
+                comment.is_approved = True
+                comment.save()
+
+        pending = self.dispatcher._pending
+        self.assertEqual(list(pending[BROADCAST_GROUP]), [('post_published', self.post.pk)])
+        self.assertIn(user_group(self.author.pk), pending)
+        self.assertIn(post_group(self.post.pk), pending)
+
+    @override_settings(BLOG_NOTIFICATIONS={'BACKGROUND': True, 'WINDOW': 0.01})
+    def test_background_thread_delivers(self):
+        from .notifications import user_group
+
+        channel = self.join(user_group(self.author.pk))
+        self.dispatcher.notify(user_group(self.author.pk), 'hello', 'Hello', 'from a thread')
+
+        event = self.receive(channel)
+        self.assertEqual(event['title'], 'Hello')
+
+
+@override_settings(BLOG_PROFILING={'ENABLED': True})
+class ProfilingTests(TestCase):
+    """Sampled requests report query counts, N+1 patterns and latency per URL name."""
+
+    def setUp(self):
+        from .profiling import profiler
+
+        profiler.reset()
+        self.staff = User.objects.create_user('staff', password='pw', is_staff=True)
+
+    def test_counts_duplicate_and_similar_queries(self):
+        from django.http import HttpResponse
+        from django.test import RequestFactory
+        from django.urls import resolve
+
+        from .profiling import ProfilingMiddleware, profiler
+
+        def view(request):
+            request.resolver_match = resolve('/api/categories/')
+            for pk in (1, 2, 3, 3):
+                list(Post.objects.filter(pk=pk))
+            return HttpResponse()
+
+        ProfilingMiddleware(view)(RequestFactory().get('/api/categories/'))
+
+        entry = profiler.report()['category-list']
+        self.assertEqual(entry['queries']['p50'], 4)
+        self.assertEqual(entry['similar']['p50'], 2)
+        self.assertEqual(entry['duplicates']['p50'], 1)
+
+    def test_report_is_staff_only(self):
+        self.client.get('/api/categories/')
+
+        self.assertEqual(self.client.get('/api/stats/profile/').status_code, 401)
+        self.client.force_login(self.staff)
+        response = self.client.get('/api/stats/profile/?sort=queries')
+        self.assertEqual(response.status_code, 200)
+        entry = response.json()['endpoints']['category-list']
+        self.assertEqual(entry['samples'], 1)
+        self.assertGreater(entry['serialize_ms']['p50'], 0)
+        self.assertGreater(entry['render_ms']['p50'], 0)
+
+    @override_settings(BLOG_PROFILING={'ENABLED': True})
+    def test_drf_is_not_patched(self):
+        from django.http import HttpResponse
+        from rest_framework.serializers import BaseSerializer
+
+        from .profiling import ProfilingMiddleware
+
+        data = BaseSerializer.__dict__['data']
+        ProfilingMiddleware(lambda request: HttpResponse())
+        self.assertIs(BaseSerializer.__dict__['data'], data)
+
+
+class BenchmarkApiTests(TestCase):
+    """The API benchmark seeds data, measures endpoints and flags regressions."""
+
+    def test_measures_and_compares(self):
+        from .management.commands.benchmark_api import (
+            ENDPOINTS, async_paths, compare, endpoint_paths, run_in_process, seed_data,
+        )
+
+        data = seed_data(posts=20, categories=3, comments=2, users=2)
+        results = {
+            name: run_in_process(endpoint_paths(name, data, 3), warmup=1) for name in ENDPOINTS
+        }
+        results['post-detail:async'] = run_in_process(
+            async_paths(endpoint_paths('post-detail', data, 3)), warmup=1
+        )
+        for name, result in results.items():
+            self.assertEqual((result['requests'], result['errors']), (3, 0), name)
+
+        self.assertEqual(compare(results, {'results': results}), [])
+        baseline = {'results': {'stats': {**results['stats'], 'queries': results['stats']['queries'] - 1}}}
+        self.assertEqual(len(compare(results, baseline)), 1)
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    """Token users come from the cache until the user changes."""
+
+    def setUp(self):
+        from rest_framework_simplejwt.tokens import AccessToken
+
+        cache.clear()
+        self.user = User.objects.create_user('reader', password='old-password')
+        self.auth = {'HTTP_AUTHORIZATION': f'Bearer {AccessToken.for_user(self.user)}'}
+
+    def get(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/auth/test-token/', **self.auth)
+        return response.status_code, len(queries)
+
+    def test_user_is_cached_until_changed(self):
+        self.assertEqual(self.get(), (200, 1))
+        self.assertEqual(self.get(), (200, 0))
+
+        # The password hash itself never goes into the cache
+        from .authentication import USER_KEY, get_user_version
+        entry = cache.get(USER_KEY.format(self.user.pk, get_user_version(self.user.pk)))
+        self.assertNotIn(self.user.password, entry[0])
+
+        self.user.set_password('new-password')
+        self.user.save()
+        self.assertEqual(self.get(), (200, 1))
+
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.get()[0], 401)
+
+        # An evicted version starts over from the clock, not at an old entry's number
+        from .authentication import USER_VERSION_KEY
+        cache.delete(USER_VERSION_KEY.format(self.user.pk))
+        self.assertEqual(self.get()[0], 401)
+
+    def test_basic_auth_is_off(self):
+        import base64
+
+        credentials = base64.b64encode(b'reader:old-password').decode()
+        response = self.client.get('/api/auth/test-token/', HTTP_AUTHORIZATION=f'Basic {credentials}')
+        self.assertEqual(response.status_code, 401)
+
+
+class TokenBlacklistTests(TestCase):
+    """Rotated and logged-out refresh tokens are rejected; valid ones skip the table."""
+
+    def setUp(self):
+        from .token_blacklist import token_blacklist
+
+        cache.clear()
+        token_blacklist.reset()
+        self.user = User.objects.create_user('reader', password='pw')
+
+    def refresh(self, token):
+        return self.client.post('/api/auth/token/refresh/', {'refresh': str(token)})
+
+    def test_rotation_blacklists_old_token(self):
+        from rest_framework_simplejwt.tokens import RefreshToken
+
+        token = RefreshToken.for_user(self.user)
+        response = self.refresh(token)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.json()['refresh'], str(token))
+
+        self.assertEqual(self.refresh(token).status_code, 401)
+        self.assertEqual(self.refresh(response.json()['refresh']).status_code, 200)
+
+    @override_settings(BLOG_TOKEN_BLACKLIST={'SHARED_CACHE': True})
+    def test_valid_token_check_skips_table(self):
+        from .token_blacklist import token_blacklist
+
+        token_blacklist.is_blacklisted('warm-up')  # Loads the filter
+        with self.assertNumQueries(0):
+            self.assertFalse(token_blacklist.is_blacklisted('never-blacklisted'))
+
+    def test_local_cache_sees_other_processes(self):
+        from datetime import timedelta
+
+        from django.utils import timezone
+
+        from .models import BlacklistedToken
+        from .token_blacklist import token_blacklist
+
+        token_blacklist.is_blacklisted('warm-up')  # Loads the filter
+        # Blacklisted by another process: no generation bump reaches this one's cache
+        BlacklistedToken.objects.create(jti='elsewhere', expires_at=timezone.now() + timedelta(days=1))
+        self.assertTrue(token_blacklist.is_blacklisted('elsewhere'))
+
+    def test_rotation_settings_are_checked(self):
+        from django.conf import settings
+
+        from .token_blacklist import check_settings
+
+        self.assertEqual(check_settings(None), [])
+        with override_settings(SIMPLE_JWT={**settings.SIMPLE_JWT, 'BLACKLIST_AFTER_ROTATION': False}):
+            self.assertEqual([error.id for error in check_settings(None)], ['blog.E001'])
+
+    def test_prune_removes_expired_entries(self):
+        from datetime import timedelta
+
+        from django.utils import timezone
+
+        from .models import BlacklistedToken
+        from .token_blacklist import token_blacklist
+
+        now = timezone.now()
+        for number in range(5):
+            token_blacklist.add(f'old-{number}', now - timedelta(days=1))
+        token_blacklist.add('live', now + timedelta(days=1))
+
+        # add() may already have pruned a batch on its own
+        expired = BlacklistedToken.objects.filter(expires_at__lt=now).count()
+        self.assertEqual(token_blacklist.prune(batch_size=2), expired)
+        self.assertEqual(list(BlacklistedToken.objects.values_list('jti', flat=True)), ['live'])
+        self.assertTrue(token_blacklist.is_blacklisted('live'))
+        self.assertFalse(token_blacklist.is_blacklisted('old-0'))
+
+
+class AsyncApiViewTests(TestCase):
+    """The async read endpoints answer exactly like their DRF counterparts."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('writer', password='pass')
+        category = Category.objects.create(name='Django', slug='django')
+        # Two pages of categories
+        Category.objects.bulk_create(
+            Category(name=f'Topic {number}', slug=f'topic-{number}') for number in range(10)
+        )
+        for number in range(12):
+            post = Post.objects.create(
+                title=f'Django async post {number}', slug=f'async-post-{number}',
+                content='Views without a worker thread', author=cls.author, status='published',
+            )
+            post.categories.add(category)
+        Post.objects.create(title='Draft', slug='async-draft', content='Draft', author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+
+    def assertSameResponse(self, sync_path, async_path, **extra):
+        expected = self.client.get(sync_path, **extra)
+        actual = self.client.get(async_path, **extra)
+        self.assertEqual(actual.status_code, expected.status_code, async_path)
+        self.assertEqual(
+            actual.json(), json.loads(expected.content.decode().replace('/api/', '/api/async/')),
+            async_path,
+        )
+
+    def test_matches_sync_endpoints(self):
+        self.assertSameResponse('/api/posts/?page_size=5', '/api/async/posts/?page_size=5')
+        self.assertSameResponse('/api/search/?q=django', '/api/async/search/?q=django')
+        self.assertSameResponse('/api/categories/', '/api/async/categories/')
+        for query in ('?page=2', '?page=0', '?page=x', '?search=djan'):
+            self.assertSameResponse(f'/api/categories/{query}', f'/api/async/categories/{query}')
+        self.assertSameResponse('/api/stats/', '/api/async/stats/')
+
+        # The shadowed /api/posts/<slug>/ route serves a different payload
+        post = Post.objects.get(slug='async-post-3')
+        response = self.client.get('/api/async/posts/async-post-3/')
+        self.assertEqual(response.json()['title'], post.title)
+        self.assertEqual(self.client.get('/api/async/posts/async-draft/').status_code, 404)
+
+    def test_unknown_category_matches_nothing(self):
+        self.assertSameResponse('/api/posts/?category=nope', '/api/async/posts/?category=nope')
+        self.assertEqual(self.client.get('/api/async/posts/?category=nope').json()['results'], [])
+
+    def test_authors_see_their_drafts(self):
+        from rest_framework_simplejwt.tokens import AccessToken
+
+        auth = {'HTTP_AUTHORIZATION': f'Bearer {AccessToken.for_user(self.author)}'}
+        self.assertSameResponse('/api/posts/', '/api/async/posts/', **auth)
+        self.assertEqual(self.client.get('/api/async/posts/async-draft/', **auth).status_code, 200)
+        self.assertEqual(
+            self.client.get('/api/async/posts/', HTTP_AUTHORIZATION='Bearer nonsense').status_code, 401
+        )
+
+
+class FragmentCacheTests(TestCase):
+    """HTML pages come from cached fragments until the content changes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('writer', password='pass')
+        cls.category = Category.objects.create(name='Django', slug='django')
+        cls.post = Post.objects.create(
+            title='Cached post', slug='cached-post', content='First version',
+            author=cls.author, status='published',
+        )
+        cls.post.categories.add(cls.category)
+
+    def setUp(self):
+        from .fragment_cache import fragment_stats
+
+        cache.clear()
+        fragment_stats.reset()
+        self.stats = fragment_stats
+
+    def get(self, path):
+        # A session cookie keeps the whole-response cache out of the way
+        self.client.cookies['sessionid'] = 'anonymous'
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode(), len(queries)
+
+    def test_lists_are_served_from_fragments(self):
+        for path in ('/', '/posts/', '/category/django/', '/cbv/posts/'):
+            first, _ = self.get(path)
+            second, queries = self.get(path)
+            self.assertEqual(first, second, path)
+            # Session lookup, plus the category (404 check) and page count
+            self.assertLessEqual(queries, 2, path)
+
+        self.assertEqual(self.stats.report()['post_cards']['hits'], 4)
+
+        Category.objects.filter(pk=self.category.pk).update(name='Renamed')
+        self.assertNotIn('Renamed', self.get('/posts/')[0])
+        self.category.refresh_from_db()
+        self.category.save()
+        self.assertIn('Renamed', self.get('/posts/')[0])
+
+    def test_unknown_category_shares_the_unfiltered_fragment(self):
+        self.get('/posts/')
+        for path in ('/posts/?category=nope', '/posts/?category=other'):
+            content, _ = self.get(path)
+            self.assertIn('Cached post', content)
+        self.assertEqual(self.stats.report()['post_cards'], {'hits': 2, 'misses': 1, 'hit_rate': 0.667})
+
+    def test_home_counts_render_inside_the_fragment(self):
+        response = self.client.get('/')
+        self.assertContains(response, '1 Posts')
+        self.assertContains(response, '1 Categories')
+        self.assertNotIn('total_posts', response.context)
+
+    def test_post_body_is_versioned_per_post(self):
+        self.assertIn('First version', self.get('/posts/cached-post/')[0])
+        self.post.content = 'Second version'
+        self.post.save()
+        self.assertIn('Second version', self.get('/posts/cached-post/')[0])
+        self.assertEqual(self.stats.report()['post_body'], {'hits': 0, 'misses': 2, 'hit_rate': 0.0})
+
+
+class RenderedContentTests(TestCase):
+    """Post bodies are rendered on save and served as stored HTML."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('writer', password='pass')
+
+    def test_render_on_save(self):
+        post = Post.objects.create(
+            title='Rendered', slug='rendered', author=self.author,
+            status='published',
+            content='# Setup\nInstall <b>Django</b>.\n\n## Models\nFirst line\nsecond line\n\n# Setup',
+        )
+        self.assertEqual(post.content_html, (
+            '<h2 id="setup">Setup</h2>\n\n<p>Install &lt;b&gt;Django&lt;/b&gt;.</p>\n\n'
+            '<h3 id="models">Models</h3>\n\n<p>First line<br>second line</p>\n\n'
+            '<h2 id="setup-2">Setup</h2>'
+        ))
+        self.assertEqual([entry['anchor'] for entry in post.toc], ['setup', 'models', 'setup-2'])
+        self.assertEqual(post.summary, 'Setup Install <b>Django</b>. Models First line second line Setup')
+
+        post.excerpt = 'Short summary'
+        post.save(update_fields=['excerpt'])
+        post.refresh_from_db()
+        self.assertEqual(post.summary, 'Short summary')
+
+        response = self.client.get('/posts/rendered/')
+        self.assertContains(response, '<h3 id="models">Models</h3>', html=False)
+        self.assertContains(response, 'href="#setup-2"')
+
+    def test_rerender_stale_posts(self):
+        from .rendering import RENDERER_VERSION, rerender_stale
+
+        for number in range(3):
+            Post.objects.create(title=f'Post {number}', slug=f'post-{number}', content='# Old',
+                                author=self.author)
+        Post.objects.filter(slug__in=['post-0', 'post-2']).update(renderer_version=0, content_html='')
+
+        self.assertEqual(rerender_stale(batch_size=1), 2)
+        self.assertEqual(rerender_stale(), 0)
+        self.assertFalse(Post.objects.filter(renderer_version__lt=RENDERER_VERSION).exists())
+        self.assertEqual(Post.objects.get(slug='post-2').content_html, '<h2 id="old">Old</h2>')
+
+
+class DashboardExportTests(TestCase):
+    """Authors download their own posts and comments as a stream."""
+
+    @classmethod
+    def setUpTestData(cls):
+        from datetime import datetime, timezone as dt_timezone
+
+        cls.author = User.objects.create_user('writer', password='pass')
+        other = User.objects.create_user('other', password='pass')
+        for number, year in enumerate((2023, 2024, 2025)):
+            post = Post.objects.create(title=f'Post {number}', slug=f'post-{number}',
+                                       content='Some words here', author=cls.author)
+            Post.objects.filter(pk=post.pk).update(
+                created_at=datetime(year, 6, 1, tzinfo=dt_timezone.utc)
+            )
+            Comment.objects.create(post=post, author_name='Reader', author_email='r@example.com',
+                                   content='Nice post, thanks', is_approved=number > 0)
+        Post.objects.create(title='Not mine', slug='not-mine', content='Other', author=other)
+
+    def setUp(self):
+        self.client.force_login(self.author)
+
+    def export(self, **params):
+        response = self.client.get('/dashboard/export/', params)
+        if response.status_code != 200:
+            return response.status_code, response.content.decode()
+        return response.status_code, b''.join(response.streaming_content).decode().splitlines()
+
+    def test_csv_with_fields_and_dates(self):
+        status_code, lines = self.export(fields='slug,approved_comments', since='2024-01-01', until='2024-12-31')
+        self.assertEqual(status_code, 200)
+        self.assertEqual(lines, ['slug,approved_comments', 'post-1,1'])
+
+        status_code, lines = self.export(kind='comments', type='ndjson', fields='post_slug,is_approved')
+        self.assertEqual([json.loads(line) for line in lines], [
+            {'post_slug': 'post-0', 'is_approved': False},
+            {'post_slug': 'post-1', 'is_approved': True},
+            {'post_slug': 'post-2', 'is_approved': True},
+        ])
+
+    def test_csv_escapes_formulas(self):
+        Comment.objects.create(post=Post.objects.get(slug='post-0'), author_name='=cmd|x',
+                               author_email='x@example.com', content='=1+1')
+        status_code, lines = self.export(kind='comments', fields='author_name,content')
+        self.assertEqual(lines[-1], "'=cmd|x,'=1+1")
+
+    def test_rejects_bad_parameters(self):
+        self.assertEqual(self.export(fields='title,password')[0], 400)
+        self.assertEqual(self.export(since='last week')[0], 400)
+        self.assertEqual(self.export(type='xlsx')[0], 400)
+        self.assertEqual(self.export(kind='users')[0], 400)
+
+
+class ViewAnalyticsTests(TestCase):
+    """Flushed views land in hourly buckets that feed trending rankings."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('writer', password='pass')
+        cls.posts = [
+            Post.objects.create(title=f'Post {number}', slug=f'post-{number}', content='Body',
+                                author=cls.author, status='published')
+            for number in range(3)
+        ]
+
+    def setUp(self):
+        from .models import PostViewBucket
+        from .view_counter import view_counter
+
+        cache.clear()
+        # Views buffered by earlier tests would land in these posts' buckets
+        view_counter.flush()
+        PostViewBucket.objects.all().delete()
+        self.view_counter = view_counter
+
+    def test_flush_feeds_buckets_and_rankings(self):
+        from .models import PostViewBucket
+
+        first, second, third = self.posts
+        Post.objects.filter(pk=third.pk).update(views=1000)  # All-time leader, no recent views
+        self.view_counter.record(first.pk, 2)
+        self.view_counter.record(second.pk, 5)
+        self.view_counter.flush()
+        self.view_counter.record(first.pk, 1)
+        self.view_counter.flush()
+
+        self.assertEqual(
+            sorted(PostViewBucket.objects.values_list('post_id', 'views')),
+            [(first.pk, 3), (second.pk, 5)],
+        )
+        # /api/posts/popular/ is shadowed by the post_api route: call the viewset
+        def popular(**params):
+            return PostViewSet.as_view({'get': 'popular'})(APIRequestFactory().get('/', params))
+
+        self.assertEqual(
+            [(post['slug'], post['window_views']) for post in popular(window='24h').data],
+            [('post-1', 5), ('post-0', 3)],
+        )
+        self.assertEqual(popular().data[0]['slug'], 'post-2')
+        self.assertEqual(popular(window='1y').status_code, 400)
+
+        self.client.force_login(self.author)
+        response = self.client.get('/dashboard/?trend=24h')
+        self.assertEqual(
+            [(entry['slug'], entry['views_24h']) for entry in response.context['trending_posts']],
+            [('post-1', 5), ('post-0', 3)],
+        )
+
+    def test_compaction_folds_hours_into_days(self):
+        from datetime import datetime, timezone as dt_timezone
+
+        from .analytics import add_views, compact
+        from .models import PostViewBucket
+
+        post = self.posts[0]
+        now = datetime(2026, 3, 10, 12, 30, tzinfo=dt_timezone.utc)
+        add_views([
+            (post.pk, 'hour', datetime(2026, 3, 1, 8, tzinfo=dt_timezone.utc), 4),
+            (post.pk, 'hour', datetime(2026, 3, 1, 9, tzinfo=dt_timezone.utc), 6),
+            (post.pk, 'hour', datetime(2026, 3, 10, 11, tzinfo=dt_timezone.utc), 1),
+            (post.pk, 'day', datetime(2025, 10, 1, tzinfo=dt_timezone.utc), 9),
+        ])
+
+        self.assertEqual(compact(now), (2, 1))
+        self.assertEqual(
+            sorted(PostViewBucket.objects.values_list('period', 'start', 'views')),
+            [('day', datetime(2026, 3, 1, tzinfo=dt_timezone.utc), 10),
+             ('hour', datetime(2026, 3, 10, 11, tzinfo=dt_timezone.utc), 1)],
+        )
+
+    def test_long_windows_include_their_first_day(self):
+        from datetime import datetime, timezone as dt_timezone
+
+        from .analytics import window_cutoff
+
+        now = datetime(2026, 3, 10, 12, 30, tzinfo=dt_timezone.utc)
+        self.assertEqual(window_cutoff('24h', now), datetime(2026, 3, 9, 12, tzinfo=dt_timezone.utc))
+        # The day bucket of March 3rd holds views from before 12:00 too
+        self.assertEqual(window_cutoff('7d', now), datetime(2026, 3, 3, tzinfo=dt_timezone.utc))
+
+    def test_dashboard_trends_link_to_the_editor(self):
+        draft = self.posts[0]
+        Post.objects.filter(pk=draft.pk).update(status='draft')
+        self.view_counter.record(draft.pk, 1)
+        self.view_counter.flush()
+
+        self.client.force_login(self.author)
+        # Once in the recent posts, once in the trending table
+        self.assertContains(self.client.get('/dashboard/'), f'href="/dashboard/posts/{draft.slug}/edit/"', count=2)
+
+    def test_compaction_runs_after_the_flush_commits(self):
+        from datetime import datetime, timezone as dt_timezone
+
+        from . import analytics
+        from .models import PostViewBucket
+
+        post = self.posts[0]
+        now = datetime(2026, 3, 10, 12, 30, tzinfo=dt_timezone.utc)
+        analytics.add_views([(post.pk, 'hour', datetime(2026, 3, 1, 8, tzinfo=dt_timezone.utc), 4)])
+        analytics._next_compaction = 0.0
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            analytics.record_views({post.pk: 2}, now)
+        # Nothing was folded inside the flush's transaction
+        self.assertTrue(PostViewBucket.objects.filter(period='hour', views=4).exists())
+
+        callbacks[-1]()
+        self.assertEqual(
+            sorted(PostViewBucket.objects.values_list('period', 'views')),
+            [('day', 4), ('hour', 2)],
+        )
+        # A second run finds nothing left to fold
+        self.assertEqual(analytics.compact(now), (0, 0))
+
+@override_settings(BLOG_LEADERBOARD={'SIZE': 2, 'RECONCILE_INTERVAL': 300})
+class LeaderboardTests(TestCase):
+    """Popular posts come from in-memory boards kept current by view counter flushes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        from .view_counter import view_counter
+
+        # Write views buffered by earlier tests before these posts can reuse their ids
+        view_counter.flush()
+        cls.author = User.objects.create_user('writer', password='pass')
+        cls.django = Category.objects.create(name='Django', slug='django')
+        cls.posts = []
+        for number, views in enumerate([50, 30, 10]):
+            post = Post.objects.create(title=f'Post {number}', slug=f'post-{number}', content='Body',
+                                       author=cls.author, status='published', views=views)
+            cls.posts.append(post)
+        cls.posts[2].categories.add(cls.django)
+        Post.objects.create(title='Draft', slug='draft', content='Body', author=cls.author,
+                            status='draft', views=1000)
+
+    def setUp(self):
+        from .leaderboard import leaderboard
+        from .view_counter import view_counter
+
+        cache.clear()
+        leaderboard.invalidate()
+        self.leaderboard = leaderboard
+        self.view_counter = view_counter
+
+    def popular(self, **params):
+        # /api/posts/popular/ is shadowed by the post_api route: call the viewset
+        response = PostViewSet.as_view({'get': 'popular'})(APIRequestFactory().get('/', params))
+        return [(post['slug'], post['views']) for post in response.data]
+
+    def test_flushed_views_update_boards_without_queries(self):
+        self.assertEqual(self.popular(), [('post-0', 50), ('post-1', 30)])
+        self.assertEqual(self.popular(category='django'), [('post-2', 10)])
+
+        # post-2 climbs from outside the global board; post-1 is already on it
+        self.view_counter.record(self.posts[2].pk, 35)
+        self.view_counter.record(self.posts[1].pk, 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.view_counter.flush()
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.popular(), [('post-0', 50), ('post-2', 45)])
+            self.assertEqual(self.popular(category='django'), [('post-2', 45)])
+        self.assertEqual(self.popular(category='missing'), [])
+
+    def test_post_changes_reload_boards(self):
+        from .stats import build_site_stats
+
+        self.assertEqual(build_site_stats()['most_viewed_post'], {'title': 'Post 0', 'views': 50})
+
+        self.posts[0].status = 'draft'
+        self.posts[0].save()
+        self.assertEqual(self.popular(), [('post-1', 30), ('post-2', 10)])
+        self.assertEqual(build_site_stats()['most_viewed_post'], {'title': 'Post 1', 'views': 30})
+
+    def test_reload_racing_an_invalidation_is_not_stored(self):
+        from . import leaderboard as module
+
+        load_entries = module.load_entries
+
+        def invalidated_while_loading(queryset):
+            rows = load_entries(queryset)
+            self.leaderboard.invalidate()  # e.g. a post unpublished in another thread
+            return rows
+
+        with mock.patch.object(module, 'load_entries', invalidated_while_loading):
+            self.assertEqual(self.popular(), [('post-0', 50), ('post-1', 30)])
+        # The next read queries again instead of serving the stale board
+        with self.assertNumQueries(2):  # posts with authors, categories
+            self.popular()
+
+
+@override_settings(BLOG_RELATED_POSTS_LIMIT=2)
+class RelatedPostsTests(MaxQueriesMixin, TestCase):
+    """Neighbour lists follow publishing and category changes without full recomputes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('writer', password='pass')
+        cls.django = Category.objects.create(name='Django', slug='django')
+        cls.posts = []
+        for number in range(6):
+            post = Post.objects.create(title=f'Post {number}', slug=f'post-{number}', content='Body',
+                                       author=cls.author, status='published')
+            post.categories.add(cls.django)
+            cls.posts.append(post)
+
+    def related_slugs(self, post):
+        from .related import get_related_posts
+
+        return [related.slug for related in get_related_posts(post)]
+
+    def test_publishing_inserts_into_neighbour_lists(self):
+        post = Post.objects.create(title='New', slug='new', content='Body', author=self.author)
+        post.categories.add(self.django)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            post.publish()
+        # After the commit: the post, its categories, the neighbour lists it
+        # may enter, one read and one rewrite of them (in a savepoint) - the
+        # same for 6 neighbours as for 600
+        with self.assertMaxQueries(8):
+            for callback in callbacks:
+                callback()
+        for neighbour in self.posts:
+            self.assertEqual(self.related_slugs(neighbour)[0], 'new')
+
+        from .related import get_related_posts
+
+        # Cards don't need the body or its rendered HTML
+        deferred = get_related_posts(self.posts[0])[0].get_deferred_fields()
+        self.assertTrue({'content', 'content_html', 'toc'} <= deferred)
+
+    def test_removing_a_category_empties_lists(self):
+        self.django.posts.clear()
+        self.assertEqual(self.related_slugs(self.posts[0]), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            for post in self.posts:
+                post.categories.add(self.django)
+        self.assertEqual(len(self.related_slugs(self.posts[0])), 2)
+        self.django.delete()
+        self.assertEqual(self.related_slugs(self.posts[0]), [])
+
+
+class SearchTests(TestCase):
+    """Search snippets are safe HTML and follow the post's current status."""
+
+    def setUp(self):
+        author = User.objects.create_user('writer', password='pass')
+        self.post = Post.objects.create(
+            title='Hello', slug='hello', content='Django <script>alert(1)</script> tips',
+            author=author, status='published',
+        )
+
+    def search(self, q):
+        return api_views.search_api(APIRequestFactory().get('/', {'q': q})).data
+
+    def test_snippet_is_escaped(self):
+        from .search import DatabaseSearchBackend
+
+        snippet = self.search('django')['results'][0]['snippet']
+        self.assertEqual(snippet, '<mark>Django</mark> &lt;script&gt;alert(1)&lt;/script&gt; tips')
+        self.assertEqual(DatabaseSearchBackend().search('django')[0].snippet, snippet)
+
+    def test_status_changed_with_update(self):
+        Post.objects.filter(pk=self.post.pk).update(status='draft')
+        self.assertEqual(self.search('django')['count'], 0)
+
+    def test_status_save_leaves_index_alone(self):
+        self.post.status = 'draft'
+        with CaptureQueriesContext(connection) as queries:
+            self.post.save(update_fields=['status'])
+        self.assertFalse([q for q in queries if 'blog_post_fts' in q['sql']])
+        self.assertEqual(self.search('django')['count'], 0)
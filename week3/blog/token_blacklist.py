@@ -0,0 +1,260 @@
+# blog/token_blacklist.py
+
+"""
+Refresh-token blacklist with an in-memory Bloom filter in front of the table.
+
+Only blacklisted tokens are stored (BlacklistedToken, unique on jti), and
+expired rows are pruned. `is_blacklisted()` asks the filter first, so a
+valid token almost never touches the table. `add()` relies on the unique
+index, so a refresh token can be rotated only once; that needs
+ROTATE_REFRESH_TOKENS and BLACKLIST_AFTER_ROTATION (see check_settings()).
+
+Settings: BLOG_TOKEN_BLACKLIST (see DEFAULTS).
+"""
+
+import hashlib
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+from .models import BlacklistedToken
+
+
+DEFAULTS = {
+    'CAPACITY': 100_000,     # Initial Bloom filter size in entries (doubles as needed)
+    'ERROR_RATE': 0.01,      # Share of valid tokens that need a table lookup
+    'PRUNE_INTERVAL': 3600,  # Seconds between opportunistic prunes
+    'PRUNE_BATCH_SIZE': 1000,
+    'SHARED_CACHE': None,    # Is the default cache shared by all processes? None: guess from its backend
+}
+
+# Cache backends that keep their data inside one process
+LOCAL_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+GENERATION_KEY = 'blog:token_blacklist:generation'
+
+
+def get_setting(name):
+    return getattr(settings, 'BLOG_TOKEN_BLACKLIST', {}).get(name, DEFAULTS[name])
+
+
+class BloomFilter:
+    """
+    Set membership with false positives but no false negatives.
+    `capacity` entries at `error_rate` take about 1.2 bytes each at 1%.
+    """
+
+    def __init__(self, capacity, error_rate=0.01):
+        self.capacity = max(1, capacity)
+        self.size = max(8, int(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, value):
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + number * second) % self.size for number in range(self.hashes)]
+
+    def add(self, value):
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, value):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+
+class TokenBlacklist:
+    """Per-process Bloom filter over the BlacklistedToken table. Thread-safe."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._filter = None
+        self._last_pk = 0
+        self._generation = None
+        self._next_prune = 0.0
+
+    def is_blacklisted(self, jti):
+        with self._lock:
+            self._sync()
+            if jti not in self._filter:
+                return False
+        return BlacklistedToken.objects.filter(jti=jti).exists()
+
+    def add(self, jti, expires_at):
+        """
+        Blacklist a token.
+
+        Returns:
+            False if it was blacklisted already (another request used it first)
+        """
+        try:
+            with transaction.atomic():
+                BlacklistedToken.objects.create(jti=jti, expires_at=expires_at)
+        except IntegrityError:
+            return False
+
+        with self._lock:
+            if self._filter is not None:
+                self._filter.add(jti)
+        _bump_generation()
+        self.prune_if_due()
+        return True
+
+    def prune(self, batch_size=None, max_batches=None):
+        """Delete expired rows in batches. Returns the number deleted."""
+        batch_size = batch_size or get_setting('PRUNE_BATCH_SIZE')
+        deleted = batches = 0
+        while max_batches is None or batches < max_batches:
+            ids = list(
+                BlacklistedToken.objects.filter(expires_at__lt=timezone.now())
+                .values_list('pk', flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            deleted += BlacklistedToken.objects.filter(pk__in=ids).delete()[0]
+            batches += 1
+
+        if deleted:
+            with self._lock:
+                # Pruned entries still set bits: start a fresh filter
+                self._filter = None
+        return deleted
+
+    def prune_if_due(self):
+        now = time.monotonic()
+        with self._lock:
+            if now < self._next_prune:
+                return 0
+            self._next_prune = now + get_setting('PRUNE_INTERVAL')
+        return self.prune(max_batches=1)
+
+    def stats(self):
+        with self._lock:
+            bloom = self._filter
+            return {
+                'loaded': bloom.count if bloom else 0,
+                'capacity': bloom.capacity if bloom else 0,
+                'filter_bytes': len(bloom.bits) if bloom else 0,
+            }
+
+    def reset(self):
+        with self._lock:
+            self._filter = None
+            self._generation = None
+
+    # Internals (called with the lock held)
+
+    def _sync(self):
+        generation = _current_generation()
+        if self._filter is not None and generation == self._generation:
+            return
+        self._generation = generation
+
+        if self._filter is None:
+            self._rebuild()
+            return
+
+        rows = BlacklistedToken.objects.filter(pk__gt=self._last_pk).order_by('pk').values_list('pk', 'jti')
+        for pk, jti in rows.iterator(chunk_size=2000):
+            self._filter.add(jti)
+            self._last_pk = pk
+        if self._filter.count > self._filter.capacity:
+            self._rebuild()
+
+    def _rebuild(self):
+        """Load every unexpired jti into a filter sized for twice as many."""
+        live = BlacklistedToken.objects.filter(expires_at__gte=timezone.now())
+        capacity = max(get_setting('CAPACITY'), live.count() * 2)
+        bloom = BloomFilter(capacity, get_setting('ERROR_RATE'))
+        # Newest row, expired or not: the next sync starts after it
+        self._last_pk = BlacklistedToken.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+        for jti in live.values_list('jti', flat=True).iterator(chunk_size=2000):
+            bloom.add(jti)
+        self._filter = bloom
+
+
+def cache_is_shared():
+    shared = get_setting('SHARED_CACHE')
+    if shared is None:
+        shared = settings.CACHES['default']['BACKEND'] not in LOCAL_CACHE_BACKENDS
+    return shared
+
+
+def _current_generation():
+    if cache_is_shared():
+        return cache.get(GENERATION_KEY, 0)
+    # Other processes can't see this cache: the newest row tells what changed
+    return BlacklistedToken.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+
+
+def _bump_generation():
+    if not cache.add(GENERATION_KEY, 1, None):
+        try:
+            cache.incr(GENERATION_KEY)
+        except ValueError:
+            cache.set(GENERATION_KEY, 1, None)
+
+
+token_blacklist = TokenBlacklist()
+
+
+def check_settings(app_configs, **kwargs):
+    """System check: the blacklist only stops reuse when rotation blacklists the old token."""
+    serializer = getattr(settings, 'SIMPLE_JWT', {}).get('TOKEN_REFRESH_SERIALIZER', '')
+    if not serializer.endswith('.BlacklistTokenRefreshSerializer'):
+        return []
+    # simplejwt replaces its api_settings object when SIMPLE_JWT changes
+    from rest_framework_simplejwt import settings as jwt_settings
+
+    current = jwt_settings.api_settings
+    if current.ROTATE_REFRESH_TOKENS and current.BLACKLIST_AFTER_ROTATION:
+        return []
+    return [checks.Error(
+        'BlacklistTokenRefreshSerializer needs ROTATE_REFRESH_TOKENS and BLACKLIST_AFTER_ROTATION.',
+        hint='Turn both on in SIMPLE_JWT: a refresh token could otherwise be reused '
+             'on a process whose Bloom filter has not loaded its blacklisting yet.',
+        id='blog.E001',
+    )]
+
+
+def blacklist_token(token):
+    """Blacklist a RefreshToken. Returns False if it already was."""
+    return token_blacklist.add(
+        token[api_settings.JTI_CLAIM], datetime_from_epoch(token['exp'])
+    )
+
+
+class BlacklistTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    TokenRefreshSerializer that rejects blacklisted refresh tokens and,
+    with BLACKLIST_AFTER_ROTATION, blacklists the one it rotates.
+    """
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        if token_blacklist.is_blacklisted(refresh[api_settings.JTI_CLAIM]):
+            raise InvalidToken('Token is blacklisted')
+
+        data = super().validate(attrs)
+
+        if api_settings.ROTATE_REFRESH_TOKENS and api_settings.BLACKLIST_AFTER_ROTATION:
+            if not blacklist_token(refresh):
+                # A concurrent request rotated this token first
+                raise InvalidToken('Token is blacklisted')
+        return data
@@ -0,0 +1,195 @@
+# blog/view_counter.py
+
+"""
+Write-behind view counter for posts.
+Like Laravel: queueing increments and flushing them in a batch job.
+
+Views are buffered in process and written with `UPDATE ... SET views =
+views + n`, once FLUSH_THRESHOLD views are pending or the oldest is
+FLUSH_INTERVAL seconds old. A background thread (started from asgi.py and
+wsgi.py) also flushes every FLUSH_INTERVAL seconds. Listeners receive each
+flushed batch inside the flush's transaction (blog/analytics.py).
+"""
+
+import atexit
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Post
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'FLUSH_THRESHOLD': 100,  # Pending views before a flush is forced
+    'FLUSH_INTERVAL': 5,     # Max seconds a view may stay buffered
+}
+
+
+def get_setting(name):
+    """Read a BLOG_VIEW_COUNTER setting with a fallback default."""
+    return getattr(settings, 'BLOG_VIEW_COUNTER', {}).get(name, DEFAULTS[name])
+
+
+class ViewCounter:
+    """
+    Buffers view increments per post and flushes them in batches.
+    Thread-safe: sync views run in a thread pool under Daphne.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = defaultdict(int)  # post_id -> buffered views
+        self._pending_total = 0
+        self._oldest = None               # monotonic time of oldest pending view
+        self._flushed_total = 0
+        self._flush_count = 0
+        self._listeners = []
+        self._thread = None
+        self._stopped = threading.Event()
+
+    def record(self, post_id, count=1):
+        """Buffer `count` views for a post, flushing if a limit is reached."""
+        with self._lock:
+            self._pending[post_id] += count
+            self._pending_total += count
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            due = self._is_due()
+
+        if due:
+            self.flush()
+
+    def add_listener(self, listener):
+        """
+        Call listener(pending, flushed_at) after each flush's UPDATEs, in the
+        same transaction: pending maps post id -> views written. A listener
+        that raises rolls the flush back and its views are retried.
+        """
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def pending_for(self, post_id):
+        """Views buffered for a post but not yet written to the database."""
+        with self._lock:
+            return self._pending.get(post_id, 0)
+
+    def flush_if_due(self):
+        """Flush only if the buffer is over its threshold or age limit."""
+        with self._lock:
+            due = self._is_due()
+        if due:
+            self.flush()
+
+    def flush(self):
+        """
+        Write all buffered views to the database.
+        Posts sharing the same increment are updated in one statement.
+
+        Returns the number of views written.
+        """
+        with self._lock:
+            pending = self._pending
+            self._pending = defaultdict(int)
+            self._pending_total = 0
+            self._oldest = None
+
+        if not pending:
+            return 0
+
+        # Group post ids by increment: {3: [1, 7], 1: [2, 4, 5]}
+        by_increment = defaultdict(list)
+        for post_id, count in pending.items():
+            by_increment[count].append(post_id)
+
+        flushed_at = timezone.now()
+        try:
+            with transaction.atomic():
+                for count, post_ids in by_increment.items():
+                    # update() skips save(): no full-row write, no updated_at bump
+                    Post.objects.filter(pk__in=post_ids).update(views=F('views') + count)
+                for listener in self._listeners:
+                    listener(dict(pending), flushed_at)
+        except Exception:
+            # Put the views back so they are retried on the next flush
+            with self._lock:
+                for post_id, count in pending.items():
+                    self._pending[post_id] += count
+                    self._pending_total += count
+                if self._oldest is None:
+                    self._oldest = time.monotonic()
+            raise
+
+        written = sum(pending.values())
+        with self._lock:
+            self._flushed_total += written
+            self._flush_count += 1
+
+        return written
+
+    def start(self):
+        """Flush from a background thread every FLUSH_INTERVAL seconds."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name='blog-view-counter', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop the background thread (pending views stay buffered)."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        while not self._stopped.wait(get_setting('FLUSH_INTERVAL')):
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Flushing views failed')
+            finally:
+                # Like the end of a request: don't keep this thread's connection open
+                close_old_connections()
+
+    def stats(self):
+        """Pending and flushed counts (for monitoring)."""
+        with self._lock:
+            oldest_age = time.monotonic() - self._oldest if self._oldest else 0
+            return {
+                'pending_views': self._pending_total,
+                'pending_posts': len(self._pending),
+                'oldest_pending_seconds': round(oldest_age, 3),
+                'flushed_views': self._flushed_total,
+                'flush_count': self._flush_count,
+                'flush_threshold': get_setting('FLUSH_THRESHOLD'),
+                'flush_interval': get_setting('FLUSH_INTERVAL'),
+            }
+
+    def _is_due(self):
+        # Caller must hold self._lock
+        if not self._pending:
+            return False
+        if self._pending_total >= get_setting('FLUSH_THRESHOLD'):
+            return True
+        return time.monotonic() - self._oldest >= get_setting('FLUSH_INTERVAL')
+
+
+# Process-wide counter (like a Laravel singleton binding)
+view_counter = ViewCounter()
+
+
+@atexit.register
+def _flush_on_exit():
+    """Don't lose buffered views when the server shuts down."""
+    try:
+        view_counter.flush()
+    except Exception:
+        logger.exception('Flushing views at exit failed')
@@ -8,6 +8,10 @@ from .models import Post, Category, Comment
 from django.contrib import messages
 from django.urls import reverse
 from .forms import CommentForm, ContactForm, PostForm
+from .fragment_cache import category_slugs
+from .related import get_related_posts
+from .response_cache import cache_response, is_cacheable_request, post_last_modified
+from .view_counter import view_counter
 
 # Function-based views (FBV) - Simple approach
 
@@ -17,17 +21,14 @@ def home(request):
     Like Laravel: public function home(Request $request)
     """
     # Get latest 5 published posts
-    latest_posts = Post.objects.filter(status='published').order_by('-created_at')[:5]
+    latest_posts = Post.objects.filter(status='published').for_list().order_by('-created_at')[:5]
     
-    # Count statistics
-    total_posts = Post.objects.filter(status='published').count()
-    total_categories = Category.objects.count()
+    # Post and category counts come from {% site_counts %} inside the
+    # cached fragment, so they are counted only when it misses
     
     # Context is like Laravel's compact() or with()
     context = {
         'latest_posts': latest_posts,
-        'total_posts': total_posts,
-        'total_categories': total_categories,
     }
     
     # render() is like Laravel's view()
@@ -38,11 +39,15 @@ def post_list(request):
     List all published posts.
     Like Laravel: Post::where('status', 'published')->get()
     """
-    posts = Post.objects.filter(status='published').order_by('-created_at')
+    # Lazy querysets: cached template fragments skip them entirely
+    posts = Post.objects.filter(status='published').for_list().order_by('-created_at')
     categories = Category.objects.all()
     
     # Filter by category if provided
     category_slug = request.GET.get('category')  # Like Laravel's request()->query('category')
+    # Unknown values show all posts: they'd each get fragment cache entries otherwise
+    if category_slug not in category_slugs():
+        category_slug = None
     if category_slug:
         posts = posts.filter(categories__slug=category_slug)
     
@@ -54,6 +59,13 @@ def post_list(request):
     
     return render(request, 'blog/post_list.html', context)
 
+def count_cached_view(request, entry):
+    """A cached post page was sent (not a 304): still count the view."""
+    if entry['object_id'] is not None:
+        view_counter.record(entry['object_id'])
+
+
+@cache_response(last_modified=post_last_modified, on_hit=count_cached_view)
 def post_detail(request, slug):
     """
     Show single post.
@@ -65,31 +77,33 @@ def post_detail(request, slug):
     # Get post or return 404 (like Laravel's findOrFail)
     post = get_object_or_404(Post, slug=slug, status='published')
     
-    # Increment views
+    # Increment views (buffered, flushed in batches with F('views') + n)
+    view_counter.record(post.id)
+    # Count this view (not in the row loaded above); other buffered views show after a flush
     post.views += 1
-    post.save()
     
     # Get comments for this post
     comments = post.comments.filter(is_approved=True).order_by('-created_at')
     
-    # Get related posts (same categories)
-    related_posts = Post.objects.filter(
-        categories__in=post.categories.all(),
-        status='published'
-    ).exclude(id=post.id).distinct()[:3]
+    # Get related posts (precomputed by blog/related.py)
+    related_posts = get_related_posts(post)
     
     context = {
         'post': post,
         'comments': comments,
         'related_posts': related_posts,
+        # A cached page would show the same count for the whole timeout
+        'show_views': not is_cacheable_request(request),
     }
     
-    return render(request, 'blog/post_detail.html', context)
+    response = render(request, 'blog/post_detail.html', context)
+    response.cache_object_id = post.id  # Lets cache hits count the view
+    return response
 
 def category_posts(request, slug):
     """Show all posts in a category."""
     category = get_object_or_404(Category, slug=slug)
-    posts = category.posts.filter(status='published').order_by('-created_at')
+    posts = category.posts.filter(status='published').for_list().order_by('-created_at')
     
     context = {
         'category': category,
@@ -113,7 +127,7 @@ class PostListView(ListView):
     
     def get_queryset(self):
         """Filter queryset (like Laravel query scope)"""
-        return Post.objects.filter(status='published').order_by('-created_at')
+        return Post.objects.filter(status='published').for_list().order_by('-created_at')
     
     def get_context_data(self, **kwargs):
         """Add extra context (like Laravel's with())"""
@@ -143,11 +157,8 @@ class PostDetailView(DetailView):
             is_approved=True
         ).order_by('-created_at')
         
-        # Get related posts
-        context['related_posts'] = Post.objects.filter(
-            categories__in=self.object.categories.all(),
-            status='published'
-        ).exclude(id=self.object.id).distinct()[:3]
+        # Get related posts (precomputed by blog/related.py)
+        context['related_posts'] = get_related_posts(self.object)
         
         return context
 
@@ -155,6 +166,7 @@ class PostDetailView(DetailView):
 # API-style view (returning JSON)
 from django.http import JsonResponse
 
+@cache_response(last_modified=post_last_modified)
 def post_api(request, slug):
     """
     Return post as JSON.
@@ -167,6 +179,7 @@ def post_api(request, slug):
         'title': post.title,
         'slug': post.slug,
         'content': post.content,
+        'content_html': post.content_html,
         'author': post.author.username,
         'created_at': post.created_at.isoformat(),
         'views': post.views,
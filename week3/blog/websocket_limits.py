@@ -0,0 +1,234 @@
+# blog/websocket_limits.py
+
+"""
+Flow control for websocket consumers.
+Like Laravel's RateLimiter / ThrottleRequests, for sockets.
+
+FlowControlMixin rate-limits incoming messages (closing with 4029 after
+MAX_VIOLATIONS), queues at most SEND_QUEUE_SIZE outgoing frames per burst
+(Daphne's own transport buffer can't be bounded from ASGI) and keeps
+per-room counters for GET /api/stats/websockets/.
+
+Settings: BLOG_WEBSOCKET_LIMITS (see DEFAULT_LIMITS).
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+
+from django.conf import settings
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LIMITS = {
+    'RECEIVE_RATE': 5,
+    'RECEIVE_BURST': 20,
+    'MAX_VIOLATIONS': 50,
+    'SEND_QUEUE_SIZE': 200,
+    'OVERFLOW_POLICY': 'drop_oldest',
+    'METRICS_ROOMS': 1000,
+}
+
+DROP_OLDEST = 'drop_oldest'
+DISCONNECT = 'disconnect'
+
+# Close codes (4000-4999 are free for applications)
+CLOSE_RATE_LIMITED = 4029
+CLOSE_TOO_SLOW = 4008
+
+
+def get_limits():
+    return {**DEFAULT_LIMITS, **getattr(settings, 'BLOG_WEBSOCKET_LIMITS', {})}
+
+
+class TokenBucket:
+    """
+    `rate` tokens per second, holding at most `capacity`.
+    Starts full, so a client may send a burst right after connecting.
+    """
+
+    def __init__(self, rate, capacity, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.clock = clock
+        self.updated = clock()
+
+    def consume(self, tokens=1):
+        """Take tokens if available. Returns False when the caller is over the limit."""
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= tokens:
+            self.tokens -= tokens
+            return True
+        return False
+
+
+class WebsocketMetrics:
+    """
+    Per-room counters, process-local (like view_counter.stats()).
+    Only the METRICS_ROOMS most recently used rooms are kept: room names
+    come from the URL, so clients could otherwise add rooms without limit.
+    """
+
+    FIELDS = ('connections', 'received', 'rate_limited', 'sent', 'dropped',
+              'disconnected', 'queued', 'queued_peak')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rooms = OrderedDict()
+
+    def incr(self, room, field, amount=1):
+        with self._lock:
+            self._counters(room)[field] += amount
+
+    def queued(self, room, amount):
+        with self._lock:
+            counters = self._counters(room)
+            counters['queued'] += amount
+            if counters['queued'] > counters['queued_peak']:
+                counters['queued_peak'] = counters['queued']
+
+    def snapshot(self):
+        with self._lock:
+            return {room: dict(counters) for room, counters in self._rooms.items()}
+
+    def reset(self):
+        with self._lock:
+            self._rooms.clear()
+
+    def _counters(self, room):
+        # Caller must hold self._lock
+        counters = self._rooms.get(room)
+        if counters is None:
+            counters = self._rooms[room] = dict.fromkeys(self.FIELDS, 0)
+            while len(self._rooms) > get_limits()['METRICS_ROOMS']:
+                self._rooms.popitem(last=False)
+        else:
+            self._rooms.move_to_end(room)
+        return counters
+
+
+websocket_metrics = WebsocketMetrics()
+
+
+class FlowControlMixin:
+    """
+    Rate-limited receive and bounded send for AsyncWebsocketConsumer.
+    List it before AsyncWebsocketConsumer:
+
+        class ChatConsumer(FlowControlMixin, AsyncWebsocketConsumer):
+            def get_metrics_room(self):
+                return self.room_group_name
+
+    `overflow_policy` overrides the OVERFLOW_POLICY setting per consumer.
+    """
+
+    overflow_policy = None
+
+    def get_metrics_room(self):
+        """Name the connection's counters are kept under."""
+        return self.__class__.__name__
+
+    # Setup / teardown
+
+    async def websocket_connect(self, message):
+        limits = get_limits()
+        self._bucket = TokenBucket(limits['RECEIVE_RATE'], limits['RECEIVE_BURST'])
+        self._max_violations = limits['MAX_VIOLATIONS']
+        self._violations = 0
+        self._last_notice = 0.0
+        self._policy = self.overflow_policy or limits['OVERFLOW_POLICY']
+        self._outbox = deque()
+        self._outbox_size = limits['SEND_QUEUE_SIZE']
+        self._outbox_ready = asyncio.Event()
+        self._writer = None
+        self._closing = False
+        await super().websocket_connect(message)
+        websocket_metrics.incr(self.get_metrics_room(), 'connections')
+
+    async def websocket_disconnect(self, message):
+        if getattr(self, '_writer', None) is not None:
+            self._writer.cancel()
+        if getattr(self, '_outbox', None):
+            websocket_metrics.queued(self.get_metrics_room(), -len(self._outbox))
+            self._outbox.clear()
+        await super().websocket_disconnect(message)
+
+    # Incoming
+
+    async def websocket_receive(self, message):
+        room = self.get_metrics_room()
+        if self._bucket.consume():
+            websocket_metrics.incr(room, 'received')
+            await super().websocket_receive(message)
+            return
+
+        websocket_metrics.incr(room, 'rate_limited')
+        self._violations += 1
+        if self._violations >= self._max_violations:
+            await self._close_for(CLOSE_RATE_LIMITED)
+            return
+
+        now = time.monotonic()
+        if now - self._last_notice >= 1:
+            self._last_notice = now
+            await self.send(text_data='{"type": "error", "code": "rate_limited", '
+                                      '"message": "Too many messages, slow down"}')
+
+    # Outgoing
+
+    async def send(self, text_data=None, bytes_data=None, close=False):
+        """Queue a frame for the writer task instead of writing it directly."""
+        if close:
+            # Flush nothing: closing must not wait behind a slow reader
+            await super().send(text_data=text_data, bytes_data=bytes_data, close=close)
+            return
+        if self._closing:
+            return
+
+        room = self.get_metrics_room()
+        if len(self._outbox) >= self._outbox_size:
+            if self._policy == DISCONNECT:
+                websocket_metrics.incr(room, 'dropped')
+                await self._close_for(CLOSE_TOO_SLOW)
+                return
+            self._outbox.popleft()
+            websocket_metrics.incr(room, 'dropped')
+            websocket_metrics.queued(room, -1)
+
+        self._outbox.append((text_data, bytes_data))
+        websocket_metrics.queued(room, 1)
+        self._outbox_ready.set()
+        if self._writer is None:
+            self._writer = asyncio.ensure_future(self._write_frames())
+            self._writer.add_done_callback(self._writer_done)
+
+    async def _write_frames(self):
+        room = self.get_metrics_room()
+        while True:
+            await self._outbox_ready.wait()
+            while self._outbox:
+                text_data, bytes_data = self._outbox.popleft()
+                websocket_metrics.queued(room, -1)
+                await super().send(text_data=text_data, bytes_data=bytes_data)
+                websocket_metrics.incr(room, 'sent')
+            self._outbox_ready.clear()
+
+    def _writer_done(self, task):
+        # Cleared on any exit, so the next send() starts a new writer
+        self._writer = None
+        if not task.cancelled() and task.exception() is not None:
+            logger.error('Websocket writer for %s failed', self.get_metrics_room(),
+                         exc_info=task.exception())
+
+    async def _close_for(self, code):
+        if self._closing:
+            return
+        self._closing = True
+        websocket_metrics.incr(self.get_metrics_room(), 'disconnected')
+        await self.close(code=code)
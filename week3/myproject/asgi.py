@@ -13,6 +13,10 @@ django_asgi_app = get_asgi_application()
 
 # Import routing after Django is initialized
 from blog import routing
+from blog.view_counter import view_counter
+
+# Write buffered page views every few seconds, even without new requests
+view_counter.start()
 
 application = ProtocolTypeRouter({
     "http": django_asgi_app,
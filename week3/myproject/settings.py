@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -47,6 +48,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'blog.profiling.ProfilingMiddleware',  # No-op unless BLOG_PROFILING['ENABLED']
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -91,7 +93,8 @@ WSGI_APPLICATION = 'myproject.wsgi.application'
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        # BLOG_DATABASE_NAME: another SQLite file (benchmark_api --server uses it)
+        'NAME': os.environ.get('BLOG_DATABASE_NAME', BASE_DIR / 'db.sqlite3'),
     }
 }
 
@@ -137,6 +140,13 @@ STATIC_URL = 'static/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# HTTP Basic auth runs the password hasher on every request it authenticates.
+# Off by default: clients use JWT (or the session, for the browsable API).
+BLOG_BASIC_AUTH = False
+
+# Seconds a token's user is cached by CachedJWTAuthentication (blog/authentication.py)
+BLOG_AUTH_USER_CACHE_TIMEOUT = 60
+
 REST_FRAMEWORK = {
     # Use Django's standard `django.contrib.auth` permissions
     'DEFAULT_PERMISSION_CLASSES': [
@@ -162,9 +172,9 @@ REST_FRAMEWORK = {
     
     # Authentication
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'blog.authentication.CachedJWTAuthentication',  # JWT, user cached
         'rest_framework.authentication.SessionAuthentication',
-        'rest_framework.authentication.BasicAuthentication',
+        *(['rest_framework.authentication.BasicAuthentication'] if BLOG_BASIC_AUTH else []),
     ],
     
     # Filtering
@@ -183,7 +193,9 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),  # Refresh token expires in 7 days
     'ROTATE_REFRESH_TOKENS': True,  # Get new refresh token when refreshing
     'BLACKLIST_AFTER_ROTATION': True,  # Blacklist old refresh tokens
-    'UPDATE_LAST_LOGIN': True,  # Update last_login field
+    # Checks and fills the blacklist in blog/token_blacklist.py
+    'TOKEN_REFRESH_SERIALIZER': 'blog.token_blacklist.BlacklistTokenRefreshSerializer',
+    'UPDATE_LAST_LOGIN': False,  # No users table write per token obtain
     
     'ALGORITHM': 'HS256',
     'SIGNING_KEY': SECRET_KEY,
@@ -239,11 +251,121 @@ CORS_ALLOW_ALL_ORIGINS = True
 # Channels Configuration
 ASGI_APPLICATION = 'myproject.asgi.application'
 
-CHANNEL_LAYERS = {
-    'default': {
-        'BACKEND': 'channels_redis.core.RedisChannelLayer',
-        'CONFIG': {
-            "hosts": [('127.0.0.1', 6379)],
+# In-process layer by default (blog/channel_layer.py): no Redis needed for
+# development, tests or a single server process. Set CHANNEL_REDIS_URL
+# (e.g. redis://127.0.0.1:6379/0) when several processes share groups.
+if os.environ.get('CHANNEL_REDIS_URL'):
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels_redis.core.RedisChannelLayer',
+            'CONFIG': {
+                "hosts": [os.environ['CHANNEL_REDIS_URL']],
+            },
         },
-    },
-}
\ No newline at end of file
+    }
+else:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'blog.channel_layer.LocalChannelLayer',
+            'CONFIG': {
+                'batch_types': ['chat.frame'],  # Coalesce chat bursts into one frame
+                'max_batch': 50,
+            },
+        },
+    }
+
+# Write-behind view counter (blog/view_counter.py)
+BLOG_VIEW_COUNTER = {
+    'FLUSH_THRESHOLD': 100,  # Flush after this many buffered views
+    'FLUSH_INTERVAL': 5,  # ...or when the oldest buffered view is this old (seconds; also the background flush period)
+}
+
+# Hourly/daily view buckets for trending posts (blog/analytics.py)
+BLOG_VIEW_ANALYTICS = {
+    'HOURLY_RETENTION': 48,  # Hours kept per hour, then folded into days
+    'DAILY_RETENTION': 90,  # Days kept per day, then dropped
+}
+
+# In-memory most viewed posts, global and per category (blog/leaderboard.py)
+BLOG_LEADERBOARD = {
+    'SIZE': 10,  # Posts kept per board (/api/posts/popular/ shows this many)
+    'RECONCILE_INTERVAL': 300,  # Reload a board from the database after this many seconds
+}
+
+# Post search engine (blog/search.py)
+# Use 'blog.search.DatabaseSearchBackend' for plain icontains lookups
+BLOG_SEARCH_BACKEND = 'blog.search.SQLiteFTSBackend'
+
+# Cache (per-process memory by default; point at Redis/Memcached in production
+# so every worker shares snapshots and invalidations)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'blog',
+    }
+}
+
+# Seconds a /api/stats/ or dashboard stats snapshot is reused (blog/stats.py)
+BLOG_STATS_CACHE_TIMEOUT = 60
+
+# Seconds an anonymous post page/API response is cached (blog/response_cache.py)
+BLOG_RESPONSE_CACHE_TIMEOUT = 300
+
+# Cached template fragments of the HTML views (blog/fragment_cache.py)
+BLOG_FRAGMENT_CACHE = {
+    'ENABLED': True,
+    'TIMEOUT': 600,  # Seconds; signals invalidate changed fragments sooner
+}
+
+# Most comments one POST /api/comments/moderate/ may touch (blog/moderation.py)
+BLOG_MODERATION_MAX_BATCH = 5000
+
+# Rows validated and inserted together by post imports (blog/bulk_io.py)
+BLOG_IMPORT_BATCH_SIZE = 500
+
+# Largest body and most rows one POST /api/import/posts/ accepts (413 beyond)
+BLOG_IMPORT_MAX_BYTES = 10 * 1024 * 1024
+BLOG_IMPORT_MAX_ROWS = 10000
+
+# Per-connection websocket flow control (blog/websocket_limits.py)
+BLOG_WEBSOCKET_LIMITS = {
+    'RECEIVE_RATE': 5,  # Messages per second a client may publish...
+    'RECEIVE_BURST': 20,  # ...in bursts of up to this many
+    'MAX_VIOLATIONS': 50,  # Close the socket after this many rate-limited messages
+    'SEND_QUEUE_SIZE': 200,  # Frames of a burst waiting to be sent (Daphne's own buffer is not limited)
+    'OVERFLOW_POLICY': 'drop_oldest',  # Full queue: 'drop_oldest' or 'disconnect'
+    'METRICS_ROOMS': 1000,  # Rooms with counters at /api/stats/websockets/ (least recently used dropped)
+}
+
+# Chat history replayed to new websocket connections (blog/chat_history.py)
+BLOG_CHAT_HISTORY = {
+    'SIZE': 100,  # Messages kept per room
+    'PERSIST_DIR': None,  # Directory for append-only room logs (None: memory only)
+    'PERSIST_ROOMS': None,  # Room group names with a log, e.g. ['chat_lobby'] (None: all)
+    'MAX_ROOMS': 1000,  # Rooms kept in memory, least recently used dropped first
+}
+
+# Notifications sent from model signals (blog/notifications.py)
+BLOG_NOTIFICATIONS = {
+    'WINDOW': 1.0,  # Seconds notifications are collected and coalesced before sending
+    'BACKGROUND': True,  # Send from a background thread, off the request
+}
+
+# Per-request query/latency profiling (blog/profiling.py), report at /api/stats/profile/
+BLOG_PROFILING = {
+    'ENABLED': False,
+    'SAMPLE_RATE': 1.0,  # Fraction of requests profiled
+    'WINDOW': 500,  # Recent samples kept per URL name
+    'NPLUSONE_THRESHOLD': 10,  # Repeated similar queries that flag a request as N+1
+}
+
+# Refresh-token blacklist (blog/token_blacklist.py)
+BLOG_TOKEN_BLACKLIST = {
+    'CAPACITY': 100_000,  # Initial Bloom filter size in tokens
+    'ERROR_RATE': 0.01,  # Share of valid refresh tokens that still need a table lookup
+    'PRUNE_INTERVAL': 3600,  # Seconds between opportunistic prunes of expired rows
+    'PRUNE_BATCH_SIZE': 1000,
+    # Is CACHES['default'] shared by every process? None guesses from the backend;
+    # with LocMemCache each check reads the newest blacklist row instead
+    'SHARED_CACHE': None,
+}
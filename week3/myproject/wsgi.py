@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'myproject.settings')
 
 application = get_wsgi_application()
+
+# Write buffered page views every few seconds, even without new requests
+from blog.view_counter import view_counter  # noqa: E402
+
+view_counter.start()
@@ -2,40 +2,94 @@
 
 import { useEffect, useRef, useState, useCallback } from 'react';
 
+// Wait before reconnecting after the server closed the socket
+const RECONNECT_DELAY = 2000;
+
 function useWebSocket(url) {
     const [isConnected, setIsConnected] = useState(false);
     const [messages, setMessages] = useState([]);
     const [error, setError] = useState(null);
     const ws = useRef(null);
+    // Position in the room's history, sent back as ?after=&epoch= on reconnect
+    const lastSeq = useRef(0);
+    const epoch = useRef(null);
 
     useEffect(() => {
-        // Create WebSocket connection
-        ws.current = new WebSocket(url);
+        let closedByUs = false;
+        let reconnectTimer = null;
+        lastSeq.current = 0;
+        epoch.current = null;
 
-        ws.current.onopen = () => {
-            console.log('✅ WebSocket Connected');
-            setIsConnected(true);
-            setError(null);
-        };
+        // Live frames can overlap the history frame: keep each seq once
+        const fresh = (received) => received.filter((message) => {
+            if (message.seq === undefined) {
+                return true;
+            }
+            if (message.seq <= lastSeq.current) {
+                return false;
+            }
+            lastSeq.current = message.seq;
+            return true;
+        });
 
-        ws.current.onmessage = (event) => {
-            const data = JSON.parse(event.data);
-            console.log('📨 Message received:', data);
-            setMessages((prev) => [...prev, data]);
-        };
+        const connect = () => {
+            const resume = epoch.current
+                ? `${url.includes('?') ? '&' : '?'}after=${lastSeq.current}&epoch=${epoch.current}`
+                : '';
+            ws.current = new WebSocket(url + resume);
 
-        ws.current.onerror = (error) => {
-            console.error('❌ WebSocket Error:', error);
-            setError('WebSocket connection error');
-        };
+            ws.current.onopen = () => {
+                console.log('✅ WebSocket Connected');
+                setIsConnected(true);
+                setError(null);
+            };
 
-        ws.current.onclose = () => {
-            console.log('🔌 WebSocket Disconnected');
-            setIsConnected(false);
+            ws.current.onmessage = (event) => {
+                const data = JSON.parse(event.data);
+                console.log('📨 Message received:', data);
+
+                if (data.type === 'history') {
+                    epoch.current = data.epoch;
+                    if (data.reset) {
+                        // Our position can't be resumed: the history replaces what we have
+                        lastSeq.current = 0;
+                        setMessages(fresh(data.messages));
+                    } else {
+                        const missed = fresh(data.messages);
+                        setMessages((prev) => [...prev, ...missed]);
+                    }
+                    lastSeq.current = Math.max(lastSeq.current, data.last_seq);
+                    return;
+                }
+
+                // Bursts of chat messages arrive as one frame
+                const received = fresh(data.type === 'batch' ? data.messages : [data]);
+                if (received.length) {
+                    setMessages((prev) => [...prev, ...received]);
+                }
+            };
+
+            ws.current.onerror = (error) => {
+                console.error('❌ WebSocket Error:', error);
+                setError('WebSocket connection error');
+            };
+
+            ws.current.onclose = () => {
+                console.log('🔌 WebSocket Disconnected');
+                setIsConnected(false);
+                if (!closedByUs) {
+                    // Resume where we left off; the server replays what we missed
+                    reconnectTimer = setTimeout(connect, RECONNECT_DELAY);
+                }
+            };
         };
 
-        // Cleanup on unmount
+        connect();
+
+        // Cleanup on unmount (or room change)
         return () => {
+            closedByUs = true;
+            clearTimeout(reconnectTimer);
             if (ws.current) {
                 ws.current.close();
             }
@@ -63,4 +117,4 @@ function useWebSocket(url) {
     };
 }
 
-export default useWebSocket;
\ No newline at end of file
+export default useWebSocket;